@@ -0,0 +1,245 @@
+"""Local stand-in for ``databricks.sql`` so the app can be benchmarked without a workspace.
+
+Every statement sleeps for ``latency`` plus ``row_cost`` per returned row (the time a
+real warehouse round trip spends off the GIL) and returns synthetic rows. Result
+columns are taken from the statement's select list and the row count is ``rows``,
+capped by the named query's ``max_rows`` and by a bound ``:limit``, so new queries are
+served without changes here. Serve the app against it from backend_python:
+
+    python -m benchmarks.fake_warehouse --port 8765 --latency 0.05 --rows 1000
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.queries import QUERIES
+from services.result_conversion import ARROW_AVAILABLE
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+
+_STATIC_QUERIES = {" ".join(q.sql.split()): q for q in QUERIES.values() if q.sql}
+_ALIAS = re.compile(r"\s+as\s+(\w+)\s*$", re.IGNORECASE)
+_LITERAL = re.compile(r"^'([^']*)'$")
+_STATUSES = ("low", "normal", "urgent")
+
+
+def _registered_query(sql: str):
+    """The registered query a statement was built from, or None"""
+    query = _STATIC_QUERIES.get(" ".join(sql.split()))
+    if query is not None:
+        return query
+    if "UNION ALL" in sql:
+        return QUERIES["journey_union"]
+    if "FROM customers c" in sql:
+        return QUERIES["customers_page"]
+    if "call_rollup_" in sql:
+        return QUERIES["call_trends"]
+    if "customer_id = :customer_id" in sql:
+        return QUERIES["journey_source"]
+    return None
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _select_list(branch: str) -> List[Tuple[str, str]]:
+    """(alias, expression) pairs of one SELECT"""
+    body = re.search(r"SELECT\s+(.*?)\s+FROM\s", branch, re.IGNORECASE | re.DOTALL).group(1)
+    columns = []
+    for expression in _split_top_level(body):
+        match = _ALIAS.search(expression)
+        alias = match.group(1) if match else expression.split(".")[-1]
+        columns.append((alias, expression[:match.start()].strip() if match else expression))
+    return columns
+
+
+def _value(alias: str, expression: str, i: int, now: datetime, params: Dict[str, Any]):
+    literal = _LITERAL.match(expression)
+    if literal:
+        return literal.group(1)
+    name = alias.lower()
+    if name == "customer_id" and "customer_id" in params:
+        return params["customer_id"]
+    if name.endswith("_id"):
+        prefix = "CUST" if name == "customer_id" else name[:-3].upper()
+        return f"{prefix}{i:06d}"
+    if name == "hour":
+        return i % 24
+    if name == "date":
+        return (now - timedelta(days=i // 24)).date()
+    if name == "latitude":
+        return 40.0 + (i % 1000) / 1000
+    if name == "longitude":
+        return -74.0 + (i % 1000) / 1000
+    if name.startswith("has_"):
+        return True
+    if name.endswith("status"):
+        return _STATUSES[i % len(_STATUSES)]
+    if any(part in name for part in ("time", "date", "_at", "bucket")):
+        return now - timedelta(minutes=i)
+    if any(part in name for part in ("count", "calls", "duration")):
+        return 1 + i % 50
+    return f"{alias} {i}"
+
+
+class FakeCursor:
+    def __init__(self, warehouse: "FakeWarehouse"):
+        self._warehouse = warehouse
+        self._columns: List[str] = []
+        self._rows: List[tuple] = []
+        self._offset = 0
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def execute(self, operation: str, parameters: Optional[Dict[str, Any]] = None):
+        self._columns, self._rows = self._warehouse.result(operation, parameters or {})
+        self._offset = 0
+        self.description = [(column, None, None, None, None, None, None) for column in self._columns]
+        time.sleep(self._warehouse.latency + self._warehouse.row_cost * len(self._rows))
+
+    def _take(self, size: Optional[int]) -> List[tuple]:
+        end = len(self._rows) if size is None else self._offset + size
+        rows = self._rows[self._offset:end]
+        self._offset += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self._take(None)
+
+    def fetchmany(self, size: int):
+        return self._take(size)
+
+    def _arrow(self, rows: List[tuple]):
+        return pa.table({column: [row[i] for row in rows] for i, column in enumerate(self._columns)})
+
+    def fetchall_arrow(self):
+        return self._arrow(self._take(None))
+
+    def fetchmany_arrow(self, size: int):
+        return self._arrow(self._take(size))
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        self._rows = []
+
+
+class FakeConnection:
+    def __init__(self, warehouse: "FakeWarehouse"):
+        self._warehouse = warehouse
+        self.open = True
+
+    def cursor(self):
+        return FakeCursor(self._warehouse)
+
+    def close(self):
+        self.open = False
+
+
+class FakeWarehouse:
+    """Synthetic results for any registered query, generated once per statement and reused"""
+
+    def __init__(self, latency: float = 0.05, row_cost: float = 0.00001, rows: int = 1000):
+        self.latency = latency
+        self.row_cost = row_cost
+        self.rows = rows
+        self._results: Dict[tuple, Tuple[List[str], List[tuple]]] = {}
+        self._lock = threading.Lock()
+
+    def connect(self, **kwargs) -> FakeConnection:
+        return FakeConnection(self)
+
+    def result(self, sql: str, params: Dict[str, Any]) -> Tuple[List[str], List[tuple]]:
+        query = _registered_query(sql)
+        count = self.rows
+        if query is not None and query.max_rows is not None:
+            count = min(count, query.max_rows)
+        if "limit" in params:
+            count = min(count, int(params["limit"]))
+        key = (sql, count, params.get("customer_id"), params.get("cursor"))
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is None:
+            cached = self._generate(sql, count, params)
+            with self._lock:
+                self._results[key] = cached
+        return cached
+
+    @staticmethod
+    def _generate(sql: str, count: int, params: Dict[str, Any]) -> Tuple[List[str], List[tuple]]:
+        branches = [_select_list(branch) for branch in sql.split("UNION ALL")]
+        columns = [alias for alias, _ in branches[0]]
+        # Keyset pages continue after the cursor id
+        first = int(re.sub(r"\D", "", str(params["cursor"])) or 0) + 1 if params.get("cursor") else 0
+        now = datetime.now()
+        rows = []
+        for i in range(first, first + count):
+            branch = branches[i % len(branches)]
+            rows.append(tuple(_value(alias, expression, i, now, params) for alias, expression in branch))
+        return columns, rows
+
+
+def install(warehouse: FakeWarehouse) -> None:
+    """Make ``from databricks import sql`` return ``warehouse`` and leave mock data mode"""
+    module = types.ModuleType("databricks.sql")
+    module.connect = warehouse.connect
+    package = sys.modules.get("databricks")
+    if package is None:
+        try:
+            import databricks as package
+        except ImportError:
+            package = types.ModuleType("databricks")
+            package.__path__ = []
+            sys.modules["databricks"] = package
+    package.sql = module
+    sys.modules["databricks.sql"] = module
+    os.environ.setdefault("DATABRICKS_HTTP_PATH", "/sql/fake-warehouse")
+    os.environ.setdefault("DATABRICKS_SERVER_HOSTNAME", "fake-warehouse")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated round trip per query, seconds")
+    parser.add_argument("--row-cost", type=float, default=0.00001, help="Simulated cost per returned row, seconds")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per result set (capped by each query's max_rows)")
+    args = parser.parse_args()
+
+    install(FakeWarehouse(latency=args.latency, row_cost=args.row_cost, rows=args.rows))
+    import uvicorn
+    from main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare get_customer_journey query modes against a simulated warehouse.
+
+Each simulated query costs a fixed round trip (``--latency``) plus a per-row
+cost, which is what dominates the journey endpoint in production. Run from
+backend_python:
+
+    python -m benchmarks.journey_modes --latency 0.15 --events 40 --iterations 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Leave mock mode without needing a real workspace
+os.environ.setdefault("DATABRICKS_HTTP_PATH", "/sql/simulated")
+os.environ.setdefault("DATABRICKS_SERVER_HOSTNAME", "simulated")
+
+from services.connection_pool import ConnectionPool
+from services.databricks_service import (
+    DatabricksService,
+    JOURNEY_COLUMN_TYPES,
+    JOURNEY_QUERY_MODES,
+    JOURNEY_SOURCES,
+)
+
+SOURCES_BY_TABLE = {source["table"]: source for source in JOURNEY_SOURCES}
+
+
+class _SimulatedCursor:
+    def __init__(self, latency: float, row_cost: float, events_per_source: int):
+        self._latency = latency
+        self._row_cost = row_cost
+        self._events_per_source = events_per_source
+        self._rows = []
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, parameters=None):
+        tables = [t for t in re.findall(r"FROM (\w+)", query) if t in SOURCES_BY_TABLE]
+        union = len(tables) > 1
+        columns = ["event_type", "event_id", "event_time", *JOURNEY_COLUMN_TYPES] if union else None
+        rows = []
+        now = datetime.now()
+        for table in tables:
+            source = SOURCES_BY_TABLE[table]
+            source_columns = columns or ["event_id", "event_time", *source["columns"]]
+            for i in range(self._events_per_source):
+                values = {
+                    "event_type": source["event_type"],
+                    "event_id": f"{source['event_type']}-{i}",
+                    "event_time": now - timedelta(hours=i),
+                }
+                rows.append(tuple(values.get(c, c if c in source["columns"] else None) for c in source_columns))
+            columns = columns or source_columns
+        time.sleep(self._latency + self._row_cost * len(rows))
+        self.description = [(c,) for c in (columns or [])]
+        self._rows = rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def cancel(self):
+        pass
+
+
+class _SimulatedConnection:
+    def __init__(self, **cursor_args):
+        self.open = True
+        self._cursor_args = cursor_args
+
+    def cursor(self):
+        return _SimulatedCursor(**self._cursor_args)
+
+    def close(self):
+        self.open = False
+
+
+def _build_service(mode: str, latency: float, row_cost: float, events_per_source: int) -> DatabricksService:
+    service = DatabricksService()
+    service._journey_query_mode = mode
+    service._pool = ConnectionPool(
+        lambda token: _SimulatedConnection(latency=latency, row_cost=row_cost, events_per_source=events_per_source)
+    )
+    return service
+
+
+async def _run_mode(mode: str, args) -> dict:
+    service = _build_service(mode, args.latency, args.row_cost, args.events)
+    timings = []
+    events = 0
+    try:
+        await service.get_customer_journey("CUST001", user_token="benchmark")  # warm the pool
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            events = len(await service.get_customer_journey("CUST001", user_token="benchmark"))
+            timings.append(time.perf_counter() - start)
+    finally:
+        await service.close()
+    timings.sort()
+    return {
+        "mode": mode,
+        "events": events,
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+    }
+
+
+async def main(args):
+    results = []
+    for mode in JOURNEY_QUERY_MODES:
+        results.append(await _run_mode(mode, args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<12}{'events':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['events']:>8}{r['mean_ms']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.15, help="Simulated round trip per query, seconds")
+    parser.add_argument("--row-cost", type=float, default=0.00002, help="Simulated cost per returned row, seconds")
+    parser.add_argument("--events", type=int, default=40, help="Events per source per customer")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,203 @@
+"""Load-test every /api GET endpoint of the app served against the fake warehouse.
+
+Starts ``benchmarks.fake_warehouse`` (the real FastAPI app with ``databricks.sql``
+replaced) in a subprocess, sends ``--requests`` requests per endpoint with
+``--concurrency`` keep-alive connections, and reports throughput and p50/p95/p99
+latency. ``--output`` writes the results as JSON, tagged with the git commit, so
+runs can be compared across commits. Run from backend_python:
+
+    python -m benchmarks.load_test --concurrency 16 --requests 400 --latency 0.05 --rows 1000 --output load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Values for path parameters of the endpoint templates
+PATH_PARAMS = {"customer_id": "CUST000042"}
+# Required query parameters of endpoints that have them
+QUERY_PARAMS = {
+    "/api/technicians/visits/clusters": "zoom=4",
+    "/api/technicians/nearest": "lat=40.71&lon=-74.01&k=5",
+}
+# Not part of the API under test (or a long-lived event stream)
+SKIPPED_PATHS = {"/api/customers/", "/api/metrics", "/api/live/events"}
+
+
+def discover_endpoints() -> List[str]:
+    """GET routes under /api, with path parameters filled in from PATH_PARAMS"""
+    from main import app
+
+    endpoints = []
+    for route in app.routes:
+        path = getattr(route, "path", "")
+        if not path.startswith("/api") or path in SKIPPED_PATHS or "GET" not in getattr(route, "methods", ()):
+            continue
+        query = QUERY_PARAMS.get(path)
+        endpoints.append(path.format(**PATH_PARAMS) + (f"?{query}" if query else ""))
+    return endpoints
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class _Client(threading.local):
+    """One keep-alive connection per worker thread"""
+
+    def __init__(self, host: str, port: int):
+        self.connection = http.client.HTTPConnection(host, port, timeout=120)
+
+
+def _run_endpoint(url: str, path: str, requests: int, concurrency: int, token: str) -> Dict:
+    parts = urlsplit(url)
+    client = _Client(parts.hostname, parts.port or 80)
+    headers = {"x-forwarded-access-token": token}
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def send(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            client.connection.request("GET", path, headers=headers)
+            response = client.connection.getresponse()
+            response.read()
+            failed = response.status >= 400
+        except (OSError, http.client.HTTPException):
+            client.connection.close()
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "endpoint": path,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def _wait_until_ready(url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            connection.request("GET", "/api/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} not ready after {timeout}s")
+
+
+def _start_server(args) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "benchmarks.fake_warehouse",
+        "--port", str(args.port),
+        "--latency", str(args.latency),
+        "--row-cost", str(args.row_cost),
+        "--rows", str(args.rows),
+    ]
+    # Keep the app's log output (slow-query warnings at high latency) out of the report
+    env = {**os.environ, "LOG_LEVEL": os.environ.get("LOG_LEVEL", "ERROR")}
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    endpoints = args.endpoint or discover_endpoints()
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    server = None if args.url else _start_server(args)
+    try:
+        if server is not None:
+            _wait_until_ready(url, server)
+        results = []
+        for path in endpoints:
+            # Warm-up request fills connection pools and caches the way steady traffic would
+            _run_endpoint(url, path, args.concurrency, args.concurrency, args.token)
+            results.append(_run_endpoint(url, path, args.requests, args.concurrency, args.token))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "latency": args.latency,
+            "row_cost": args.row_cost,
+            "rows": args.rows,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'endpoint':<40}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(
+            f"{r['endpoint']:<40}{r['errors']:>8}{r['throughput_rps']:>10}"
+            f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated round trip per query, seconds")
+    parser.add_argument("--row-cost", type=float, default=0.00001, help="Simulated cost per returned row, seconds")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per result set (capped by each query's max_rows)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--endpoint", action="append", help="Path to test (repeatable; default: every /api GET route)")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--token", default="benchmark", help="x-forwarded-access-token sent with each request")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    main(parser.parse_args())
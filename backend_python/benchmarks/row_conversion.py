@@ -0,0 +1,84 @@
+"""Micro-benchmark: per-cell row conversion vs. column-wise Arrow conversion.
+
+Builds synthetic result sets shaped like the technician visits query (ids,
+timestamps, coordinates, integers, text) and times both conversion paths used
+by DatabricksService._execute_query_sync. The connector receives results as
+Arrow either way, so the row path includes turning the table into Python row
+tuples (what cursor.fetchall() does) before the per-cell loop. Run from
+backend_python:
+
+    python -m benchmarks.row_conversion --rows 10000 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pyarrow as pa
+
+from services.result_conversion import convert_arrow_table, convert_rows
+
+
+def build_table(rows: int) -> "pa.Table":
+    start = datetime(2024, 1, 1)
+    return pa.table({
+        "visit_id": pa.array([f"VISIT{i:07d}" for i in range(rows)]),
+        "customer_id": pa.array([f"CUST{i % 50000:06d}" for i in range(rows)]),
+        "visit_date": pa.array([start + timedelta(minutes=i) for i in range(rows)], pa.timestamp("us")),
+        "visit_status": pa.array(["planned" if i % 3 else "underway" for i in range(rows)]),
+        "latitude": pa.array([30.0 + (i % 1000) / 100 for i in range(rows)], pa.float64()),
+        "longitude": pa.array([-100.0 + (i % 1000) / 100 for i in range(rows)], pa.float64()),
+        "estimated_duration": pa.array([30 + i % 90 for i in range(rows)], pa.int32()),
+    })
+
+
+def time_it(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> dict:
+    table = build_table(rows)
+    columns = table.column_names
+
+    def row_path_run():
+        # cursor.fetchall() materializes Row tuples from the Arrow batches first
+        fetched = list(zip(*(column.to_pylist() for column in table.columns)))
+        return convert_rows(columns, fetched)
+
+    row_path = time_it(row_path_run, repeat)
+    arrow_path = time_it(lambda: convert_arrow_table(table), repeat)
+    return {
+        "rows": rows,
+        "row_path_ms": round(row_path * 1000, 1),
+        "arrow_path_ms": round(arrow_path * 1000, 1),
+        "speedup": round(row_path / arrow_path, 2) if arrow_path else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best time is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(rows, args.repeat) for rows in args.rows]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rows':>10}{'row path ms':>14}{'arrow path ms':>16}{'speedup':>10}")
+    for r in results:
+        print(f"{r['rows']:>10}{r['row_path_ms']:>14}{r['arrow_path_ms']:>16}{r['speedup']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,53 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
+import logging
 import sys
+import uuid
 from pathlib import Path
 
 # Add the backend_python directory to Python path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
-from routers import customers, journey, dashboard, technicians
+from routers import customers, journey, dashboard, technicians, live
+from routers.dependencies import get_databricks_service
+from routers.streaming import ndjson_response, wants_ndjson
+from services import metrics
+from services.instrumentation import InstrumentationMiddleware
+from services.logging_setup import (
+    configure_logging,
+    debug_sampled_var,
+    request_id_var,
+    sample_request_debug,
+    shutdown_logging,
+)
 from services.databricks_service import DatabricksService
 import uvicorn
 import os
+import time
 from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Customer Journey API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # JSON logs go through a queue so request handlers never block on stdout
+    configure_logging()
+    # One service (executor, connection pool, state) shared by the app and every router
+    app.state.databricks_service = DatabricksService()
+    try:
+        yield
+    finally:
+        await app.state.databricks_service.close(
+            timeout=float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "30"))
+        )
+        shutdown_logging()
+
+app = FastAPI(title="Customer Journey API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS - allow all origins for Databricks Apps
 app.add_middleware(
@@ -26,26 +58,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create a shared service instance
-databricks_service = DatabricksService()
-
 # Include routers - these must be registered before the catch-all route
 # Note: For the customers root endpoint, we define it directly on the app to avoid router root path issues
 @app.get("/api/customers", tags=["customers"])
 @app.get("/api/customers/", tags=["customers"])
-async def get_all_customers_direct(request: Request):
-    """Get all customers with summaries - defined directly to avoid router root path issues"""
+async def get_all_customers_direct(
+    request: Request,
+    status: Optional[str] = Query(None, description="Filter by customer status (low, normal, urgent)"),
+    main_category: Optional[str] = Query(None, description="Filter by main product category"),
+    limit: int = Query(100, ge=1, le=1000, description="Max customers per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (or the last customer_id seen)"),
+    paginate: bool = Query(False, description="Return {customers, next_cursor} instead of a bare list"),
+    stream: bool = Query(False, description="Stream all matching rows as NDJSON (same as Accept: application/x-ndjson)"),
+    databricks_service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get a page of customers with summaries - defined directly to avoid router root path issues.
+    
+    Returns a list, as this endpoint always has, unless ``paginate`` asks for the cursor envelope.
+    """
     try:
-        print(f"DEBUG: get_all_customers_direct called, URL: {request.url}")
         user_token = request.headers.get("x-forwarded-access-token")
-        print(f"DEBUG: user_token present: {user_token is not None}")
-        customers_list = await databricks_service.get_all_customers(user_token=user_token)
-        print(f"DEBUG: get_all_customers_direct returning {len(customers_list)} customers")
-        return customers_list
+        logger.debug("get_all_customers_direct called", extra={"user_token_present": user_token is not None})
+        if wants_ndjson(request, stream):
+            # Streaming returns every matching row unless a limit is given explicitly
+            return ndjson_response(databricks_service.stream_customers(
+                user_token=user_token,
+                status=status,
+                main_category=main_category,
+                cursor=cursor,
+                limit=limit if "limit" in request.query_params else None,
+            ))
+        page = await databricks_service.get_customers_page(
+            user_token=user_token,
+            status=status,
+            main_category=main_category,
+            limit=limit,
+            cursor=cursor,
+        )
+        logger.debug("get_all_customers_direct returning %d customers", len(page["customers"]))
+        return page if paginate else page["customers"]
     except Exception as e:
-        print(f"ERROR: Exception in get_all_customers_direct: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in get_all_customers_direct: %s", e)
         from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -54,18 +107,52 @@ app.include_router(customers.router, prefix="/api/customers", tags=["customers"]
 app.include_router(journey.router, prefix="/api/journey", tags=["journey"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(technicians.router, prefix="/api/technicians", tags=["technicians"])
+app.include_router(live.router, prefix="/api/live", tags=["live"])
+
+# Request latency and response size per route, and a sampling profile of requests sent with
+# X-Profile: <PROFILE_TOKEN>; pure ASGI, registered before log_requests so it runs inside it
+# and sees the request id
+app.add_middleware(InstrumentationMiddleware)
 
-# Add a middleware to log all incoming requests for debugging
+# Tag every log line of a request with its id (X-Request-ID is honoured if the caller sends one)
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    print(f"DEBUG: Incoming request: {request.method} {request.url.path}")
-    response = await call_next(request)
-    print(f"DEBUG: Response status: {response.status_code}")
-    return response
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    request_id_reset = request_id_var.set(request_id)
+    # Debug lines are kept for a sample of requests (LOG_DEBUG_SAMPLE_RATE)
+    sampled_reset = debug_sampled_var.set(sample_request_debug())
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        log = logger.warning if response.status_code >= 500 else logger.debug
+        log(
+            "%s %s %d", request.method, request.url.path, response.status_code,
+            extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+        )
+        return response
+    finally:
+        request_id_var.reset(request_id_reset)
+        debug_sampled_var.reset(sampled_reset)
 
 @app.get("/api/health")
-async def health_check():
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+async def health_check(databricks_service: DatabricksService = Depends(get_databricks_service)):
+    return {
+        "status": "ok",
+        "timestamp": datetime.now().isoformat(),
+        "pool": databricks_service.get_pool_stats(),
+        "cache": databricks_service.get_cache_stats(),
+        "single_flight": databricks_service.get_single_flight_stats(),
+        "trends": databricks_service.get_trend_stats(),
+        "visit_index": databricks_service.get_visit_index_stats(),
+        "live": databricks_service.get_live_stats(),
+        "queries": databricks_service.get_query_stats(),
+    }
+
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Latency, row and size histograms in the Prometheus text format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 # Serve static files from frontend/dist
 frontend_dist = backend_dir.parent / "frontend" / "dist"
@@ -90,10 +177,9 @@ if frontend_available:
     @app.get("/{full_path:path}")
     async def serve_frontend(request: Request, full_path: str):
         # Don't serve frontend for API routes (shouldn't hit here due to route ordering, but be safe)
-        print(f"DEBUG: Catch-all route matched: {full_path}, URL: {request.url}")
         if full_path.startswith("api/"):
             from fastapi.responses import JSONResponse
-            print(f"DEBUG: Catch-all route returning 404 for API path: {full_path}")
+            logger.debug("Catch-all route returning 404 for API path: %s", full_path)
             return JSONResponse(status_code=404, content={"error": "API endpoint not found"})
         index_file = frontend_dist / "index.html"
         if index_file.exists():
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 import sys
 from pathlib import Path
 
@@ -6,15 +6,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.databricks_service import DatabricksService
+from routers.dependencies import get_databricks_service
 
 router = APIRouter()
-service = DatabricksService()
 
 # Root path handler removed - now defined directly in main.py to avoid router root path matching issues
 # This router now only handles sub-paths like /{customer_id}, /{customer_id}/summary, etc.
 
 @router.get("/{customer_id}")
-async def get_customer(customer_id: str, request: Request):
+async def get_customer(customer_id: str, request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get single customer by ID"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
@@ -27,8 +27,27 @@ async def get_customer(customer_id: str, request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{customer_id}/full")
+async def get_customer_full(
+    customer_id: str,
+    request: Request,
+    journey_limit: int = Query(200, ge=1, le=1000, description="Events in the first journey page"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get customer, AI summary, next best action and the first journey page in one response"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        full = await service.get_customer_full(customer_id, user_token=user_token, journey_limit=journey_limit)
+        if not full:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        return full
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{customer_id}/summary")
-async def get_customer_summary(customer_id: str, request: Request):
+async def get_customer_summary(customer_id: str, request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get customer AI summary"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
@@ -42,7 +61,7 @@ async def get_customer_summary(customer_id: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{customer_id}/next-action")
-async def get_next_best_action(customer_id: str, request: Request):
+async def get_next_best_action(customer_id: str, request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get next best action for customer"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import datetime
+from typing import Optional
+import logging
 import sys
 from pathlib import Path
 
@@ -6,28 +9,25 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.databricks_service import DatabricksService
+from routers.dependencies import get_databricks_service
 
 router = APIRouter()
-service = DatabricksService()
+logger = logging.getLogger(__name__)
 
 @router.get("/stats")
-async def get_dashboard_stats(request: Request):
+async def get_dashboard_stats(request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get dashboard statistics"""
     try:
-        print(f"DEBUG: get_dashboard_stats called, URL: {request.url}")
         user_token = request.headers.get("x-forwarded-access-token")
-        print(f"DEBUG: user_token present: {user_token is not None}")
         stats = await service.get_dashboard_stats(user_token=user_token)
-        print(f"DEBUG: get_dashboard_stats returning stats: {stats}")
+        logger.debug("get_dashboard_stats returning stats", extra={"stats": stats})
         return stats
     except Exception as e:
-        print(f"ERROR: Exception in get_dashboard_stats: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in get_dashboard_stats: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trends/hourly")
-async def get_hourly_trends(request: Request):
+async def get_hourly_trends(request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get hourly call trends"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
@@ -37,7 +37,7 @@ async def get_hourly_trends(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trends/daily")
-async def get_daily_trends(request: Request):
+async def get_daily_trends(request: Request, service: DatabricksService = Depends(get_databricks_service)):
     """Get daily call trends"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
@@ -46,3 +46,31 @@ async def get_daily_trends(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/summary")
+async def get_dashboard_summary(request: Request, service: DatabricksService = Depends(get_databricks_service)):
+    """Get dashboard statistics with hourly and daily trends"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        return await service.get_dashboard_summary(user_token=user_token)
+    except Exception as e:
+        logger.exception("Exception in get_dashboard_summary: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/trends")
+async def get_call_trends(
+    request: Request,
+    granularity: str = Query("hour", description="Bucket size: minute, hour, day or week"),
+    start: Optional[datetime] = Query(None, alias="from", description="Range start (ISO 8601, inclusive, UTC if no offset)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end (ISO 8601, exclusive, UTC if no offset)"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get call counts per bucket for an arbitrary range, served from the rollup tables"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        return await service.get_call_trends(granularity, start, end, user_token=user_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Exception in get_call_trends: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,13 @@
+from fastapi import Request
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.databricks_service import DatabricksService
+
+
+def get_databricks_service(request: Request) -> DatabricksService:
+    """Return the app-scoped DatabricksService created in main.py's lifespan"""
+    return request.app.state.databricks_service
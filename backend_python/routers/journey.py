@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
 import sys
 from pathlib import Path
 
@@ -6,17 +7,34 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.databricks_service import DatabricksService
+from routers.dependencies import get_databricks_service
 
 router = APIRouter()
-service = DatabricksService()
 
 @router.get("/{customer_id}")
-async def get_customer_journey(customer_id: str, request: Request):
-    """Get customer journey timeline events"""
+async def get_customer_journey(
+    customer_id: str,
+    request: Request,
+    limit: int = Query(200, ge=1, le=1000, description="Max events per page"),
+    before: Optional[str] = Query(None, description="Cursor (or ISO timestamp): return older events"),
+    after: Optional[str] = Query(None, description="Cursor (or ISO timestamp): return newer events"),
+    event_types: Optional[str] = Query(None, description="Comma-separated event types, e.g. call,visit"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get a page of customer journey timeline events (most recent first)"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
-        journey = await service.get_customer_journey(customer_id, user_token=user_token)
+        types = [t.strip() for t in event_types.split(",") if t.strip()] if event_types else None
+        journey = await service.get_customer_journey_page(
+            customer_id,
+            user_token=user_token,
+            limit=limit,
+            before=before,
+            after=after,
+            event_types=types,
+        )
         return journey
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.databricks_service import DatabricksService
+from routers.dependencies import get_databricks_service
+from routers.streaming import sse_response
+
+router = APIRouter()
+
+@router.get("/events")
+async def get_live_events(
+    request: Request,
+    topics: str = Query("stats,trends,visits", description="Comma-separated topics: stats, trends, visits"),
+    snapshot: bool = Query(True, description="Send each topic's current value first (otherwise diffs and resets only)"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Server-sent events with dashboard and map updates, polled once per topic for all subscribers"""
+    user_token = request.headers.get("x-forwarded-access-token")
+    names = [t.strip() for t in topics.split(",") if t.strip()]
+    unknown = [name for name in names if name not in service.live_topics]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown live topics: {', '.join(unknown)}" if unknown else "No live topics given",
+        )
+    return sse_response(service.subscribe_live(
+        names,
+        user_token=user_token,
+        snapshots=snapshot,
+        heartbeat=float(os.getenv("LIVE_HEARTBEAT_INTERVAL", "15")),
+        # Streams end after this long and EventSource reconnects (with a fresh snapshot), so
+        # a graceful shutdown, which waits for open connections, is not held up indefinitely
+        max_duration=float(os.getenv("LIVE_MAX_CONNECTION_SECONDS", "300")),
+    ))
@@ -0,0 +1,57 @@
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from datetime import date
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_ndjson(request: Request, stream: Optional[bool] = None) -> bool:
+    """True if the client opted into streaming via ?stream=1 or Accept: application/x-ndjson"""
+    if stream:
+        return True
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _json_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _ndjson_lines(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        if batch:
+            yield "".join(json.dumps(row, default=_json_default) + "\n" for row in batch).encode("utf-8")
+
+
+def ndjson_response(batches: AsyncIterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    """Stream row batches as newline-delimited JSON, one object per line"""
+    return StreamingResponse(_ndjson_lines(batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _sse_messages(events: AsyncIterator[Optional[Tuple[str, str, Any]]], retry_ms: int) -> AsyncIterator[bytes]:
+    yield f"retry: {retry_ms}\n\n".encode("utf-8")
+    async for event in events:
+        if event is None:
+            # Comment line: keeps proxies from closing an idle connection
+            yield b": keepalive\n\n"
+            continue
+        topic, event_type, data = event
+        payload = json.dumps({"type": event_type, "data": data}, default=_json_default)
+        yield f"event: {topic}\ndata: {payload}\n\n".encode("utf-8")
+
+
+def sse_response(events: AsyncIterator[Optional[Tuple[str, str, Any]]], retry_ms: int = 5000) -> StreamingResponse:
+    """Stream (topic, type, data) events as server-sent events named after the topic; None sends a keepalive"""
+    return StreamingResponse(
+        _sse_messages(events, retry_ms),
+        media_type=SSE_MEDIA_TYPE,
+        # Reverse proxies must pass each event through as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
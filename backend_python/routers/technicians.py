@@ -1,22 +1,92 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 import sys
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.databricks_service import DatabricksService
+from routers.dependencies import get_databricks_service
+from routers.streaming import ndjson_response, wants_ndjson
+from services.trend_aggregator import to_utc_datetime
+from services.visit_index import MAX_ZOOM, parse_bbox, validate_bbox
 
 router = APIRouter()
-service = DatabricksService()
 
 @router.get("/visits")
-async def get_technician_visits(request: Request):
-    """Get all technician visits"""
+async def get_technician_visits(
+    request: Request,
+    min_lat: Optional[float] = Query(None, description="Bounding box south edge"),
+    min_lon: Optional[float] = Query(None, description="Bounding box west edge"),
+    max_lat: Optional[float] = Query(None, description="Bounding box north edge"),
+    max_lon: Optional[float] = Query(None, description="Bounding box east edge"),
+    start: Optional[datetime] = Query(None, alias="from", description="Visits from (ISO 8601, inclusive, UTC if no offset)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Visits until (ISO 8601, exclusive, UTC if no offset)"),
+    technician_id: Optional[str] = Query(None, description="Comma-separated technician ids"),
+    stream: bool = Query(False, description="Stream rows as NDJSON (same as Accept: application/x-ndjson)"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get active technician visits, optionally within a bounding box, time window and set of technicians"""
     try:
         user_token = request.headers.get("x-forwarded-access-token")
-        visits = await service.get_technician_visits(user_token=user_token)
+        # Validated up front so a bad box is a 400 even when streaming
+        bbox = validate_bbox(min_lat, min_lon, max_lat, max_lon)
+        if start and end and to_utc_datetime(start) >= to_utc_datetime(end):
+            raise ValueError("'from' must be before 'to'")
+        technician_ids = [t.strip() for t in technician_id.split(",") if t.strip()] if technician_id else None
+        filters = {"bbox": bbox, "start": start, "end": end, "technician_ids": technician_ids}
+        if wants_ndjson(request, stream):
+            return ndjson_response(service.stream_technician_visits(user_token=user_token, **filters))
+        visits = await service.get_technician_visits(user_token=user_token, **filters)
         return visits
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/visits/clusters")
+async def get_technician_visit_clusters(
+    request: Request,
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM, description="Map zoom level"),
+    bbox: Optional[str] = Query(None, description="Viewport as min_lat,min_lon,max_lat,max_lon"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get active visits clustered for a map zoom level (count, centroid and status breakdown per cluster)"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        return await service.get_technician_visit_clusters(zoom, parse_bbox(bbox), user_token=user_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/nearest")
+async def get_nearest_technicians(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the job"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the job"),
+    k: int = Query(5, ge=1, le=100, description="Number of technicians"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get the k technicians closest to a point, nearest first, with distance and workload"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        return await service.get_nearest_technicians(lat, lon, k, user_token=user_token)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/workload")
+async def get_technician_workloads(
+    request: Request,
+    technician_id: Optional[str] = Query(None, description="Comma-separated technician ids"),
+    service: DatabricksService = Depends(get_databricks_service),
+):
+    """Get visit count, planned minutes and travel distance per technician over the active visits"""
+    try:
+        user_token = request.headers.get("x-forwarded-access-token")
+        technician_ids = [t.strip() for t in technician_id.split(",") if t.strip()] if technician_id else None
+        return await service.get_technician_workloads(technician_ids, user_token=user_token)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def hash_token(user_token: str) -> str:
+    """Return a stable, non-reversible key for a user token"""
+    return hashlib.sha256(user_token.encode("utf-8")).hexdigest()
+
+
+class _UserPool:
+    """Connections belonging to a single user token"""
+
+    def __init__(self, lock: threading.Lock):
+        # Idle connections as (connection, last_used, last_checked), most recently used last
+        self.idle: Deque[Tuple[Any, float, float]] = deque()
+        self.in_use = 0
+        self.waiting = 0
+        self.available = threading.Condition(lock)
+
+    @property
+    def size(self) -> int:
+        return self.in_use + len(self.idle)
+
+
+class ConnectionPool:
+    """Thread-safe pool of warm SQL connections, partitioned by (hashed) user token.
+
+    Every user gets their own bounded set of connections because queries run
+    under the caller's x-forwarded-access-token. Idle connections expire after
+    ``idle_timeout`` seconds, connections that sat idle longer than
+    ``health_check_interval`` are probed before being handed out, and once more
+    than ``max_users`` per-user pools exist the least recently used idle pools
+    are evicted.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[str], Any],
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        max_users: int = 100,
+        health_check_interval: float = 60.0,
+        acquire_timeout: float = 30.0,
+    ):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_users = max_users
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._lock = threading.Lock()
+        self._pools: "OrderedDict[str, _UserPool]" = OrderedDict()
+        self._last_reap = time.monotonic()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "expired": 0,
+            "evicted_pools": 0,
+        }
+
+    def acquire(self, user_token: str) -> Optional[Any]:
+        """Check out a connection for ``user_token``, creating one if the pool has room.
+
+        Returns None if a new connection could not be established. Raises
+        TimeoutError if the user's pool stays exhausted for ``acquire_timeout``.
+        """
+        key = hash_token(user_token)
+        deadline = time.monotonic() + self.acquire_timeout
+        to_close = []
+
+        with self._lock:
+            pool = self._get_user_pool(key, to_close)
+            while True:
+                self._expire_idle(pool, to_close)
+                if pool.idle:
+                    conn, _, last_checked = pool.idle.pop()
+                    pool.in_use += 1
+                    needs_check = time.monotonic() - last_checked > self.health_check_interval
+                    break
+                if pool.size < self.max_size:
+                    pool.in_use += 1
+                    self._stats["misses"] += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise TimeoutError("Timed out waiting for a pooled Databricks connection")
+                pool.waiting += 1
+                try:
+                    pool.available.wait(remaining)
+                finally:
+                    pool.waiting -= 1
+
+        self._close_all(to_close)
+
+        if conn is not None:
+            if self._is_healthy(conn, needs_check):
+                with self._lock:
+                    self._stats["hits"] += 1
+                return conn
+            # Stale connection: drop it and retry, which will open a fresh one
+            self.release(user_token, conn, discard=True)
+            return self.acquire(user_token)
+
+        try:
+            conn = self._connect(user_token)
+        except Exception:
+            conn = None
+        if conn is None:
+            with self._lock:
+                pool.in_use -= 1
+                pool.available.notify()
+        return conn
+
+    def release(self, user_token: str, conn: Any, discard: bool = False) -> None:
+        """Return a connection to its user's pool, or close it if ``discard`` is set"""
+        key = hash_token(user_token)
+        to_close = []
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                # The pool was evicted while this connection was checked out
+                to_close.append(conn)
+            else:
+                pool.in_use -= 1
+                if discard or not getattr(conn, "open", True):
+                    self._stats["discarded"] += 1
+                    to_close.append(conn)
+                else:
+                    now = time.monotonic()
+                    pool.idle.append((conn, now, now))
+                pool.available.notify()
+            self._maybe_reap(to_close)
+
+        self._close_all(to_close)
+
+    @contextmanager
+    def connection(self, user_token: str):
+        """Context manager that checks a connection out and always returns it"""
+        conn = self.acquire(user_token)
+        failed = False
+        try:
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if conn is not None:
+                self.release(user_token, conn, discard=failed)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool counters for sizing under load"""
+        with self._lock:
+            in_use = sum(p.in_use for p in self._pools.values())
+            idle = sum(len(p.idle) for p in self._pools.values())
+            waiting = sum(p.waiting for p in self._pools.values())
+            return {
+                **self._stats,
+                "open": in_use + idle,
+                "in_use": in_use,
+                "idle": idle,
+                "waiting": waiting,
+                "users": len(self._pools),
+            }
+
+    def close(self) -> None:
+        """Close every idle connection and forget all per-user pools"""
+        to_close = []
+        with self._lock:
+            for pool in self._pools.values():
+                to_close.extend(conn for conn, _, _ in pool.idle)
+                pool.idle.clear()
+            self._pools.clear()
+        self._close_all(to_close)
+
+    def _get_user_pool(self, key: str, to_close: list) -> _UserPool:
+        """Look up (or create) a user's pool and mark it most recently used. Caller holds the lock."""
+        pool = self._pools.get(key)
+        if pool is None:
+            self._evict_users(to_close)
+            pool = _UserPool(self._lock)
+            self._pools[key] = pool
+        self._pools.move_to_end(key)
+        return pool
+
+    def _evict_users(self, to_close: list) -> None:
+        """Make room for a new pool by dropping least recently used idle pools. Caller holds the lock."""
+        for key in list(self._pools.keys()):
+            if len(self._pools) < self.max_users:
+                break
+            pool = self._pools[key]
+            if pool.in_use or pool.waiting:
+                continue
+            to_close.extend(conn for conn, _, _ in pool.idle)
+            del self._pools[key]
+            self._stats["evicted_pools"] += 1
+
+    def _expire_idle(self, pool: _UserPool, to_close: list) -> None:
+        """Remove connections idle longer than idle_timeout. Caller holds the lock."""
+        cutoff = time.monotonic() - self.idle_timeout
+        while pool.idle and pool.idle[0][1] < cutoff:
+            conn, _, _ = pool.idle.popleft()
+            to_close.append(conn)
+            self._stats["expired"] += 1
+
+    def _maybe_reap(self, to_close: list) -> None:
+        """Periodically expire idle connections and empty pools for all users. Caller holds the lock."""
+        now = time.monotonic()
+        if now - self._last_reap < min(self.idle_timeout, 30.0):
+            return
+        self._last_reap = now
+        for key in list(self._pools.keys()):
+            pool = self._pools[key]
+            self._expire_idle(pool, to_close)
+            if pool.size == 0 and pool.waiting == 0:
+                del self._pools[key]
+
+    def _is_healthy(self, conn: Any, deep_check: bool) -> bool:
+        """Cheap liveness check, plus a round trip for connections idle past the check interval"""
+        if not getattr(conn, "open", True):
+            return False
+        if not deep_check:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except Exception as e:
+            logger.warning("Pooled connection failed health check: %s", e)
+            return False
+
+    @staticmethod
+    def _close_all(connections: list) -> None:
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as close_error:
+                logger.error("Failed to close connection: %s", close_error)
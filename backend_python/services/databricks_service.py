@@ -1,45 +1,448 @@
 import os
+import logging
+import json
+import base64
+import heapq
 import asyncio
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import contextvars
+import functools
+import threading
+import time
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor
-from .mock_data_service import (
-    MOCK_CUSTOMERS,
-    MOCK_JOURNEY,
-    MOCK_STATS,
-    MOCK_HOURLY_TRENDS,
-    MOCK_DAILY_TRENDS,
-    MOCK_VISITS,
-    MOCK_NEXT_ACTIONS,
-)
+from .connection_pool import ConnectionPool, hash_token
+from .embedded_backend import EmbeddedBackend
+from .query_backends import DatabricksBackend, QueryBackend
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
+from .profiler import profile_thread
+from . import metrics, queries
+from .queries import QUERIES, NamedQuery
+from .trend_aggregator import CallTrendAggregator, to_utc_datetime, trend_window_starts
+from .trend_rollups import bucket_floor, fill_trend_buckets, resolve_trend_range, rollup_query, select_rollup
+from .result_conversion import ARROW_AVAILABLE, convert_arrow_table, convert_rows
+from .mock_data_service import MOCK_STORE, MockDataStore
+from .live_updates import LiveEvent, LiveUpdates, diff_rows
+from .technician_index import KDTREE_AVAILABLE, TechnicianIndex
+from .visit_index import BoundingBox, VisitClusters, VisitGrid, VisitIndex, cluster_cell_degrees
+
+logger = logging.getLogger(__name__)
+
+
+class QueryError(RuntimeError):
+    """A named query failed, timed out or could not get a connection"""
+
+
+# Where named queries run: "databricks" (SQL warehouse) or "embedded" (local SQLite
+# database built from sql/schemas.sql, for running the real queries without a workspace)
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "databricks").lower()
 
 # Check if Databricks credentials are configured
 # For Databricks Apps, we need DATABRICKS_HTTP_PATH (host comes from Config())
 USE_MOCK_DATA = (
-    not os.getenv("DATABRICKS_HTTP_PATH")
+    QUERY_BACKEND != "embedded" and not os.getenv("DATABRICKS_HTTP_PATH")
 )
 
+# How get_customer_journey reads its five sources: "concurrent" (parallel queries),
+# "union" (one UNION ALL round trip) or "sequential" (one query after another)
+JOURNEY_QUERY_MODES = ("concurrent", "union", "sequential")
+
+# Journey event sources. Each source projects its table onto the normalized event
+# columns below (alias -> source column); the same aliases are used by the per-source
+# queries and by the UNION ALL query, so one row -> event builder serves both.
+JOURNEY_SOURCES = [
+    {
+        "event_type": "call",
+        "table": "customer_calls",
+        "id_column": "call_id",
+        "time_column": "call_timestamp",
+        "columns": {
+            "description": "issue_description",
+            "call_duration": "call_duration",
+            "call_type": "call_type",
+            "status": "resolution_status",
+        },
+    },
+    {
+        "event_type": "installation",
+        "table": "installations",
+        "id_column": "installation_id",
+        "time_column": "installation_date",
+        "columns": {
+            "product_name": "product_name",
+            "status": "status",
+        },
+    },
+    {
+        "event_type": "visit",
+        "table": "technician_visits",
+        "id_column": "visit_id",
+        "time_column": "visit_date",
+        "columns": {
+            "technician_name": "technician_name",
+            "status": "visit_status",
+            "visit_purpose": "visit_purpose",
+        },
+    },
+    {
+        "event_type": "website",
+        "table": "website_visits",
+        "id_column": "visit_id",
+        "time_column": "visit_timestamp",
+        "columns": {
+            "description": "page_visited",
+        },
+    },
+    {
+        "event_type": "digital",
+        "table": "digital_interactions",
+        "id_column": "interaction_id",
+        "time_column": "interaction_timestamp",
+        "columns": {
+            "channel": "channel",
+            "description": "message_content",
+            "status": "sentiment",
+        },
+    },
+]
+
+# SQL types of the normalized event columns (used to type NULLs in the UNION ALL projection)
+JOURNEY_COLUMN_TYPES = {
+    "description": "STRING",
+    "status": "STRING",
+    "call_duration": "INT",
+    "call_type": "STRING",
+    "product_name": "STRING",
+    "technician_name": "STRING",
+    "visit_purpose": "STRING",
+    "channel": "STRING",
+}
+
+
+def _journey_cursor_predicate(source: Dict[str, Any], cursor: Optional[tuple], direction: str, params: Dict[str, Any]) -> str:
+    """SQL predicate selecting rows of ``source`` strictly before/after ``cursor`` in journey order.
+
+    Journey order is (event_time, event_type, event_id); within one source the event type
+    is constant, so the comparison reduces to time, with the id as tie breaker only when
+    the cursor points into this same source.
+    """
+    if cursor is None:
+        return ""
+    cursor_time, cursor_type, cursor_id = cursor
+    time_column = source["time_column"]
+    op = "<" if direction == "before" else ">"
+    params[f"{direction}_time"] = datetime.fromisoformat(cursor_time)
+    event_type = source["event_type"]
+    if event_type == cursor_type:
+        params[f"{direction}_id"] = cursor_id
+        return (
+            f"\n          AND ({time_column} {op} :{direction}_time"
+            f" OR ({time_column} = :{direction}_time AND {source['id_column']} {op} :{direction}_id))"
+        )
+    # Other sources sort entirely before or after the cursor's source at equal times
+    inclusive = (event_type < cursor_type) == (direction == "before")
+    return f"\n          AND {time_column} {op}{'=' if inclusive else ''} :{direction}_time"
+
+
+def _journey_source_query(
+    source: Dict[str, Any],
+    params: Dict[str, Any],
+    cursor: Optional[tuple] = None,
+    direction: str = "before",
+    limit: Optional[int] = None,
+) -> str:
+    """Build the per-source journey query for one customer, optionally keyset-paginated"""
+    columns = "".join(
+        f",\n            {column} as {alias}" for alias, column in source["columns"].items()
+    )
+    order = "DESC" if direction == "before" else "ASC"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "\n        LIMIT :limit"
+        params["limit"] = limit
+    return f"""
+        SELECT 
+            {source["id_column"]} as event_id,
+            {source["time_column"]} as event_time{columns}
+        FROM {source["table"]}
+        WHERE customer_id = :customer_id{_journey_cursor_predicate(source, cursor, direction, params)}
+        ORDER BY {source["time_column"]} {order}, {source["id_column"]} {order}{limit_clause}
+        """
+
+
+def _journey_union_query(
+    sources: List[Dict[str, Any]],
+    params: Dict[str, Any],
+    cursor: Optional[tuple] = None,
+    direction: str = "before",
+    limit: Optional[int] = None,
+) -> str:
+    """Build one UNION ALL query returning every source in the normalized event projection"""
+    branches = []
+    for source in sources:
+        projection = [
+            f"'{source['event_type']}' as event_type",
+            f"{source['id_column']} as event_id",
+            f"{source['time_column']} as event_time",
+        ]
+        for alias, sql_type in JOURNEY_COLUMN_TYPES.items():
+            column = source["columns"].get(alias)
+            projection.append(f"{column} as {alias}" if column else f"CAST(NULL AS {sql_type}) as {alias}")
+        branches.append(
+            "        SELECT " + ", ".join(projection) + f"\n        FROM {source['table']}\n"
+            "        WHERE customer_id = :customer_id"
+            + _journey_cursor_predicate(source, cursor, direction, params)
+        )
+    order = "DESC" if direction == "before" else "ASC"
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "\n        LIMIT :limit"
+        params["limit"] = limit
+    return (
+        "\n"
+        + "\n        UNION ALL\n".join(branches)
+        + f"\n        ORDER BY event_time {order}, event_type {order}, event_id {order}{limit_clause}\n        "
+    )
+
+
+def encode_journey_cursor(event: Dict[str, Any]) -> str:
+    """Opaque page cursor for a journey event: its (event_time, event_type, event_id) sort key"""
+    key = [event.get("event_time") or "", event["event_type"], str(event["event_id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_journey_cursor(value: str) -> tuple:
+    """Parse a cursor from encode_journey_cursor, or a bare ISO timestamp (a pure time bound)"""
+    try:
+        event_time, event_type, event_id = json.loads(base64.urlsafe_b64decode(value.encode("ascii")))
+    except Exception:
+        event_time, event_type, event_id = value, "", ""
+    try:
+        datetime.fromisoformat(event_time)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid journey cursor: {value}")
+    return (event_time, event_type, event_id)
+
+
+def _journey_key(event_type: str, row: Dict[str, Any]) -> tuple:
+    return (row.get("event_time") or "", event_type, str(row["event_id"]))
+
+
+def _call_event(call: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_type": "call",
+        "event_id": call["event_id"],
+        "event_title": "Call",
+        "event_time": call["event_time"],
+        "description": call.get("description", ""),
+        "call_duration": call.get("call_duration"),
+        "call_type": call.get("call_type"),
+        "status": call.get("status", "open"),
+        "color": "blue",
+        "shape": "circle"
+    }
+
+
+def _installation_event(inst: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_type": "installation",
+        "event_id": inst["event_id"],
+        "event_title": "Installation",
+        "event_time": inst["event_time"],
+        "description": f"Installation of {inst.get('product_name', 'Product')}",
+        "status": inst.get("status", "completed"),
+        "color": "green",
+        "shape": "square"
+    }
+
+
+def _visit_event(visit: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_type": "visit",
+        "event_id": visit["event_id"],
+        "event_title": f"Technician Visit - {visit.get('visit_purpose', 'service')}",
+        "event_time": visit["event_time"],
+        "description": f"{visit.get('visit_purpose', 'service')} by {visit.get('technician_name', 'Technician')}",
+        "status": visit.get("status", "planned"),
+        "color": "orange",
+        "shape": "triangle"
+    }
+
+
+def _website_event(web: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_type": "website",
+        "event_id": web["event_id"],
+        "event_title": "Website Visit",
+        "event_time": web["event_time"],
+        "description": web.get("description", "Website visit"),
+        "status": "neutral",
+        "color": "purple",
+        "shape": "diamond"
+    }
+
+
+def _digital_event(dig: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event_type": "digital",
+        "event_id": dig["event_id"],
+        "event_title": f"Digital Interaction - {dig.get('channel', 'Channel')}",
+        "event_time": dig["event_time"],
+        "description": dig.get("description", ""),
+        "channel": dig.get("channel"),
+        "status": dig.get("status", "neutral"),
+        "color": "pink",
+        "shape": "star"
+    }
+
+
+JOURNEY_EVENT_BUILDERS = {
+    "call": _call_event,
+    "installation": _installation_event,
+    "visit": _visit_event,
+    "website": _website_event,
+    "digital": _digital_event,
+}
+
 class DatabricksService:
     """Service for querying Databricks tables or returning mock data"""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, max_pending_queries: Optional[int] = None):
         self.use_mock_data = USE_MOCK_DATA
-        self._executor = ThreadPoolExecutor(max_workers=5)
-        # Cache connection parameters (these don't change per request)
-        self._server_hostname = None
-        self._http_path = os.getenv("DATABRICKS_HTTP_PATH")
-        self._catalog = os.getenv("DATABRICKS_CATALOG")
-        self._schema = os.getenv("DATABRICKS_SCHEMA")
+        # One bounded executor per service; the app shares a single service so this caps warehouse concurrency
+        self._max_workers = max_workers or int(os.getenv("DATABRICKS_MAX_WORKERS", "5"))
+        self._max_pending_queries = max_pending_queries or int(
+            os.getenv("DATABRICKS_MAX_PENDING_QUERIES", str(self._max_workers * 4))
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="databricks-query")
+        self._pending_queries: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        # Per named query timings, updated from executor threads
+        self._query_stats: Dict[str, Dict[str, float]] = {}
+        self._query_stats_lock = threading.Lock()
+        # Queries slower than this (connect to converted rows) are logged with a phase breakdown
+        self._slow_query_threshold = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "1000")) / 1000
+        self._closed = False
+        self._journey_query_mode = os.getenv("JOURNEY_QUERY_MODE", "concurrent").lower()
+        if self._journey_query_mode not in JOURNEY_QUERY_MODES:
+            logger.warning("Unknown JOURNEY_QUERY_MODE '%s', using 'concurrent'", self._journey_query_mode)
+            self._journey_query_mode = "concurrent"
+        # Connection parameters are resolved once below (they don't change per request)
+        self._backend: QueryBackend = DatabricksBackend(None, None)
+        # Warm connections are reused per user token instead of reconnecting for every query
+        self._pool = self._create_pool(lambda key: self._backend.connect(key))
+        # Named queries served from a local embedded database while the rest go to the warehouse
+        self._replica: Optional[EmbeddedBackend] = None
+        self._replica_pool: Optional[ConnectionPool] = None
+        self._replica_queries = {
+            name.strip() for name in os.getenv("EMBEDDED_REPLICA_QUERIES", "").split(",") if name.strip()
+        }
+        # "arrow" fetches results as Arrow tables and converts them column-wise; "rows" uses fetchall()
+        self._use_arrow = ARROW_AVAILABLE and os.getenv("DATABRICKS_RESULT_FORMAT", "arrow").lower() == "arrow"
+        self._stream_batch_size = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+        # Streams keep a connection (and, per batch, a thread) until the client has read every row,
+        # so they run on their own bounded executor and cannot starve the regular queries
+        self._max_streams = int(os.getenv("STREAM_MAX_CONCURRENCY", "2"))
+        self._stream_executor = ThreadPoolExecutor(max_workers=self._max_streams, thread_name_prefix="databricks-stream")
+        self._active_streams: Optional[asyncio.Semaphore] = None
+        self._coalesce_queries = os.getenv("QUERY_COALESCING", "true").lower() in ("1", "true", "yes")
+        self._single_flight = SingleFlight()
+        # Dashboard aggregates are cached in-process; scope "shared" serves every user the same
+        # entry, "user" keys entries by the caller's token
+        self._result_cache = ResultCache(max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000")))
+        self._cache_scope = os.getenv("RESULT_CACHE_SCOPE", "shared").lower()
+        self._cache_stale_ttl = float(os.getenv("RESULT_CACHE_STALE_TTL", "300"))
+        # Cached loaders are named after their registered query, which supplies the default TTL
+        self._cache_ttls = {name: q.cache_ttl for name, q in QUERIES.items() if q.cache_ttl is not None}
+        if os.getenv("DASHBOARD_SUMMARY_TTL"):
+            summary_ttl = float(os.getenv("DASHBOARD_SUMMARY_TTL"))
+            self._cache_ttls.update(dashboard_summary=summary_ttl, dashboard_stats=summary_ttl)
+        # "incremental" keeps hourly call counts in memory and only queries calls past the
+        # watermark; "scan" recomputes the trends from the 30-day history with the summary.
+        # The aggregator is shared, so per-user cache scope always scans.
+        trend_mode = os.getenv("TREND_AGGREGATION", "incremental").lower()
+        self._trend_aggregator: Optional[CallTrendAggregator] = None
+        if trend_mode == "incremental" and self._cache_scope != "user":
+            self._trend_aggregator = CallTrendAggregator(
+                refresh_interval=float(os.getenv("TREND_REFRESH_INTERVAL", "60")),
+                lag=float(os.getenv("TREND_LATE_ARRIVAL_WINDOW", "300")),
+            )
+        self._trends_max_points = int(os.getenv("TRENDS_MAX_POINTS", "5000"))
+        # "grid" answers map viewport queries from an in-memory grid of the active visits,
+        # reloaded in the background; "off" pushes every filter into SQL. Like the trend
+        # aggregator the grid is shared, so per-user cache scope always queries.
+        self._visit_cell_degrees = float(os.getenv("VISIT_INDEX_CELL_DEGREES", "0.5"))
+        self._visit_index: Optional[VisitIndex] = None
+        if os.getenv("VISIT_INDEX", "grid").lower() == "grid" and self._cache_scope != "user":
+            self._visit_index = VisitIndex(
+                refresh_interval=float(os.getenv("VISIT_INDEX_REFRESH_INTERVAL", "30")),
+                cell_degrees=self._visit_cell_degrees,
+            )
+        self._mock_visit_grid: Optional[VisitGrid] = None
+        # Map clusters are one per square of this many screen pixels
+        self._cluster_pixels = int(os.getenv("VISIT_CLUSTER_PIXELS", "64"))
+        if KDTREE_AVAILABLE:
+            logger.info("Nearest-technician lookups use a scipy KD-tree")
+        else:
+            logger.warning("scipy is not installed; nearest-technician lookups use a linear distance scan")
+        # Live topics are polled once per interval however many screens subscribe; the
+        # loaders read through the result cache, trend aggregator and visit index, and raise
+        # when a query fails so subscribers keep the last value
+        self._live_updates = LiveUpdates(queue_size=int(os.getenv("LIVE_QUEUE_SIZE", "16")))
+        self._live_updates.add_topic("stats", self.get_dashboard_stats, float(os.getenv("LIVE_STATS_INTERVAL", "15")))
+        self._live_updates.add_topic("trends", self._get_live_trends, float(os.getenv("LIVE_TRENDS_INTERVAL", "60")))
+        self._live_updates.add_topic(
+            "visits", self._get_live_visits, float(os.getenv("LIVE_VISITS_INTERVAL", "10")), diff_rows("visit_id")
+        )
         
+        # Mock mode serves the sample data, or a generated dataset from MOCK_DATA_PATH
+        self._mock_store: MockDataStore = MOCK_STORE
         if self.use_mock_data:
-            print("Using mock data mode - configure DATABRICKS_HTTP_PATH to connect to Databricks")
+            logger.info("Using mock data mode - configure DATABRICKS_HTTP_PATH to connect to Databricks")
+            if os.getenv("MOCK_DATA_PATH"):
+                self._mock_store = self._load_mock_store(os.getenv("MOCK_DATA_PATH"))
+        elif QUERY_BACKEND == "embedded":
+            self._backend = EmbeddedBackend.from_env()
+            logger.info("Using the embedded query backend", extra={"path": self._backend.path})
         else:
             # Get server hostname from Config() at initialization (must be called from main thread)
-            self._server_hostname = self._get_server_hostname()
-            if not self._server_hostname:
-                print("Warning: Could not get server hostname from Config() or DATABRICKS_SERVER_HOSTNAME")
-                print("Falling back to mock data mode")
+            server_hostname = self._get_server_hostname()
+            if not server_hostname:
+                logger.warning("Could not get server hostname from Config() or DATABRICKS_SERVER_HOSTNAME, falling back to mock data mode")
                 self.use_mock_data = True
+            else:
+                self._backend = DatabricksBackend.from_env(server_hostname)
+                if self._replica_queries:
+                    self._replica = EmbeddedBackend.from_env()
+                    self._replica_pool = self._create_pool(self._replica.connect)
+                    logger.info(
+                        "Serving %d named queries from the embedded replica", len(self._replica_queries),
+                        extra={"path": self._replica.path, "queries": sorted(self._replica_queries)},
+                    )
+    
+    @staticmethod
+    def _create_pool(connect) -> ConnectionPool:
+        return ConnectionPool(
+            connect,
+            max_size=int(os.getenv("DATABRICKS_POOL_MAX_SIZE", "5")),
+            idle_timeout=float(os.getenv("DATABRICKS_POOL_IDLE_TIMEOUT", "300")),
+            max_users=int(os.getenv("DATABRICKS_POOL_MAX_USERS", "100")),
+            health_check_interval=float(os.getenv("DATABRICKS_POOL_HEALTH_CHECK_INTERVAL", "60")),
+            acquire_timeout=float(os.getenv("DATABRICKS_POOL_ACQUIRE_TIMEOUT", "30")),
+        )
+    
+    def _load_mock_store(self, path: str) -> MockDataStore:
+        started = time.perf_counter()
+        store = MockDataStore.from_sqlite(
+            path, JOURNEY_SOURCES, JOURNEY_EVENT_BUILDERS, self._visit_from_row, queries.TECHNICIAN_VISITS.sql
+        )
+        logger.info(
+            "Loaded mock data from %s", path,
+            extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+        )
+        return store
     
     def _get_server_hostname(self):
         """Get server hostname from Config or environment variable (called outside thread pool)"""
@@ -49,147 +452,473 @@ class DatabricksService:
             if cfg.host:
                 return cfg.host
         except Exception as e:
-            print(f"Warning: Config() failed: {e}, falling back to environment variable")
+            logger.warning("Config() failed: %s, falling back to environment variable", e)
         return os.getenv("DATABRICKS_SERVER_HOSTNAME")
     
-    def _init_connection(self, server_hostname: str, http_path: str, user_token: str, catalog: Optional[str] = None, schema: Optional[str] = None):
-        """Initialize Databricks SQL connection (synchronous, run in thread pool)"""
-        try:
-            from databricks import sql
-            
-            # Validate that we have required connection parameters
-            if not server_hostname or not http_path:
-                print(f"Warning: Missing required Databricks connection parameters - hostname: {bool(server_hostname)}, http_path: {bool(http_path)}")
-                return None
-            
-            if not user_token:
-                print("Warning: No token provided from x-forwarded-access-token header")
-                return None
-            
-            # Create connection with userToken from x-forwarded-access-token header
-            connection_params = {
-                "server_hostname": server_hostname,
-                "http_path": http_path,
-                "access_token": user_token,  # Token from x-forwarded-access-token header
-            }
-            # Add catalog and schema if provided
-            if catalog:
-                connection_params["catalog"] = catalog
-            if schema:
-                connection_params["schema"] = schema
-            
-            connection = sql.connect(**connection_params)
-            return connection
-        except Exception as e:
-            error_msg = str(e)
-            print(f"ERROR: Failed to initialize Databricks connection: {error_msg}")
-            print(f"ERROR: Connection params - server_hostname: {server_hostname}, http_path: {http_path}, has_token: {bool(user_token)}, catalog: {catalog}, schema: {schema}")
-            import traceback
-            traceback.print_exc()
-            return None
+    def _route(self, query: Optional[NamedQuery], user_token: Optional[str]) -> tuple:
+        """(pool, pool key) for running ``query``: the embedded replica for EMBEDDED_REPLICA_QUERIES, else the backend"""
+        if self._replica is not None and query is not None and query.name in self._replica_queries:
+            return self._replica_pool, self._replica.pool_key(user_token)
+        return self._pool, self._backend.pool_key(user_token)
     
-    def _get_connection(self, user_token: Optional[str] = None):
-        """Get or create Databricks connection for this request (connections are per-request due to user tokens)"""
+    def _get_connection(self, user_token: Optional[str] = None, query: Optional[NamedQuery] = None):
+        """Check out a pooled connection for this user and query (Databricks connections are per-user due to user tokens)"""
         if self.use_mock_data:
             return None
-        if not user_token:
-            return None
-        
-        if not self._server_hostname or not self._http_path:
+        pool, key = self._route(query, user_token)
+        if not key:
             return None
         
-        # Create connection with cached parameters and user token
-        return self._init_connection(self._server_hostname, self._http_path, user_token, self._catalog, self._schema)
+        started = time.perf_counter()
+        try:
+            return pool.acquire(key)
+        finally:
+            metrics.CONNECTION_ACQUIRE.observe(time.perf_counter() - started)
+    
+    def _release_connection(self, user_token: str, conn, discard: bool = False, query: Optional[NamedQuery] = None):
+        """Return a connection to the pool, closing it instead if it may be broken"""
+        pool, key = self._route(query, user_token)
+        pool.release(key, conn, discard=discard)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool counters (hits, misses, open, waiting, ...), with the replica pool's under ``replica``"""
+        stats: Dict[str, Any] = self._pool.stats()
+        if self._replica_pool is not None:
+            stats["replica"] = self._replica_pool.stats()
+        return stats
     
-    def _execute_query_sync(self, query: str, params: Optional[Dict[str, Any]] = None, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Execute a SQL query synchronously (to be run in thread pool)"""
+    def _execute_query_sync(
+        self,
+        query: NamedQuery,
+        params: Optional[Dict[str, Any]] = None,
+        user_token: Optional[str] = None,
+        queued_at: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Execute a named query synchronously (to be run in thread pool).
+        
+        Raises QueryError when the query cannot run or fails.
+        """
+        if queued_at is not None:
+            metrics.QUEUE_WAIT.observe(time.perf_counter() - queued_at)
         if self.use_mock_data:
             return []
         
         conn = None
-        try:
-            conn = self._get_connection(user_token)
-            if conn is None or not conn:
-                print(f"ERROR: Failed to get connection for query execution")
-                return []
-            
-            with conn.cursor() as cursor:
-                # For Databricks SQL, replace ? placeholders with parameter values
-                # Since these are simple string IDs from URL paths, using f-strings is acceptable
-                # For production with user input, use proper parameterized queries
-                if params and "?" in query:
-                    # Simple parameter substitution for single parameter queries
-                    # Escape single quotes in string parameters
-                    param_value = list(params.values())[0]
-                    if isinstance(param_value, str):
-                        escaped_value = param_value.replace("'", "''")
-                        final_query = query.replace("?", f"'{escaped_value}'", 1)
-                    else:
-                        final_query = query.replace("?", str(param_value), 1)
-                    cursor.execute(final_query)
-                else:
-                    cursor.execute(query)
-                
-                # Get column names
-                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        failed = False
+        timed_out = threading.Event()
+        started = None
+        results: List[Dict[str, Any]] = []
+        # Seconds spent in each phase, for the slow-query log
+        phases: Dict[str, float] = {}
+        with profile_thread():
+            try:
+                connect_started = time.perf_counter()
+                conn = self._get_connection(user_token, query)
+                phases["connect"] = time.perf_counter() - connect_started
+                if conn is None or not conn:
+                    logger.error("Failed to get connection for query execution", extra={"query": query.name})
+                    raise QueryError(f"No connection available for query {query.name}")
                 
-                # Fetch all rows and convert to list of dictionaries
-                rows = cursor.fetchall()
-                results = []
-                for row in rows:
-                    row_dict = {}
-                    for i, col in enumerate(columns):
-                        value = row[i]
-                        # Convert datetime objects to ISO format strings
-                        if isinstance(value, datetime):
-                            value = value.isoformat()
-                        elif isinstance(value, (int, float)) and col in ['latitude', 'longitude']:
-                            value = float(value) if value is not None else None
-                        row_dict[col] = value
-                    results.append(row_dict)
+                started = time.perf_counter()
                 
-                return results
-        except Exception as e:
-            print(f"ERROR: Error executing query: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-        finally:
-            # Always close connection in finally block
-            if conn:
-                try:
-                    conn.close()
-                except Exception as close_error:
-                    print(f"ERROR: Failed to close connection: {close_error}")
+                with conn.cursor() as cursor:
+                    timer = None
+                    if query.timeout:
+                        def cancel():
+                            timed_out.set()
+                            cursor.cancel()
+                        timer = threading.Timer(query.timeout, cancel)
+                        timer.daemon = True
+                        timer.start()
+                    try:
+                        # Parameters are bound natively by the connector (:name markers), so the
+                        # statement text stays the same for every value
+                        cursor.execute(query.sql, parameters=params or None)
+                        phases["execute"] = time.perf_counter() - started
+                        results = self._fetch_results(cursor, query, phases)
+                    finally:
+                        if timer is not None:
+                            timer.cancel()
+                    return results
+            except QueryError:
+                raise
+            except Exception as e:
+                failed = True
+                if timed_out.is_set():
+                    logger.error("Query cancelled after %ss timeout", query.timeout, extra={"query": query.name})
+                    raise QueryError(f"Query {query.name} cancelled after {query.timeout}s timeout") from e
+                logger.exception("Error executing query: %s", e, extra={"query": query.name})
+                raise QueryError(f"Query {query.name} failed: {e}") from e
+            finally:
+                if started is not None:
+                    self._record_query(query.name, time.perf_counter() - started, len(results), failed, timed_out.is_set())
+                    self._log_if_slow(query, phases, len(results), failed)
+                # Always hand the connection back; drop it if the query failed since the session may be broken
+                if conn:
+                    self._release_connection(user_token, conn, discard=failed, query=query)
     
-    async def _execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Execute a SQL query asynchronously using thread pool"""
+    def _fetch_results(self, cursor, query: NamedQuery, phases: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Fetch and convert a result set, keeping at most ``query.max_rows`` rows.
+        
+        Fetch and conversion time are added to ``phases`` separately.
+        """
+        started = time.perf_counter()
+        # Fetch one row past the cap to detect (and report) truncation
+        raw = self._fetch_raw(cursor, None if query.max_rows is None else query.max_rows + 1)
+        converting = time.perf_counter()
+        phases["fetch"] = converting - started
+        results = self._convert_raw(raw)
+        phases["convert"] = time.perf_counter() - converting
+        if query.max_rows is not None and len(results) > query.max_rows:
+            logger.warning("Query returned more than %d rows; truncating", query.max_rows, extra={"query": query.name})
+            results = results[:query.max_rows]
+        return results
+    
+    def _fetch_raw(self, cursor, size: Optional[int] = None):
+        """Fetch the whole result set, or at most ``size`` rows, without converting it"""
+        if self._use_arrow and hasattr(cursor, "fetchall_arrow"):
+            # Columnar path: fetch as Arrow and convert whole columns at once
+            return cursor.fetchall_arrow() if size is None else cursor.fetchmany_arrow(size)
+        columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        return columns, cursor.fetchall() if size is None else cursor.fetchmany(size)
+    
+    @staticmethod
+    def _convert_raw(raw) -> List[Dict[str, Any]]:
+        """Convert the output of ``_fetch_raw`` to row dicts"""
+        if isinstance(raw, tuple):
+            return convert_rows(*raw)
+        return convert_arrow_table(raw)
+    
+    def _log_if_slow(self, query: NamedQuery, phases: Dict[str, float], rows: int, failed: bool) -> None:
+        total = sum(phases.values())
+        if total < self._slow_query_threshold:
+            return
+        logger.warning(
+            "Slow query %s took %.0f ms", query.name, total * 1000,
+            extra={
+                "query": query.name,
+                "duration_ms": round(total * 1000, 2),
+                **{f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in phases.items()},
+                "rows": rows,
+                "failed": failed,
+            },
+        )
+    
+    def _record_query(self, name: str, elapsed: float, rows: int, failed: bool, timed_out: bool) -> None:
+        with self._query_stats_lock:
+            stats = self._query_stats.get(name)
+            if stats is None:
+                stats = self._query_stats[name] = {
+                    "count": 0, "errors": 0, "timeouts": 0, "rows": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                }
+            stats["count"] += 1
+            stats["errors"] += failed
+            stats["timeouts"] += timed_out
+            stats["rows"] += rows
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        outcome = "timeout" if timed_out else "error" if failed else "ok"
+        metrics.QUERY_DURATION.observe(elapsed, query=name, outcome=outcome)
+        metrics.QUERY_ROWS.observe(rows, query=name)
+    
+    def get_query_stats(self) -> Dict[str, Dict[str, float]]:
+        """Execution counters and timings per named query"""
+        with self._query_stats_lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_seconds": stats["total_seconds"] / stats["count"] if stats["count"] else 0.0,
+                }
+                for name, stats in self._query_stats.items()
+            }
+    
+    async def _execute_query(
+        self,
+        query: NamedQuery,
+        params: Optional[Dict[str, Any]] = None,
+        user_token: Optional[str] = None,
+        raise_errors: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Execute a named query asynchronously using thread pool.
+        
+        A failed query returns no rows, or raises QueryError with ``raise_errors``; loaders
+        whose result is kept (cache, aggregator, indexes) raise so a failure is not stored.
+        """
         if self.use_mock_data:
             return []
+        if self._closed:
+            raise RuntimeError("DatabricksService is shut down")
+        try:
+            if not self._coalesce_queries:
+                return await self._run_query(query, params, user_token)
+            
+            # Identical concurrent queries under the same authorization scope share one execution
+            key = (
+                query.sql,
+                tuple(sorted(params.items())) if params else (),
+                hash_token(user_token) if user_token else None,
+            )
+            results = await self._single_flight.do(key, lambda: self._run_query(query, params, user_token))
+        except QueryError:
+            if raise_errors:
+                raise
+            return []
+        # Callers get their own list; the row dicts are shared and treated as read-only
+        return list(results)
+    
+    async def _stream_query(
+        self,
+        query: NamedQuery,
+        params: Optional[Dict[str, Any]] = None,
+        user_token: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Execute a named query and yield converted rows in batches of ``batch_size`` via fetchmany.
+        
+        The pooled connection stays checked out until the stream is exhausted or closed,
+        so only one batch per request is ever held in memory. At most ``STREAM_MAX_CONCURRENCY``
+        streams run at once, on the stream executor; ``query.timeout`` bounds the whole stream.
+        """
+        if self._closed:
+            raise RuntimeError("DatabricksService is shut down")
+        batch_size = batch_size or self._stream_batch_size
+        if self._active_streams is None:
+            self._active_streams = asyncio.Semaphore(self._max_streams)
         
         loop = asyncio.get_event_loop()
+        
+        def run(fn, *args, **kwargs):
+            return loop.run_in_executor(self._stream_executor, functools.partial(fn, *args, **kwargs))
+        
+        queued_at = time.perf_counter()
+        async with self._active_streams:
+            metrics.QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+            self._in_flight += 1
+            conn = None
+            cursor = None
+            timer = None
+            failed = False
+            timed_out = threading.Event()
+            started = None
+            rows = 0
+            phases: Dict[str, float] = {}
+            try:
+                connect_started = time.perf_counter()
+                conn = await run(self._get_connection, user_token, query)
+                phases["connect"] = time.perf_counter() - connect_started
+                if conn is None:
+                    logger.error("Failed to get connection for streaming query", extra={"query": query.name})
+                    return
+                
+                started = time.perf_counter()
+                cursor = await run(conn.cursor)
+                if query.timeout:
+                    def cancel():
+                        timed_out.set()
+                        cursor.cancel()
+                    timer = threading.Timer(query.timeout, cancel)
+                    timer.daemon = True
+                    timer.start()
+                await run(cursor.execute, query.sql, parameters=params or None)
+                phases["execute"] = time.perf_counter() - started
+                phases["fetch"] = 0.0
+                while True:
+                    fetch_started = time.perf_counter()
+                    batch = await run(self._fetch_batch, cursor, batch_size)
+                    phases["fetch"] += time.perf_counter() - fetch_started
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    yield batch
+            except Exception as e:
+                failed = True
+                if timed_out.is_set():
+                    logger.error("Streaming query cancelled after %ss timeout", query.timeout, extra={"query": query.name})
+                else:
+                    logger.exception("Error streaming query: %s", e, extra={"query": query.name})
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                if started is not None:
+                    # Phases exclude the time the client took to read each batch
+                    self._record_query(query.name, time.perf_counter() - started, rows, failed, timed_out.is_set())
+                    self._log_if_slow(query, phases, rows, failed)
+                try:
+                    if conn:
+                        # Shielded so a cancelled request still hands its connection back
+                        await asyncio.shield(run(self._finish_stream, user_token, conn, cursor, failed, query))
+                finally:
+                    self._in_flight -= 1
+    
+    def _finish_stream(self, user_token: Optional[str], conn, cursor, failed: bool, query: NamedQuery) -> None:
+        """Close a stream's cursor and return its connection to the pool (runs in the stream executor)"""
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                failed = True
+        # Closing the cursor releases any unread results, so an early-closed stream can still reuse the session
+        self._release_connection(user_token, conn, discard=failed, query=query)
+    
+    def _fetch_batch(self, cursor, batch_size: int) -> List[Dict[str, Any]]:
+        """Fetch and convert the next batch of rows (runs in the executor)"""
+        return self._convert_raw(self._fetch_raw(cursor, batch_size))
+    
+    def get_single_flight_stats(self) -> Dict[str, int]:
+        """Query coalescing counters (calls, executions, coalesced)"""
+        return self._single_flight.stats()
+    
+    async def _run_query(self, query: NamedQuery, params: Optional[Dict[str, Any]], user_token: Optional[str]) -> List[Dict[str, Any]]:
+        """Run one query on the bounded executor"""
+        # Bound queued + running queries so bursts wait here instead of piling up in the executor
+        if self._pending_queries is None:
+            self._pending_queries = asyncio.Semaphore(self._max_pending_queries)
+        
+        loop = asyncio.get_event_loop()
+        queued_at = time.perf_counter()
+        async with self._pending_queries:
+            self._in_flight += 1
+            try:
+                # Run under a copy of the caller's context so logs keep the request id
+                context = contextvars.copy_context()
+                results = await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(context.run, self._execute_query_sync, query, params, user_token, queued_at=queued_at),
+                )
+                return results
+            except QueryError:
+                raise
+            except Exception as e:
+                # Only this query failed (e.g. the executor is shutting down); the service stays in its mode
+                logger.exception("Error in async query execution: %s", e, extra={"query": query.name})
+                raise QueryError(f"Query {query.name} failed: {e}") from e
+            finally:
+                self._in_flight -= 1
+    
+    async def close(self, timeout: float = 30.0):
+        """Stop accepting queries, drain in-flight ones and close pooled connections"""
+        if self._closed:
+            return
+        self._closed = True
+        await self._live_updates.close()
+        if self._in_flight:
+            logger.info("Draining %d in-flight Databricks queries before shutdown", self._in_flight)
+        loop = asyncio.get_event_loop()
         try:
-            results = await loop.run_in_executor(
-                self._executor,
-                self._execute_query_sync,
-                query,
-                params,
-                user_token
+            # shutdown(wait=True) blocks, so run it off the event loop and give up after timeout
+            await asyncio.wait_for(
+                loop.run_in_executor(None, self._shutdown_executors, True),
+                timeout=timeout
             )
-            return results
-        except Exception as e:
-            print(f"Error in async query execution: {e}")
-            # Fall back to mock data on error
-            self.use_mock_data = True
-            return []
+        except asyncio.TimeoutError:
+            logger.warning("%d Databricks queries still running after %ss shutdown timeout", self._in_flight, timeout)
+            self._shutdown_executors(False)
+        self._pool.close()
+        self._backend.close()
+        if self._replica is not None:
+            self._replica_pool.close()
+            self._replica.close()
     
-    async def get_all_customers(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all customers with summaries"""
+    def _shutdown_executors(self, wait: bool) -> None:
+        for executor in (self._executor, self._stream_executor):
+            executor.shutdown(wait=wait)
+    
+    async def _cached(self, name: str, loader, user_token: Optional[str] = None, variant: Any = None):
+        """Serve ``loader(user_token)`` through the result cache using the TTLs configured for ``name``.
+        
+        ``variant`` distinguishes entries of the same loader (e.g. a zoom level).
+        """
+        if self._cache_scope == "user":
+            # Queries run under the caller's token, so each user gets their own entry
+            scope = hash_token(user_token) if user_token else "anonymous"
+        else:
+            scope = "shared"
+        return await self._result_cache.get_or_load(
+            (name, scope) if variant is None else (name, scope, variant),
+            lambda: loader(user_token),
+            ttl=self._cache_ttls.get(name, 60.0),
+            stale_ttl=self._cache_stale_ttl,
+        )
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Result cache counters (hits, stale_hits, misses, ...)"""
+        return self._result_cache.stats()
+    
+    def get_trend_stats(self) -> Optional[Dict[str, Any]]:
+        """Incremental trend aggregator counters, or None when trends are computed by scanning"""
+        return self._trend_aggregator.stats() if self._trend_aggregator else None
+    
+    def get_visit_index_stats(self) -> Optional[Dict[str, Any]]:
+        """Visit grid counters, or None when map queries go to SQL"""
+        return self._visit_index.stats() if self._visit_index else None
+    
+    async def get_customers_page(
+        self,
+        user_token: Optional[str] = None,
+        status: Optional[str] = None,
+        main_category: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of customers with summaries, keyset-paginated on customer_id.
+        
+        ``cursor`` is the ``next_cursor`` of the previous page (the last customer_id seen).
+        """
+        filtered = bool(status or main_category or cursor)
         if self.use_mock_data:
-            print("DEBUG: get_all_customers using mock data (use_mock_data=True)")
-            return MOCK_CUSTOMERS
+            logger.debug("get_customers_page using mock data")
+            return self._mock_customers_page(status, main_category, limit, cursor)
+        
+        query, params = self._customers_query(status, main_category, cursor, limit + 1)
         
-        query = """
+        try:
+            results = await self._execute_query(query, params, user_token=user_token)
+            logger.debug("get_customers_page query returned %d rows", len(results))
+        except Exception as e:
+            logger.exception("Exception in get_customers_page query execution: %s", e)
+            # Fall back to mock data on any exception
+            return self._mock_customers_page(status, main_category, limit, cursor)
+        
+        # If we fell back to mock data (or an unfiltered first page came back empty), return mock data
+        if self.use_mock_data or (not results and not filtered):
+            logger.debug("get_customers_page falling back to mock data")
+            return self._mock_customers_page(status, main_category, limit, cursor)
+        
+        # Convert to match mock data format
+        try:
+            customers = [self._customer_from_row(row) for row in results]
+        except Exception as e:
+            logger.exception("Exception converting results to customers: %s", e)
+            # Fall back to mock data on conversion error
+            return self._mock_customers_page(status, main_category, limit, cursor)
+        
+        return self._customers_page(customers, limit)
+    
+    @staticmethod
+    def _customers_query(status, main_category, cursor, limit: Optional[int]) -> tuple:
+        """Build the customers list query with filters and the keyset predicate pushed down.
+        
+        Returns the ``customers_page`` NamedQuery for this combination of filters and its parameters.
+        """
+        params: Dict[str, Any] = {}
+        conditions = []
+        if status:
+            conditions.append("c.status = :status")
+            params["status"] = status
+        if main_category:
+            conditions.append("c.main_category = :main_category")
+            params["main_category"] = main_category
+        if cursor:
+            conditions.append("c.customer_id > :cursor")
+            params["cursor"] = cursor
+        where_clause = ("WHERE " + "\n          AND ".join(conditions)) if conditions else ""
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT :limit"
+            params["limit"] = limit
+        
+        query = f"""
         SELECT 
             c.customer_id,
             c.name,
@@ -201,54 +930,60 @@ class DatabricksService:
             COALESCE(cs.summary_text, '') as ai_summary
         FROM customers c
         LEFT JOIN customer_summaries cs ON c.customer_id = cs.customer_id
+        {where_clause}
         ORDER BY c.customer_id
+        {limit_clause}
         """
+        return queries.CUSTOMERS_PAGE.with_sql(query), params
+    
+    @staticmethod
+    def _customer_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "customer_id": row["customer_id"],
+            "name": row["name"],
+            "email": row.get("email"),
+            "phone": row.get("phone"),
+            "status": row["status"],
+            "main_category": row.get("main_category"),
+            "ai_summary": row.get("ai_summary", ""),
+            "updated_at": row.get("updated_at", datetime.now().isoformat())
+        }
+    
+    def _mock_customers_page(self, status, main_category, limit, cursor) -> Dict[str, Any]:
+        customers = self._mock_store.customers(status, main_category, cursor, limit + 1)
+        return self._customers_page(customers, limit)
+    
+    async def stream_customers(
+        self,
+        user_token: Optional[str] = None,
+        status: Optional[str] = None,
+        main_category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream customers in batches (same filters as get_customers_page, no page size by default)"""
+        if self.use_mock_data:
+            yield self._mock_store.customers(status, main_category, cursor, limit)
+            return
         
-        print(f"DEBUG: get_all_customers executing query with user_token present: {user_token is not None}")
-        try:
-            results = await self._execute_query(query, user_token=user_token)
-            print(f"DEBUG: get_all_customers query returned {len(results)} results, use_mock_data={self.use_mock_data}")
-        except Exception as e:
-            print(f"ERROR: Exception in get_all_customers query execution: {e}")
-            import traceback
-            traceback.print_exc()
-            # Fall back to mock data on any exception
-            return MOCK_CUSTOMERS
-        
-        # If we fell back to mock data, return mock data
-        if self.use_mock_data or not results:
-            print("DEBUG: get_all_customers falling back to mock data")
-            return MOCK_CUSTOMERS
-        
-        # Convert to match mock data format
-        customers = []
-        try:
-            for row in results:
-                customer = {
-                    "customer_id": row["customer_id"],
-                    "name": row["name"],
-                    "email": row.get("email"),
-                    "phone": row.get("phone"),
-                    "status": row["status"],
-                    "main_category": row.get("main_category"),
-                    "ai_summary": row.get("ai_summary", ""),
-                    "updated_at": row.get("updated_at", datetime.now().isoformat())
-                }
-                customers.append(customer)
-            print(f"DEBUG: get_all_customers returning {len(customers)} customers")
-        except Exception as e:
-            print(f"ERROR: Exception converting results to customers: {e}")
-            import traceback
-            traceback.print_exc()
-            # Fall back to mock data on conversion error
-            return MOCK_CUSTOMERS
-        
-        return customers
+        query, params = self._customers_query(status, main_category, cursor, limit)
+        async for rows in self._stream_query(query, params, user_token=user_token):
+            yield [self._customer_from_row(row) for row in rows]
+    
+    @staticmethod
+    def _customers_page(customers: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+        """Trim the extra look-ahead row and derive the next cursor"""
+        has_more = len(customers) > limit
+        customers = customers[:limit]
+        return {
+            "customers": customers,
+            "next_cursor": customers[-1]["customer_id"] if has_more else None,
+        }
     
     async def get_customer_by_id(self, customer_id: str, user_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get single customer details"""
         if self.use_mock_data:
-            customer = next((c for c in MOCK_CUSTOMERS if c["customer_id"] == customer_id), None)
+            customer = self._mock_store.customer(customer_id)
             if customer:
                 return {
                     **customer,
@@ -256,28 +991,64 @@ class DatabricksService:
                 }
             return None
         
-        query = """
-        SELECT 
-            c.customer_id,
-            c.name,
-            c.email,
-            c.phone,
-            c.status,
-            c.main_category,
-            c.updated_at,
-            COALESCE(cs.summary_text, '') as ai_summary,
-            cs.generated_at as summary_generated_at
-        FROM customers c
-        LEFT JOIN customer_summaries cs ON c.customer_id = cs.customer_id
-        WHERE c.customer_id = ?
-        """
+        row = await self._fetch_customer_row(customer_id, user_token)
+        if row is None:
+            return None
+        return self._customer_detail_from_row(row)
+    
+    async def get_customer_full(
+        self,
+        customer_id: str,
+        user_token: Optional[str] = None,
+        journey_limit: int = 200,
+    ) -> Optional[Dict[str, Any]]:
+        """Get everything the journey page needs in one call.
         
-        results = await self._execute_query(query, {"customer_id": customer_id}, user_token=user_token)
+        Customer (joined with its summary), next best action and the first journey page
+        are fetched concurrently; the summary comes from the customer row rather than a
+        second read of customer_summaries.
+        """
+        if self.use_mock_data:
+            customer, summary, action, journey = await asyncio.gather(
+                self.get_customer_by_id(customer_id, user_token=user_token),
+                self.get_customer_summary(customer_id, user_token=user_token),
+                self.get_next_best_action(customer_id, user_token=user_token),
+                self.get_customer_journey_page(customer_id, user_token=user_token, limit=journey_limit),
+            )
+        else:
+            row, action, journey = await asyncio.gather(
+                self._fetch_customer_row(customer_id, user_token),
+                self.get_next_best_action(customer_id, user_token=user_token),
+                self.get_customer_journey_page(customer_id, user_token=user_token, limit=journey_limit),
+            )
+            if row is None:
+                return None
+            customer = self._customer_detail_from_row(row)
+            summary = None
+            if row.get("has_summary"):
+                summary = {
+                    "summary_text": row.get("ai_summary", ""),
+                    "generated_at": row.get("summary_generated_at", datetime.now().isoformat()),
+                    "model_version": row.get("summary_model_version") or "v1.0",
+                }
         
-        if not results:
+        if customer is None:
             return None
+        return {
+            "customer": customer,
+            "summary": summary,
+            "next_action": action,
+            "journey": journey,
+        }
+    
+    async def _fetch_customer_row(self, customer_id: str, user_token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Read a customer joined with its AI summary"""
+        results = await self._execute_query(queries.CUSTOMER_DETAIL, {"customer_id": customer_id}, user_token=user_token)
         
-        row = results[0]
+        return results[0] if results else None
+    
+    @staticmethod
+    def _customer_detail_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "customer_id": row["customer_id"],
             "name": row["name"],
@@ -291,165 +1062,110 @@ class DatabricksService:
         }
     
     async def get_customer_journey(self, customer_id: str, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get customer journey timeline events"""
-        if self.use_mock_data:
-            return MOCK_JOURNEY.get(customer_id, [])
-        
-        events = []
+        """Get all customer journey timeline events (most recent first)"""
+        page = await self.get_customer_journey_page(customer_id, user_token=user_token)
+        return page["events"]
+    
+    async def get_customer_journey_page(
+        self,
+        customer_id: str,
+        user_token: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of customer journey events, most recent first.
         
-        # Get calls
-        calls_query = """
-        SELECT 
-            call_id as event_id,
-            call_timestamp as event_time,
-            issue_description as description,
-            call_duration,
-            call_type,
-            resolution_status as status
-        FROM customer_calls
-        WHERE customer_id = ?
-        ORDER BY call_timestamp DESC
+        ``before`` returns older events and ``after`` newer ones; both take a cursor from a
+        previous page or an ISO timestamp. ``event_types`` restricts the sources queried.
+        Without ``limit`` the whole (filtered) journey is returned.
         """
-        calls = await self._execute_query(calls_query, {"customer_id": customer_id}, user_token=user_token)
-        for call in calls:
-            events.append({
-                "event_type": "call",
-                "event_id": call["event_id"],
-                "event_title": "Call",
-                "event_time": call["event_time"],
-                "description": call.get("description", ""),
-                "call_duration": call.get("call_duration"),
-                "call_type": call.get("call_type"),
-                "status": call.get("status", "open"),
-                "color": "blue",
-                "shape": "circle"
-            })
-        
-        # Get installations
-        installs_query = """
-        SELECT 
-            installation_id as event_id,
-            installation_date as event_time,
-            product_name,
-            status
-        FROM installations
-        WHERE customer_id = ?
-        ORDER BY installation_date DESC
-        """
-        installs = await self._execute_query(installs_query, {"customer_id": customer_id}, user_token=user_token)
-        for inst in installs:
-            events.append({
-                "event_type": "installation",
-                "event_id": inst["event_id"],
-                "event_title": "Installation",
-                "event_time": inst["event_time"],
-                "description": f"Installation of {inst.get('product_name', 'Product')}",
-                "status": inst.get("status", "completed"),
-                "color": "green",
-                "shape": "square"
-            })
-        
-        # Get technician visits
-        visits_query = """
-        SELECT 
-            visit_id as event_id,
-            visit_date as event_time,
-            technician_name,
-            visit_status as status,
-            visit_purpose
-        FROM technician_visits
-        WHERE customer_id = ?
-        ORDER BY visit_date DESC
-        """
-        visits = await self._execute_query(visits_query, {"customer_id": customer_id}, user_token=user_token)
-        for visit in visits:
-            events.append({
-                "event_type": "visit",
-                "event_id": visit["event_id"],
-                "event_title": f"Technician Visit - {visit.get('visit_purpose', 'service')}",
-                "event_time": visit["event_time"],
-                "description": f"{visit.get('visit_purpose', 'service')} by {visit.get('technician_name', 'Technician')}",
-                "status": visit.get("status", "planned"),
-                "color": "orange",
-                "shape": "triangle"
-            })
-        
-        # Get website visits
-        web_query = """
-        SELECT 
-            visit_id as event_id,
-            visit_timestamp as event_time,
-            page_visited as description
-        FROM website_visits
-        WHERE customer_id = ?
-        ORDER BY visit_timestamp DESC
-        """
-        web_visits = await self._execute_query(web_query, {"customer_id": customer_id}, user_token=user_token)
-        for web in web_visits:
-            events.append({
-                "event_type": "website",
-                "event_id": web["event_id"],
-                "event_title": "Website Visit",
-                "event_time": web["event_time"],
-                "description": web.get("description", "Website visit"),
-                "status": "neutral",
-                "color": "purple",
-                "shape": "diamond"
-            })
-        
-        # Get digital interactions
-        digital_query = """
-        SELECT 
-            interaction_id as event_id,
-            interaction_timestamp as event_time,
-            channel,
-            message_content as description,
-            sentiment as status
-        FROM digital_interactions
-        WHERE customer_id = ?
-        ORDER BY interaction_timestamp DESC
-        """
-        digitals = await self._execute_query(digital_query, {"customer_id": customer_id}, user_token=user_token)
-        for dig in digitals:
-            events.append({
-                "event_type": "digital",
-                "event_id": dig["event_id"],
-                "event_title": f"Digital Interaction - {dig.get('channel', 'Channel')}",
-                "event_time": dig["event_time"],
-                "description": dig.get("description", ""),
-                "channel": dig.get("channel"),
-                "status": dig.get("status", "neutral"),
-                "color": "pink",
-                "shape": "star"
-            })
-        
-        # Sort all events by time (most recent first)
-        events.sort(key=lambda x: x.get("event_time", ""), reverse=True)
-        
-        return events
+        if before and after:
+            raise ValueError("Use either 'before' or 'after', not both")
+        direction = "after" if after else "before"
+        cursor = decode_journey_cursor(after or before) if (after or before) else None
+        sources = [s for s in JOURNEY_SOURCES if not event_types or s["event_type"] in event_types]
+        # Fetch one extra row to know whether another page exists
+        fetch_limit = limit + 1 if limit is not None else None
+        use_mock_data = self.use_mock_data
+        
+        if use_mock_data:
+            # Pre-sorted per customer, so the page is read straight off the array
+            streams = [self._mock_store.journey(
+                customer_id, {s["event_type"] for s in sources}, cursor, direction
+            )]
+        elif not sources:
+            streams = []
+        elif self._journey_query_mode == "union":
+            streams = [await self._fetch_journey_union(customer_id, user_token, sources, cursor, direction, fetch_limit)]
+        elif self._journey_query_mode == "sequential":
+            streams = await self._fetch_journey_sequential(customer_id, user_token, sources, cursor, direction, fetch_limit)
+        else:
+            streams = await self._fetch_journey_concurrent(customer_id, user_token, sources, cursor, direction, fetch_limit)
+        
+        # Each stream is already in journey order, so a lazy k-way merge materializes only one page
+        merged = heapq.merge(*streams, key=lambda k: k[0], reverse=direction == "before")
+        page = list(islice(merged, fetch_limit)) if fetch_limit is not None else list(merged)
+        has_more = limit is not None and len(page) > limit
+        if has_more:
+            page = page[:limit]
+        
+        events = [
+            row if use_mock_data else JOURNEY_EVENT_BUILDERS[event_type](row)
+            for _, event_type, row in page
+        ]
+        if direction == "after":
+            events.reverse()
+        
+        # next_cursor pages towards older events, prev_cursor towards newer ones
+        older_exist = has_more if direction == "before" else cursor is not None
+        newer_exist = has_more if direction == "after" else cursor is not None
+        return {
+            "events": events,
+            "next_cursor": encode_journey_cursor(events[-1]) if events and older_exist else None,
+            "prev_cursor": encode_journey_cursor(events[0]) if events and newer_exist else None,
+        }
+    
+    def _journey_stream(self, event_type: str, rows: List[Dict[str, Any]]) -> List[tuple]:
+        return [(_journey_key(event_type, row), event_type, row) for row in rows]
+    
+    async def _fetch_journey_sequential(self, customer_id, user_token, sources, cursor, direction, limit) -> List[List[tuple]]:
+        """One query per source, awaited one after another"""
+        streams = []
+        for source in sources:
+            params = {"customer_id": customer_id}
+            query = queries.JOURNEY_SOURCE.with_sql(_journey_source_query(source, params, cursor, direction, limit))
+            results = await self._execute_query(query, params, user_token=user_token)
+            streams.append(self._journey_stream(source["event_type"], results))
+        return streams
+    
+    async def _fetch_journey_concurrent(self, customer_id, user_token, sources, cursor, direction, limit) -> List[List[tuple]]:
+        """One query per source, all in flight at once so latency is the slowest source, not the sum"""
+        pending = []
+        for source in sources:
+            params = {"customer_id": customer_id}
+            query = queries.JOURNEY_SOURCE.with_sql(_journey_source_query(source, params, cursor, direction, limit))
+            pending.append(self._execute_query(query, params, user_token=user_token))
+        results = await asyncio.gather(*pending)
+        return [
+            self._journey_stream(source["event_type"], rows)
+            for source, rows in zip(sources, results)
+        ]
+    
+    async def _fetch_journey_union(self, customer_id, user_token, sources, cursor, direction, limit) -> List[tuple]:
+        """All sources in a single UNION ALL round trip with a normalized event projection"""
+        params = {"customer_id": customer_id}
+        query = queries.JOURNEY_UNION.with_sql(_journey_union_query(sources, params, cursor, direction, limit))
+        results = await self._execute_query(query, params, user_token=user_token)
+        return [(_journey_key(row["event_type"], row), row["event_type"], row) for row in results]
     
     async def get_customer_summary(self, customer_id: str, user_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get customer AI summary"""
         if self.use_mock_data:
-            customer = next((c for c in MOCK_CUSTOMERS if c["customer_id"] == customer_id), None)
-            if customer:
-                return {
-                    "summary_text": customer.get("ai_summary", ""),
-                    "generated_at": datetime.now().isoformat(),
-                    "model_version": "v1.0",
-                }
-            return None
-        
-        query = """
-        SELECT 
-            summary_text,
-            generated_at,
-            model_version
-        FROM customer_summaries
-        WHERE customer_id = ?
-        """
+            return self._mock_store.summary(customer_id)
         
-        results = await self._execute_query(query, {"customer_id": customer_id}, user_token=user_token)
+        results = await self._execute_query(queries.CUSTOMER_SUMMARY, {"customer_id": customer_id}, user_token=user_token)
         
         if not results:
             return None
@@ -464,29 +1180,9 @@ class DatabricksService:
     async def get_next_best_action(self, customer_id: str, user_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get next best action for customer"""
         if self.use_mock_data:
-            return MOCK_NEXT_ACTIONS.get(customer_id)
+            return self._mock_store.next_action(customer_id)
         
-        query = """
-        SELECT 
-            action_type,
-            action_description,
-            priority,
-            recommended_date,
-            status
-        FROM next_best_actions
-        WHERE customer_id = ?
-          AND status IN ('pending', 'in_progress')
-        ORDER BY 
-            CASE priority
-                WHEN 'high' THEN 1
-                WHEN 'medium' THEN 2
-                WHEN 'low' THEN 3
-            END,
-            recommended_date
-        LIMIT 1
-        """
-        
-        results = await self._execute_query(query, {"customer_id": customer_id}, user_token=user_token)
+        results = await self._execute_query(queries.NEXT_BEST_ACTION, {"customer_id": customer_id}, user_token=user_token)
         
         if not results:
             return None
@@ -500,30 +1196,70 @@ class DatabricksService:
             "status": row.get("status", "pending")
         }
     
-    async def get_dashboard_stats(self, user_token: Optional[str] = None) -> Dict[str, Any]:
-        """Get dashboard statistics"""
+    async def get_dashboard_summary(self, user_token: Optional[str] = None) -> Dict[str, Any]:
+        """Get dashboard statistics together with hourly and daily call trends"""
         if self.use_mock_data:
-            return MOCK_STATS
-        
-        # Count open calls
-        open_calls_query = """
-        SELECT COUNT(*) as open_calls
-        FROM customer_calls
-        WHERE resolution_status = 'open'
-        """
-        open_calls_result = await self._execute_query(open_calls_query, user_token=user_token)
-        open_calls = open_calls_result[0]["open_calls"] if open_calls_result else 0
+            return {
+                "stats": self._mock_store.stats,
+                "hourly_trends": self._mock_store.hourly_trends,
+                "daily_trends": self._mock_store.daily_trends,
+            }
+        if self._trend_aggregator is None:
+            return await self._cached("dashboard_summary", self._load_dashboard_summary, user_token)
+        stats, trends = await asyncio.gather(
+            self._cached("dashboard_stats", self._load_dashboard_stats, user_token),
+            self._get_aggregated_trends(user_token),
+        )
+        return {"stats": stats, **trends}
+    
+    async def _load_dashboard_summary(self, user_token: Optional[str] = None) -> Dict[str, Any]:
+        # Same whole-hour windows as the incremental aggregator, so both modes report the same counts
+        hourly_start, window_start = trend_window_starts(to_utc_datetime(datetime.now(timezone.utc)), timedelta(days=30))
+        call_rows, status_results = await asyncio.gather(
+            self._execute_query(
+                queries.DASHBOARD_SUMMARY,
+                {"hourly_start": hourly_start, "window_start": window_start},
+                user_token=user_token,
+                raise_errors=True,
+            ),
+            self._execute_query(queries.CUSTOMER_STATUS_COUNTS, user_token=user_token, raise_errors=True),
+        )
         
-        # Count customers by status
-        status_query = """
-        SELECT 
-            status,
-            COUNT(*) as count
-        FROM customers
-        GROUP BY status
-        """
-        status_results = await self._execute_query(status_query, user_token=user_token)
+        open_calls = 0
+        hour_counts: Dict[int, int] = {}
+        day_counts: Dict[str, int] = {}
+        for row in call_rows:
+            open_calls += row["open_calls"] or 0
+            if row["recent_calls"]:
+                hour_counts[row["hour"]] = hour_counts.get(row["hour"], 0) + row["recent_calls"]
+            if row["window_calls"]:
+                date_str = self._date_str(row["date"])
+                day_counts[date_str] = day_counts.get(date_str, 0) + row["window_calls"]
         
+        return {
+            "stats": self._dashboard_stats(open_calls, status_results),
+            # Fill in all 24 hours (0-23) with counts, defaulting to 0
+            "hourly_trends": [
+                {"hour": hour, "call_count": hour_counts.get(hour, 0)}
+                for hour in range(24)
+            ],
+            "daily_trends": [
+                {"date": date_str, "call_count": day_counts[date_str]}
+                for date_str in sorted(day_counts)
+            ],
+        }
+    
+    async def _load_dashboard_stats(self, user_token: Optional[str] = None) -> Dict[str, Any]:
+        # Trends come from the aggregator, so only the counts are queried here
+        open_calls_result, status_results = await asyncio.gather(
+            self._execute_query(queries.DASHBOARD_STATS, user_token=user_token, raise_errors=True),
+            self._execute_query(queries.CUSTOMER_STATUS_COUNTS, user_token=user_token, raise_errors=True),
+        )
+        open_calls = open_calls_result[0]["open_calls"] if open_calls_result else 0
+        return self._dashboard_stats(open_calls, status_results)
+    
+    @staticmethod
+    def _dashboard_stats(open_calls: int, status_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         status_counts = {"low": 0, "normal": 0, "urgent": 0}
         for row in status_results:
             status = row["status"].lower()
@@ -537,115 +1273,300 @@ class DatabricksService:
             "urgent_customers": status_counts["urgent"]
         }
     
+    async def _get_aggregated_trends(self, user_token: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Serve trends from the in-memory aggregator, refreshing it with the caller's token"""
+        return await self._trend_aggregator.get_trends(
+            lambda since: self._execute_query(queries.CALL_BUCKETS, {"since": since}, user_token=user_token, raise_errors=True)
+        )
+    
+    @staticmethod
+    def _date_str(date_value: Any) -> str:
+        """Convert a date (or datetime) value to a YYYY-MM-DD string"""
+        if isinstance(date_value, datetime):
+            return date_value.date().isoformat()
+        if hasattr(date_value, 'isoformat'):
+            return date_value.isoformat()
+        return str(date_value)
+    
+    async def get_dashboard_stats(self, user_token: Optional[str] = None) -> Dict[str, Any]:
+        """Get dashboard statistics"""
+        summary = await self.get_dashboard_summary(user_token=user_token)
+        return summary["stats"]
+    
     async def get_hourly_trends(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get hourly call trends (last 24 hours)"""
-        if self.use_mock_data:
-            return MOCK_HOURLY_TRENDS
+        trends = await self._get_trends(user_token)
+        return trends["hourly_trends"]
+    
+    async def get_daily_trends(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get daily call trends (last 30 days)"""
+        trends = await self._get_trends(user_token)
+        return trends["daily_trends"]
+    
+    async def _get_trends(self, user_token: Optional[str]) -> Dict[str, Any]:
+        if self.use_mock_data or self._trend_aggregator is None:
+            return await self.get_dashboard_summary(user_token=user_token)
+        return await self._get_aggregated_trends(user_token)
+    
+    async def _get_live_trends(self, user_token: Optional[str] = None) -> Dict[str, Any]:
+        trends = await self._get_trends(user_token)
+        return {"hourly_trends": trends["hourly_trends"], "daily_trends": trends["daily_trends"]}
+    
+    async def _get_live_visits(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Unlike get_technician_visits, a failed query raises rather than reporting every visit removed
+        grid = await self._get_visit_grid(user_token)
+        if grid is not None:
+            return grid.query()
+        return await self._load_active_visits(user_token)
+    
+    @property
+    def live_topics(self) -> List[str]:
+        return list(self._live_updates.topics)
+    
+    def subscribe_live(
+        self,
+        topics: List[str],
+        user_token: Optional[str] = None,
+        snapshots: bool = True,
+        heartbeat: float = 15.0,
+        max_duration: Optional[float] = None,
+    ) -> AsyncIterator[Optional[LiveEvent]]:
+        """Subscribe to live topic updates: a snapshot of each topic, then diffs as they are polled.
         
-        query = """
-        SELECT 
-            HOUR(call_timestamp) as hour,
-            COUNT(*) as call_count
-        FROM customer_calls
-        WHERE call_timestamp >= CURRENT_TIMESTAMP() - INTERVAL 24 HOUR
-        GROUP BY HOUR(call_timestamp)
-        ORDER BY hour
+        Subscribers share one poller per topic, or per user with per-user cache scope.
         """
+        scope = (hash_token(user_token) if user_token else "anonymous") if self._cache_scope == "user" else "shared"
+        return self._live_updates.subscribe(topics, user_token, scope, snapshots, heartbeat, max_duration)
+    
+    def get_live_stats(self) -> Dict[str, Any]:
+        """Live update pollers, subscribers and event counters"""
+        return self._live_updates.stats()
+    
+    async def get_call_trends(
+        self,
+        granularity: str = "hour",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        user_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get call counts per minute/hour/day/week bucket over [start, end) from the rollup tables.
         
-        results = await self._execute_query(query, user_token=user_token)
-        
-        # Create a map of hour -> count
-        hour_counts = {row["hour"]: row["call_count"] for row in results}
+        Raises ValueError for an unknown granularity or an invalid or too large range.
+        """
+        now = to_utc_datetime(datetime.now(timezone.utc))
+        start = to_utc_datetime(start) if start else None
+        end = to_utc_datetime(end) if end else None
+        start, end = resolve_trend_range(granularity, start, end, now, self._trends_max_points)
+        rollup = select_rollup(granularity, start, end, now)
         
-        # Fill in all 24 hours (0-23) with counts, defaulting to 0
-        trends = []
-        for hour in range(24):
-            trends.append({
-                "hour": hour,
-                "call_count": hour_counts.get(hour, 0)
-            })
+        if self.use_mock_data:
+            source = "mock"
+            counts: Dict[datetime, int] = {}
+            for call_time in self._mock_store.call_times(start, end):
+                bucket = bucket_floor(call_time, granularity)
+                counts[bucket] = counts.get(bucket, 0) + 1
+            buckets = fill_trend_buckets(granularity, start, end, counts)
+        else:
+            source = rollup["table"]
+            results = await self._execute_query(
+                queries.CALL_TRENDS.with_sql(rollup_query(rollup, granularity)),
+                {"start": start, "end": end},
+                user_token=user_token,
+            )
+            counts = {to_utc_datetime(row["bucket"]): row["call_count"] for row in results}
+            buckets = fill_trend_buckets(granularity, start, end, counts)
         
-        return trends
+        return {
+            "granularity": granularity,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "source": source,
+            "buckets": buckets,
+        }
     
-    async def get_daily_trends(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get daily call trends (last 30 days)"""
-        if self.use_mock_data:
-            return MOCK_DAILY_TRENDS
+    async def get_technician_visits(
+        self,
+        user_token: Optional[str] = None,
+        bbox: Optional[BoundingBox] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        technician_ids: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get active technician visits with coordinates.
         
-        query = """
-        SELECT 
-            DATE(call_timestamp) as date,
-            COUNT(*) as call_count
-        FROM customer_calls
-        WHERE call_timestamp >= CURRENT_TIMESTAMP() - INTERVAL 30 DAY
-        GROUP BY DATE(call_timestamp)
-        ORDER BY date
+        ``bbox`` is (min_lat, min_lon, max_lat, max_lon) as checked by ``validate_bbox``;
+        ``start``/``end`` bound ``visit_date`` (end exclusive). With the visit index on,
+        the filters are applied to the in-memory grid, otherwise they are pushed into SQL.
         """
+        start = to_utc_datetime(start) if start else None
+        end = to_utc_datetime(end) if end else None
+        technicians = set(technician_ids) if technician_ids else None
+        grid = await self._get_visit_grid(user_token)
+        if grid is not None:
+            return grid.query(bbox, start, end, technicians)
         
-        results = await self._execute_query(query, user_token=user_token)
+        query, params = self._technician_visits_query(bbox, start, end, technician_ids)
+        results = await self._execute_query(query, params, user_token=user_token)
         
-        # Convert date objects to ISO format strings
-        trends = []
-        for row in results:
-            date_value = row["date"]
-            if isinstance(date_value, datetime):
-                date_str = date_value.date().isoformat()
-            elif hasattr(date_value, 'isoformat'):
-                date_str = date_value.isoformat()
-            else:
-                date_str = str(date_value)
-            
-            trends.append({
-                "date": date_str,
-                "call_count": row["call_count"]
-            })
+        return [self._visit_from_row(row) for row in results]
+    
+    async def stream_technician_visits(
+        self,
+        user_token: Optional[str] = None,
+        bbox: Optional[BoundingBox] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        technician_ids: Optional[List[str]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream technician visits in batches (a single batch when served from the grid)"""
+        if self.use_mock_data or self._visit_index is not None:
+            yield await self.get_technician_visits(user_token, bbox, start, end, technician_ids)
+            return
         
-        return trends
+        query, params = self._technician_visits_query(
+            bbox, to_utc_datetime(start) if start else None, to_utc_datetime(end) if end else None, technician_ids
+        )
+        async for rows in self._stream_query(query, params, user_token=user_token):
+            yield [self._visit_from_row(row) for row in rows]
     
-    async def get_technician_visits(self, user_token: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get technician visits with coordinates"""
-        if self.use_mock_data:
-            return MOCK_VISITS
+    async def get_technician_visit_clusters(
+        self,
+        zoom: int,
+        bbox: Optional[BoundingBox] = None,
+        user_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get active visits clustered for a map zoom level, limited to the clusters overlapping ``bbox``.
         
-        query = """
-        SELECT 
-            v.visit_id,
-            v.customer_id,
-            c.name as customer_name,
-            c.address,
-            v.technician_id,
-            v.technician_name,
-            v.visit_date,
-            v.visit_status,
-            v.visit_purpose,
-            v.latitude,
-            v.longitude,
-            v.estimated_duration
-        FROM technician_visits v
-        JOIN customers c ON v.customer_id = c.customer_id
-        WHERE v.visit_status IN ('planned', 'underway')
-        ORDER BY v.visit_date
+        Clusters are computed once per zoom level: from the visit index while it is on,
+        otherwise by an aggregate query whose result is cached per zoom level.
+        Raises ValueError for a zoom level outside 0..22.
         """
+        cell_degrees = cluster_cell_degrees(zoom, self._cluster_pixels)
+        grid = await self._get_visit_grid(user_token)
+        if grid is not None:
+            source = "mock" if self.use_mock_data else "index"
+            clusters = grid.clusters(zoom, self._cluster_pixels)
+        else:
+            source = "query"
+            clusters = await self._cached(
+                "technician_visit_clusters",
+                lambda token: self._load_visit_clusters(zoom, token),
+                user_token,
+                variant=zoom,
+            )
         
-        results = await self._execute_query(query, user_token=user_token)
-        
-        visits = []
-        for row in results:
-            visit = {
-                "visit_id": row["visit_id"],
-                "customer_id": row["customer_id"],
-                "customer_name": row.get("customer_name"),
-                "address": row.get("address"),
-                "technician_id": row.get("technician_id"),
-                "technician_name": row.get("technician_name"),
-                "visit_date": row.get("visit_date"),
-                "visit_status": row.get("visit_status"),
-                "visit_purpose": row.get("visit_purpose"),
-                "latitude": float(row["latitude"]) if row.get("latitude") is not None else None,
-                "longitude": float(row["longitude"]) if row.get("longitude") is not None else None,
-                "estimated_duration": row.get("estimated_duration")
-            }
-            visits.append(visit)
+        return {
+            "zoom": zoom,
+            "cell_degrees": cell_degrees,
+            "source": source,
+            "total_visits": clusters.visit_count,
+            "clusters": clusters.query(bbox),
+        }
+    
+    async def get_nearest_technicians(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        user_token: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the ``k`` technicians closest to (lat, lon) with their distance and workload"""
+        technicians = await self._get_technician_index(user_token)
+        return technicians.nearest(lat, lon, k)
+    
+    async def get_technician_workloads(
+        self,
+        technician_ids: Optional[List[str]] = None,
+        user_token: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get visit count, planned minutes and travel distance per technician over the active visits"""
+        technicians = await self._get_technician_index(user_token)
+        return technicians.workloads(technician_ids)
+    
+    async def _get_technician_index(self, user_token: Optional[str] = None) -> TechnicianIndex:
+        """Technician index over the active visits: rebuilt with each visit grid refresh, or cached"""
+        grid = await self._get_visit_grid(user_token)
+        if grid is not None:
+            return grid.technicians()
+        return await self._cached("technician_index", self._load_technician_index, user_token)
+    
+    async def _load_technician_index(self, user_token: Optional[str] = None) -> TechnicianIndex:
+        return TechnicianIndex(await self._load_active_visits(user_token))
+    
+    async def _load_visit_clusters(self, zoom: int, user_token: Optional[str] = None) -> VisitClusters:
+        results = await self._execute_query(
+            queries.TECHNICIAN_VISIT_CLUSTERS,
+            {"cell_degrees": cluster_cell_degrees(zoom, self._cluster_pixels)},
+            user_token=user_token,
+            raise_errors=True,
+        )
+        return VisitClusters.from_rows(results, zoom, self._cluster_pixels)
+    
+    async def _get_visit_grid(self, user_token: Optional[str] = None) -> Optional[VisitGrid]:
+        """The grid of active visits (the sample visits in mock mode), or None when the visit index is off"""
+        if self.use_mock_data:
+            if self._mock_visit_grid is None:
+                self._mock_visit_grid = VisitGrid(self._mock_store.visits, self._visit_cell_degrees)
+            return self._mock_visit_grid
+        if self._visit_index is not None:
+            return await self._visit_index.get_grid(lambda: self._load_active_visits(user_token))
+        return None
+    
+    async def _load_active_visits(self, user_token: Optional[str]) -> List[Dict[str, Any]]:
+        # Raises on failure, so the visit index keeps its grid instead of swapping in an empty one
+        results = await self._execute_query(queries.TECHNICIAN_VISITS, user_token=user_token, raise_errors=True)
+        return [self._visit_from_row(row) for row in results]
+    
+    @staticmethod
+    def _technician_visits_query(
+        bbox: Optional[BoundingBox] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        technician_ids: Optional[List[str]] = None,
+    ) -> tuple:
+        """Build the active visits query with the map filters as SQL predicates.
         
-        return visits
-
+        Returns the plain ``technician_visits`` query when there are no filters, else
+        ``technician_visits_filtered``, and its parameters.
+        """
+        params: Dict[str, Any] = {}
+        conditions = []
+        if bbox is not None:
+            conditions.append("v.latitude BETWEEN :min_lat AND :max_lat")
+            conditions.append("v.longitude BETWEEN :min_lon AND :max_lon")
+            params.update(min_lat=bbox[0], min_lon=bbox[1], max_lat=bbox[2], max_lon=bbox[3])
+        if start is not None:
+            conditions.append("v.visit_date >= :start")
+            params["start"] = start
+        if end is not None:
+            conditions.append("v.visit_date < :end")
+            params["end"] = end
+        if technician_ids:
+            markers = []
+            for i, technician_id in enumerate(technician_ids):
+                params[f"technician_{i}"] = technician_id
+                markers.append(f":technician_{i}")
+            conditions.append(f"v.technician_id IN ({', '.join(markers)})")
+        if not conditions:
+            return queries.TECHNICIAN_VISITS, params
+        
+        filters = "".join("\n          AND " + condition for condition in conditions)
+        query = queries.TECHNICIAN_VISITS_TEMPLATE.format(filters=filters)
+        return queries.TECHNICIAN_VISITS_FILTERED.with_sql(query), params
+    
+    @staticmethod
+    def _visit_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "visit_id": row["visit_id"],
+            "customer_id": row["customer_id"],
+            "customer_name": row.get("customer_name"),
+            "address": row.get("address"),
+            "technician_id": row.get("technician_id"),
+            "technician_name": row.get("technician_name"),
+            "visit_date": row.get("visit_date"),
+            "visit_status": row.get("visit_status"),
+            "visit_purpose": row.get("visit_purpose"),
+            "latitude": float(row["latitude"]) if row.get("latitude") is not None else None,
+            "longitude": float(row["longitude"]) if row.get("longitude") is not None else None,
+            "estimated_duration": row.get("estimated_duration")
+        }
@@ -0,0 +1,233 @@
+import functools
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .query_backends import QueryBackend
+
+logger = logging.getLogger(__name__)
+
+SQL_DIR = Path(__file__).resolve().parent.parent.parent / "sql"
+DEFAULT_SCHEMA_FILES = (SQL_DIR / "schemas.sql", SQL_DIR / "rollups.sql")
+
+# Timestamps are stored as ISO 8601 text with milliseconds, which sorts chronologically as long
+# as every value (stored, bound or computed) uses exactly this format
+_NOW_FORMAT = "'%Y-%m-%dT%H:%M:%f'"
+_INTERVAL_UNITS = {"MINUTE": "minutes", "HOUR": "hours", "DAY": "days"}
+
+_CURRENT_TIMESTAMP = re.compile(
+    r"CURRENT_TIMESTAMP\(\)(?:\s*([+-])\s*INTERVAL\s+(\d+)\s+(MINUTE|HOUR|DAY|WEEK)S?\b)?", re.IGNORECASE
+)
+_TIMESTAMP_LITERAL = re.compile(r"\bTIMESTAMP\s+('[^']*')")
+_INSERT_OVERWRITE = re.compile(r"INSERT\s+OVERWRITE\s+(\w+)", re.IGNORECASE)
+_TABLE_OPTIONS = re.compile(r"\s*USING\s+DELTA|\s*CLUSTER\s+BY\s*\([^)]*\)", re.IGNORECASE)
+# Databricks types whose SQLite affinity would be wrong (STRING is NUMERIC, so '+123' became 123)
+_TEXT_TYPES = re.compile(r"\b(STRING|TIMESTAMP)\b")
+
+
+def format_timestamp(value: datetime) -> str:
+    """A datetime as stored: naive UTC, ``YYYY-MM-DDTHH:MM:SS.mmm`` (like strftime('%Y-%m-%dT%H:%M:%f'))"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}"
+
+
+def _timestamp_literal(match: "re.Match") -> str:
+    literal = match.group(1)[1:-1]
+    try:
+        return f"'{format_timestamp(datetime.fromisoformat(literal.replace(' ', 'T')))}'"
+    except ValueError:
+        return match.group(1).replace(" ", "T")
+
+
+def _current_timestamp(match: "re.Match") -> str:
+    sign, amount, unit = match.groups()
+    if not sign:
+        return f"strftime({_NOW_FORMAT}, 'now')"
+    amount = int(amount)
+    unit = unit.upper()
+    if unit == "WEEK":
+        amount, unit = amount * 7, "DAY"
+    return f"strftime({_NOW_FORMAT}, 'now', '{sign}{amount} {_INTERVAL_UNITS[unit]}')"
+
+
+@functools.lru_cache(maxsize=1024)
+def translate_sql(sql: str) -> str:
+    """Rewrite the Databricks SQL used by the app into SQLite SQL.
+
+    Covers CURRENT_TIMESTAMP() with INTERVAL arithmetic, TIMESTAMP literals, STRING and
+    TIMESTAMP column types, Delta table options and INSERT OVERWRITE (scripts only).
+    DATE_TRUNC and HOUR are provided as functions on each connection; DATE, COALESCE,
+    CASE and :name parameters work as-is.
+    """
+    sql = _CURRENT_TIMESTAMP.sub(_current_timestamp, sql)
+    sql = _TIMESTAMP_LITERAL.sub(_timestamp_literal, sql)
+    sql = _TABLE_OPTIONS.sub("", sql)
+    sql = _INSERT_OVERWRITE.sub(r"DELETE FROM \1; INSERT INTO \1", sql)
+    return _TEXT_TYPES.sub("TEXT", sql)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromisoformat(str(value))
+
+
+def _date_trunc(unit: str, value: Any) -> Optional[str]:
+    ts = _parse_timestamp(value)
+    if ts is None:
+        return None
+    unit = unit.upper()
+    if unit == "MINUTE":
+        ts = ts.replace(second=0, microsecond=0)
+    elif unit == "HOUR":
+        ts = ts.replace(minute=0, second=0, microsecond=0)
+    elif unit in ("DAY", "WEEK"):
+        ts = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        if unit == "WEEK":
+            # Weeks start on Monday, as in Databricks
+            ts -= timedelta(days=ts.weekday())
+    else:
+        raise ValueError(f"Unsupported DATE_TRUNC unit '{unit}'")
+    return format_timestamp(ts)
+
+
+def _hour(value: Any) -> Optional[int]:
+    ts = _parse_timestamp(value)
+    return None if ts is None else ts.hour
+
+
+def _bind(value: Any) -> Any:
+    """Parameter values as stored: timestamps as naive UTC ISO text with milliseconds"""
+    if isinstance(value, datetime):
+        return format_timestamp(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class EmbeddedCursor:
+    """DB-API cursor with the connector's ``execute(sql, parameters=...)`` signature"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._cursor = connection.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation: str, parameters: Optional[Dict[str, Any]] = None):
+        params = {name: _bind(value) for name, value in (parameters or {}).items()}
+        self._cursor.execute(translate_sql(operation), params)
+
+    def fetchall(self) -> List[tuple]:
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        return self._cursor.fetchmany(size)
+
+    def cancel(self):
+        # Aborts the statement running on this connection with sqlite3.OperationalError
+        self._connection.interrupt()
+
+    def close(self):
+        self._cursor.close()
+
+
+class EmbeddedConnection:
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+
+    def cursor(self) -> EmbeddedCursor:
+        return EmbeddedCursor(self._connection)
+
+    def close(self):
+        self._connection.close()
+
+
+class EmbeddedBackend(QueryBackend):
+    """SQLite database built from the schema files, queried with the same SQL as the warehouse.
+
+    ``path`` ":memory:" keeps one in-process database shared by all pooled connections;
+    any other path is a database file. The schema files (with their sample data) are
+    loaded through ``translate_sql`` when the database has no ``customers`` table yet.
+    Connections are pooled under a single key, since there are no per-user credentials.
+    """
+
+    name = "embedded"
+    _memory_databases = 0
+    _memory_lock = threading.Lock()
+
+    def __init__(self, path: str = ":memory:", schema_files: Sequence[Path] = DEFAULT_SCHEMA_FILES):
+        self.path = path
+        self.schema_files = list(schema_files)
+        self._anchor: Optional[sqlite3.Connection] = None
+        if path == ":memory:":
+            with EmbeddedBackend._memory_lock:
+                EmbeddedBackend._memory_databases += 1
+                number = EmbeddedBackend._memory_databases
+            self._uri = f"file:embedded-{os.getpid()}-{number}?mode=memory&cache=shared"
+            # The shared in-memory database lives as long as one connection to it is open
+            self._anchor = self.open_sqlite()
+        else:
+            self._uri = Path(path).resolve().as_uri()
+        self._load_schema()
+
+    @classmethod
+    def from_env(cls) -> "EmbeddedBackend":
+        schema_files = os.getenv("EMBEDDED_SCHEMA_FILES")
+        return cls(
+            path=os.getenv("EMBEDDED_DB_PATH", ":memory:"),
+            schema_files=[Path(p) for p in schema_files.split(",")] if schema_files else DEFAULT_SCHEMA_FILES,
+        )
+
+    def open_sqlite(self) -> sqlite3.Connection:
+        """A new sqlite3 connection to the database, with DATE_TRUNC and HOUR registered"""
+        # Pooled connections are handed between executor threads (one at a time)
+        connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False, isolation_level=None)
+        connection.create_function("DATE_TRUNC", 2, _date_trunc, deterministic=True)
+        connection.create_function("HOUR", 1, _hour, deterministic=True)
+        return connection
+
+    def _load_schema(self) -> None:
+        connection = self._anchor or self.open_sqlite()
+        try:
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers'"
+            ).fetchone()
+            if exists:
+                return
+            for schema_file in self.schema_files:
+                connection.executescript(translate_sql(Path(schema_file).read_text()))
+                logger.info("Loaded %s into the embedded database", schema_file)
+        finally:
+            if connection is not self._anchor:
+                connection.close()
+
+    def pool_key(self, user_token: Optional[str]) -> Optional[str]:
+        return self.name
+
+    def connect(self, key: str) -> Any:
+        try:
+            return EmbeddedConnection(self.open_sqlite())
+        except sqlite3.Error as e:
+            logger.exception("Failed to open embedded database: %s", e, extra={"path": self.path})
+            return None
+
+    def close(self) -> None:
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
@@ -0,0 +1,85 @@
+import asyncio
+import hmac
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics
+from .logging_setup import request_id_var
+from .profiler import RequestProfile, current_profile
+
+logger = logging.getLogger(__name__)
+
+
+def _profile_requested(scope: Scope) -> bool:
+    """Whether the request opted in to profiling with X-Profile: <PROFILE_TOKEN>"""
+    token = os.getenv("PROFILE_TOKEN")
+    requested = Headers(scope=scope).get("x-profile")
+    return bool(token and requested and hmac.compare_digest(requested, token))
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware recording request latency and response size per route, and
+    profiling the requests that ask for it.
+
+    Messages are observed as they pass through ``send``, so streamed responses count in
+    full (and are profiled in full) and no extra task or body stream is set up per request
+    (as ``@app.middleware`` layers do). It must run inside the logging middleware so a
+    profile is named after the request id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        # Stays 500 if the app fails before starting a response
+        status = 500
+        size = 0
+        profile: Optional[RequestProfile] = None
+        if _profile_requested(scope):
+            profile = RequestProfile(
+                interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+                max_seconds=float(os.getenv("PROFILE_MAX_SECONDS", "30")),
+            )
+            profile_dir = os.getenv("PROFILE_DIR", "/tmp/profiles")
+            name = request_id_var.get() or uuid.uuid4().hex
+            profile_reset = current_profile.set(profile)
+            profile.start()
+
+        async def send_instrumented(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    MutableHeaders(scope=message).append("X-Profile-File", os.path.join(profile_dir, f"{name}.collapsed"))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            # Label by route template (e.g. /api/customers/{customer_id}) to keep cardinality bounded;
+            # the router sets scope["route"] on the way in
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=status
+            )
+            metrics.HTTP_RESPONSE_SIZE.observe(size, method=scope["method"], route=route)
+            if profile is not None:
+                current_profile.reset(profile_reset)
+                # Stopping joins the sampler thread and writing does file I/O, so both run off the loop
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, profile.stop)
+                path = await loop.run_in_executor(None, profile.write, profile_dir, name)
+                logger.info("Wrote request profile to %s", path, extra={"samples": sum(profile.samples.values())})
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Loads a topic's current value with the token of one of its subscribers; raises if it
+# cannot, so subscribers keep the last value rather than seeing an empty one
+TopicLoader = Callable[[Optional[str]], Awaitable[Any]]
+# Returns the change from the previous to the new value, or None if nothing changed
+TopicDiff = Callable[[Any, Any], Optional[Dict[str, Any]]]
+
+# (topic, event type, data); event type is "snapshot", "diff" or "reset"
+LiveEvent = Tuple[str, str, Any]
+
+
+def diff_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Top-level keys whose value changed: {"changed": {key: new value}, "removed": [keys]}"""
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    removed = [key for key in old if key not in new]
+    if not changed and not removed:
+        return None
+    return {"changed": changed, "removed": removed}
+
+
+def diff_rows(key: str) -> TopicDiff:
+    """Diff of two row lists by ``key``: {"key", "added", "updated", "removed": [keys]}"""
+    def diff(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        before = {row[key]: row for row in old}
+        after = {row[key]: row for row in new}
+        added = [row for k, row in after.items() if k not in before]
+        updated = [row for k, row in after.items() if k in before and before[k] != row]
+        removed = [k for k in before if k not in after]
+        if not added and not updated and not removed:
+            return None
+        return {"key": key, "added": added, "updated": updated, "removed": removed}
+    return diff
+
+
+class LiveTopic:
+    def __init__(self, name: str, load: TopicLoader, interval: float, diff: TopicDiff = diff_fields):
+        self.name = name
+        self.load = load
+        self.interval = interval
+        self.diff = diff
+
+
+class _Subscriber:
+    def __init__(self, user_token: Optional[str], snapshots: bool, queue_size: int):
+        self.user_token = user_token
+        self.snapshots = snapshots
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.channels: List["_Channel"] = []
+
+
+class _Channel:
+    """One poller and its subscribers for a topic within a cache scope"""
+
+    def __init__(self, key: Tuple[str, Hashable], topic: LiveTopic):
+        self.key = key
+        self.topic = topic
+        self.subscribers: Dict[_Subscriber, None] = {}
+        self.value: Any = None
+        self.loaded = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class LiveUpdates:
+    """Fans topic updates out to any number of subscribers from one poller per topic.
+
+    While a topic has subscribers, its poller loads the value every ``interval``
+    seconds (with a current subscriber's token), diffs it against the previous value
+    and queues the diff for every subscriber, so the number of queries does not grow
+    with the number of open screens. A new subscriber first gets the latest value as a
+    snapshot. A subscriber whose queue is full is resynced: its backlog is dropped for a
+    snapshot (or a "reset" event if it did not ask for snapshots). Pollers stop when
+    their last subscriber leaves.
+    """
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self.topics: Dict[str, LiveTopic] = {}
+        self._channels: Dict[Tuple[str, Hashable], _Channel] = {}
+        self._stats = {
+            "subscriptions": 0,
+            "polls": 0,
+            "poll_errors": 0,
+            "events": 0,
+            "resyncs": 0,
+        }
+
+    def add_topic(self, name: str, load: TopicLoader, interval: float, diff: TopicDiff = diff_fields) -> None:
+        self.topics[name] = LiveTopic(name, load, interval, diff)
+
+    async def subscribe(
+        self,
+        topics: Sequence[str],
+        user_token: Optional[str] = None,
+        scope: Hashable = "shared",
+        snapshots: bool = True,
+        heartbeat: float = 15.0,
+        max_duration: Optional[float] = None,
+    ) -> AsyncIterator[Optional[LiveEvent]]:
+        """Yield events for ``topics``, and None every ``heartbeat`` idle seconds.
+
+        Ends when the consumer stops or after ``max_duration`` seconds. Raises ValueError
+        for an unknown topic.
+        """
+        unknown = [name for name in topics if name not in self.topics]
+        if unknown:
+            raise ValueError(f"Unknown live topics: {', '.join(unknown)}")
+        topics = list(dict.fromkeys(topics))
+        subscriber = _Subscriber(user_token, snapshots, max(self.queue_size, len(topics)))
+        channels = [self._join((name, scope), subscriber) for name in topics]
+        self._stats["subscriptions"] += 1
+        deadline = time.monotonic() + max_duration if max_duration else None
+        try:
+            while True:
+                timeout = heartbeat
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    timeout = min(heartbeat, remaining)
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            for channel in channels:
+                self._leave(channel, subscriber)
+
+    def _join(self, key: Tuple[str, Hashable], subscriber: _Subscriber) -> _Channel:
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(key, self.topics[key[0]])
+        channel.subscribers[subscriber] = None
+        subscriber.channels.append(channel)
+        if channel.loaded and subscriber.snapshots:
+            self._send(subscriber, (channel.topic.name, "snapshot", channel.value))
+        if channel.task is None:
+            channel.task = asyncio.ensure_future(self._poll(channel))
+        return channel
+
+    def _leave(self, channel: _Channel, subscriber: _Subscriber) -> None:
+        channel.subscribers.pop(subscriber, None)
+        if not channel.subscribers:
+            # Nobody is watching: stop polling and forget the value, it would only go stale
+            if channel.task is not None:
+                channel.task.cancel()
+            if self._channels.get(channel.key) is channel:
+                del self._channels[channel.key]
+
+    async def _poll(self, channel: _Channel) -> None:
+        topic = channel.topic
+        while channel.subscribers:
+            started = time.monotonic()
+            # The newest subscriber's token is the least likely to have expired
+            user_token = next(reversed(channel.subscribers)).user_token
+            try:
+                value = await topic.load(user_token)
+                self._stats["polls"] += 1
+                if not channel.loaded:
+                    channel.value, channel.loaded = value, True
+                    self._publish(channel, "snapshot", value, snapshots_only=True)
+                else:
+                    change = topic.diff(channel.value, value)
+                    channel.value = value
+                    if change is not None:
+                        self._publish(channel, "diff", change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Subscribers keep the last value; the next poll retries
+                self._stats["poll_errors"] += 1
+                logger.error("Live topic %s poll failed: %s", topic.name, e, extra={"topic": topic.name})
+            await asyncio.sleep(max(0.0, topic.interval - (time.monotonic() - started)))
+
+    def _publish(self, channel: _Channel, event: str, data: Any, snapshots_only: bool = False) -> None:
+        for subscriber in list(channel.subscribers):
+            if snapshots_only and not subscriber.snapshots:
+                continue
+            self._send(subscriber, (channel.topic.name, event, data))
+
+    def _send(self, subscriber: _Subscriber, event: LiveEvent) -> None:
+        try:
+            subscriber.queue.put_nowait(event)
+            self._stats["events"] += 1
+            return
+        except asyncio.QueueFull:
+            pass
+        # Too far behind to catch up diff by diff; replace the backlog with the current state
+        # of every topic it follows (the queue holds at least one event per topic)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        self._stats["resyncs"] += 1
+        for channel in subscriber.channels:
+            if not subscriber.snapshots:
+                subscriber.queue.put_nowait((channel.topic.name, "reset", None))
+            elif channel.loaded:
+                subscriber.queue.put_nowait((channel.topic.name, "snapshot", channel.value))
+
+    async def close(self) -> None:
+        tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._channels.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = {name: 0 for name in self.topics}
+        for (name, _), channel in self._channels.items():
+            subscribers[name] += len(channel.subscribers)
+        return {
+            **self._stats,
+            "pollers": len(self._channels),
+            "subscribers": subscribers,
+        }
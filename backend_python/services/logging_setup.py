@@ -0,0 +1,108 @@
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Set per request by the request middleware and read by every log record emitted under it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+debug_sampled_var: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+# Attributes every LogRecord has; anything else was passed through ``extra=`` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request id and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and drop debug lines of unsampled requests"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return record.levelno > logging.DEBUG or debug_sampled_var.get()
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread; the caller only pays for building the message"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render arguments and tracebacks now, while they still describe the calling context
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def sample_request_debug() -> bool:
+    """Decide whether this request's debug lines are kept (LOG_DEBUG_SAMPLE_RATE, 0..1)"""
+    rate = _debug_sample_rate
+    return rate >= 1.0 or random.random() < rate
+
+
+_debug_sample_rate = 1.0
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Route all logging through a queue to a JSON stdout writer thread.
+
+    ``level`` defaults to LOG_LEVEL (INFO). Safe to call more than once; later calls
+    only change the level and sample rate.
+    """
+    global _listener, _debug_sample_rate
+    level_name = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    _debug_sample_rate = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level_name, logging.INFO))
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
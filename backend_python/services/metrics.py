@@ -0,0 +1,116 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+BYTE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed label set"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Lines in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(series):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of histograms rendered together at /api/metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        if name in self._metrics:
+            raise ValueError(f"Metric '{name}' is already registered")
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes",
+    "Serialized response body size by route template",
+    ("method", "route"),
+    BYTE_BUCKETS,
+)
+QUERY_DURATION = REGISTRY.histogram(
+    "databricks_query_duration_seconds",
+    "Warehouse query latency (execute, fetch and convert) by named query",
+    ("query", "outcome"),
+)
+QUERY_ROWS = REGISTRY.histogram(
+    "databricks_query_rows",
+    "Rows returned by named query",
+    ("query",),
+    ROW_BUCKETS,
+)
+CONNECTION_ACQUIRE = REGISTRY.histogram(
+    "databricks_connection_acquire_seconds",
+    "Time to check out a pooled connection (including opening a new one)",
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "databricks_queue_wait_seconds",
+    "Time a query waited for a pending slot and an executor thread",
+)
@@ -1,5 +1,9 @@
+import sqlite3
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from .trend_aggregator import to_utc_datetime
 
 # Mock Customers Data
 MOCK_CUSTOMERS = [
@@ -215,3 +219,223 @@ MOCK_NEXT_ACTIONS = {
     },
 }
 
+
+
+def _event_key(event: Dict[str, Any]) -> tuple:
+    # Same (event_time, event_type, event_id) order as the journey queries
+    return (event.get("event_time") or "", event["event_type"], str(event["event_id"]))
+
+
+class MockDataStore:
+    """Indexed in-memory data served in mock mode.
+
+    Customers are kept sorted by id, with a hash index by id and sorted id arrays per
+    status, category and status/category pair, so filtered keyset pages are a bisect
+    and a slice. Each customer's journey is a pre-sorted array searched by cursor.
+    Dashboard stats and trends are computed once, unless given explicitly.
+    """
+
+    def __init__(
+        self,
+        customers: List[Dict[str, Any]],
+        journeys: Dict[str, List[Dict[str, Any]]],
+        visits: List[Dict[str, Any]],
+        next_actions: Dict[str, Dict[str, Any]],
+        summaries: Optional[Dict[str, Dict[str, Any]]] = None,
+        stats: Optional[Dict[str, int]] = None,
+        hourly_trends: Optional[List[Dict[str, Any]]] = None,
+        daily_trends: Optional[List[Dict[str, Any]]] = None,
+    ):
+        customers = sorted(customers, key=lambda c: c["customer_id"])
+        self._by_id = {c["customer_id"]: c for c in customers}
+        # (status, main_category) -> (sorted ids, customers); None matches any value
+        self._indexes: Dict[tuple, tuple] = {}
+        for customer in customers:
+            status, category = customer["status"], customer.get("main_category")
+            for key in ((None, None), (status, None), (None, category), (status, category)):
+                ids, rows = self._indexes.setdefault(key, ([], []))
+                ids.append(customer["customer_id"])
+                rows.append(customer)
+        self._journeys: Dict[str, tuple] = {}
+        for customer_id, events in journeys.items():
+            keyed = sorted(((_event_key(e), e) for e in events), key=lambda k: k[0])
+            self._journeys[customer_id] = ([k for k, _ in keyed], [e for _, e in keyed])
+        self._call_times = sorted(
+            to_utc_datetime(key[0])
+            for keys, events in self._journeys.values()
+            for key, event in zip(keys, events)
+            if event["event_type"] == "call" and key[0]
+        )
+        self.visits = sorted(visits, key=lambda v: v["visit_date"])
+        self._next_actions = next_actions
+        self._summaries = summaries
+        self.stats = stats or self._compute_stats()
+        self.hourly_trends, self.daily_trends = (
+            (hourly_trends, daily_trends) if hourly_trends is not None else self._compute_trends()
+        )
+
+    def customer(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(customer_id)
+
+    def summary(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        if self._summaries is not None:
+            return self._summaries.get(customer_id)
+        customer = self._by_id.get(customer_id)
+        if customer is None:
+            return None
+        return {
+            "summary_text": customer.get("ai_summary", ""),
+            "generated_at": datetime.now().isoformat(),
+            "model_version": "v1.0",
+        }
+
+    def next_action(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        return self._next_actions.get(customer_id)
+
+    def customers(
+        self,
+        status: Optional[str] = None,
+        main_category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Customers matching the filters with ids after ``cursor``, in id order"""
+        ids, rows = self._indexes.get((status or None, main_category or None), ([], []))
+        start = bisect_right(ids, cursor) if cursor else 0
+        return rows[start:start + limit] if limit is not None else rows[start:]
+
+    def journey(
+        self,
+        customer_id: str,
+        event_types: Optional[Set[str]] = None,
+        cursor: Optional[tuple] = None,
+        direction: str = "before",
+    ) -> Iterator[tuple]:
+        """(key, event_type, event) before (newest first) or after (oldest first) ``cursor``"""
+        keys, events = self._journeys.get(customer_id, ([], []))
+        if direction == "before":
+            end = bisect_left(keys, cursor) if cursor is not None else len(keys)
+            indexes = range(end - 1, -1, -1)
+        else:
+            indexes = range(bisect_right(keys, cursor) if cursor is not None else 0, len(keys))
+        for i in indexes:
+            event = events[i]
+            if event_types is None or event["event_type"] in event_types:
+                yield keys[i], event["event_type"], event
+
+    def call_times(self, start: datetime, end: datetime) -> List[datetime]:
+        """Times of the calls in [start, end), oldest first"""
+        return self._call_times[bisect_left(self._call_times, start):bisect_left(self._call_times, end)]
+
+    def _compute_stats(self) -> Dict[str, int]:
+        open_calls = sum(
+            1
+            for _, events in self._journeys.values()
+            for e in events
+            if e["event_type"] == "call" and e.get("status") == "open"
+        )
+        return {
+            "open_calls": open_calls,
+            **{
+                f"{status}_customers": len(self._indexes.get((status, None), ([], []))[0])
+                for status in ("low", "normal", "urgent")
+            },
+        }
+
+    def _compute_trends(self) -> tuple:
+        now = datetime.now()
+        hour_counts: Dict[int, int] = {}
+        day_counts: Dict[str, int] = {}
+        recent, window = (now - timedelta(hours=24)).isoformat(), (now - timedelta(days=30)).isoformat()
+        for keys, events in self._journeys.values():
+            for key, event in zip(keys, events):
+                if event["event_type"] != "call" or key[0] < window:
+                    continue
+                day_counts[key[0][:10]] = day_counts.get(key[0][:10], 0) + 1
+                if key[0] >= recent:
+                    hour = int(key[0][11:13])
+                    hour_counts[hour] = hour_counts.get(hour, 0) + 1
+        hourly = [{"hour": hour, "call_count": hour_counts.get(hour, 0)} for hour in range(24)]
+        daily = [{"date": day, "call_count": day_counts[day]} for day in sorted(day_counts)]
+        return hourly, daily
+
+    @classmethod
+    def from_sqlite(
+        cls,
+        path: str,
+        journey_sources: List[Dict[str, Any]],
+        event_builders: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]],
+        visit_builder: Callable[[Dict[str, Any]], Dict[str, Any]],
+        visits_sql: str,
+    ) -> "MockDataStore":
+        """Load a dataset written by services.synthetic_data (or any database with the app schema).
+
+        Journey rows are projected like the journey queries and built into events with
+        ``event_builders``; ``visits_sql`` selects the map's visits for ``visit_builder``.
+        """
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            summaries = {
+                row["customer_id"]: {
+                    "summary_text": row["summary_text"],
+                    "generated_at": row["generated_at"],
+                    "model_version": row["model_version"],
+                }
+                for row in connection.execute("SELECT customer_id, summary_text, generated_at, model_version FROM customer_summaries")
+            }
+            customers = [
+                {
+                    "customer_id": row["customer_id"],
+                    "name": row["name"],
+                    "email": row["email"],
+                    "phone": row["phone"],
+                    "status": row["status"],
+                    "main_category": row["main_category"],
+                    "ai_summary": summaries.get(row["customer_id"], {}).get("summary_text", ""),
+                    "updated_at": row["updated_at"],
+                }
+                for row in connection.execute("SELECT * FROM customers")
+            ]
+            journeys: Dict[str, List[Dict[str, Any]]] = {}
+            for source in journey_sources:
+                columns = "".join(f", {column} as {alias}" for alias, column in source["columns"].items())
+                build = event_builders[source["event_type"]]
+                for row in connection.execute(
+                    f"SELECT customer_id, {source['id_column']} as event_id, {source['time_column']} as event_time{columns} "
+                    f"FROM {source['table']}"
+                ):
+                    journeys.setdefault(row["customer_id"], []).append(build(dict(row)))
+            next_actions: Dict[str, Dict[str, Any]] = {}
+            for row in connection.execute(
+                """
+                SELECT * FROM next_best_actions
+                WHERE status IN ('pending', 'in_progress')
+                ORDER BY customer_id,
+                    CASE priority WHEN 'high' THEN 1 WHEN 'medium' THEN 2 WHEN 'low' THEN 3 END,
+                    recommended_date
+                """
+            ):
+                next_actions.setdefault(row["customer_id"], {
+                    "action_type": row["action_type"],
+                    "action_description": row["action_description"],
+                    "priority": row["priority"],
+                    "recommended_date": row["recommended_date"],
+                    "status": row["status"],
+                })
+            visits = [visit_builder(dict(row)) for row in connection.execute(visits_sql)]
+        finally:
+            connection.close()
+        return cls(customers, journeys, visits, next_actions, summaries=summaries)
+
+
+# Store over the sample data above; the stats and trends keep their fixed demo values
+MOCK_STORE = MockDataStore(
+    MOCK_CUSTOMERS,
+    MOCK_JOURNEY,
+    MOCK_VISITS,
+    MOCK_NEXT_ACTIONS,
+    stats=MOCK_STATS,
+    hourly_trends=MOCK_HOURLY_TRENDS,
+    daily_trends=MOCK_DAILY_TRENDS,
+)
@@ -0,0 +1,97 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    """Wall-clock sampling profiler for one request.
+
+    A background thread snapshots ``sys._current_frames()`` every ``interval`` seconds
+    and counts the stacks of the threads working on the request: the event loop thread
+    that started it plus executor threads while they run its queries. The event loop is
+    shared, so stacks of other requests in flight at the same time can show up too.
+    Results are written in the collapsed-stack format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 30.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: Counter = Counter()
+        self._threads: Set[int] = {threading.get_ident()}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    @contextmanager
+    def track_current_thread(self):
+        """Include the calling thread in the profile while the block runs"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.add(ident)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.discard(ident)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, directory: str, name: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.collapsed")
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+        return path
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            if time.monotonic() > deadline:
+                logger.warning("Request profile stopped after %ss", self.max_seconds)
+                return
+            with self._lock:
+                threads = set(self._threads)
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None or ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+
+
+# The profile of the current request, if it asked for one
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+@contextmanager
+def profile_thread():
+    """Add the calling (executor) thread to the current request's profile, if any"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.track_current_thread():
+        yield
@@ -0,0 +1,251 @@
+from typing import Dict, Optional
+
+
+class NamedQuery:
+    """A registered SQL statement with ``:name`` parameter markers and its execution limits.
+
+    ``timeout`` cancels the statement after that many seconds, ``cache_ttl`` is the default
+    TTL when results loaded by it are cached and ``max_rows`` caps the rows fetched (extra
+    rows are dropped with a warning; streaming is not capped). Queries assembled at runtime
+    (optional filters, keyset predicates) register without SQL and run through
+    ``with_sql``, so timing and limits stay attached to the registered name.
+    """
+
+    __slots__ = ("name", "sql", "timeout", "cache_ttl", "max_rows")
+
+    def __init__(
+        self,
+        name: str,
+        sql: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cache_ttl: Optional[float] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.name = name
+        self.sql = sql
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_rows = max_rows
+
+    def with_sql(self, sql: str) -> "NamedQuery":
+        """A variant of this query with runtime-built SQL and the same name and limits"""
+        return NamedQuery(self.name, sql, self.timeout, self.cache_ttl, self.max_rows)
+
+    def __repr__(self) -> str:
+        return f"NamedQuery({self.name!r})"
+
+
+QUERIES: Dict[str, NamedQuery] = {}
+
+
+def register(name: str, sql: Optional[str] = None, **limits) -> NamedQuery:
+    """Add a query to the registry; names must be unique"""
+    if name in QUERIES:
+        raise ValueError(f"Query '{name}' is already registered")
+    query = NamedQuery(name, sql, **limits)
+    QUERIES[name] = query
+    return query
+
+
+# Customers
+
+# Built by DatabricksService._customers_query (optional filters and keyset predicate)
+CUSTOMERS_PAGE = register("customers_page", timeout=60, max_rows=1001)
+
+CUSTOMER_DETAIL = register(
+    "customer_detail",
+    """
+        SELECT
+            c.customer_id,
+            c.name,
+            c.email,
+            c.phone,
+            c.status,
+            c.main_category,
+            c.updated_at,
+            COALESCE(cs.summary_text, '') as ai_summary,
+            cs.generated_at as summary_generated_at,
+            cs.model_version as summary_model_version,
+            cs.customer_id IS NOT NULL as has_summary
+        FROM customers c
+        LEFT JOIN customer_summaries cs ON c.customer_id = cs.customer_id
+        WHERE c.customer_id = :customer_id
+        """,
+    timeout=30,
+    max_rows=1,
+)
+
+CUSTOMER_SUMMARY = register(
+    "customer_summary",
+    """
+        SELECT
+            summary_text,
+            generated_at,
+            model_version
+        FROM customer_summaries
+        WHERE customer_id = :customer_id
+        """,
+    timeout=30,
+    max_rows=1,
+)
+
+NEXT_BEST_ACTION = register(
+    "next_best_action",
+    """
+        SELECT
+            action_type,
+            action_description,
+            priority,
+            recommended_date,
+            status
+        FROM next_best_actions
+        WHERE customer_id = :customer_id
+          AND status IN ('pending', 'in_progress')
+        ORDER BY
+            CASE priority
+                WHEN 'high' THEN 1
+                WHEN 'medium' THEN 2
+                WHEN 'low' THEN 3
+            END,
+            recommended_date
+        LIMIT 1
+        """,
+    timeout=30,
+    max_rows=1,
+)
+
+# Journey
+
+# Built by _journey_source_query / _journey_union_query (per-source projection and cursor)
+JOURNEY_SOURCE = register("journey_source", timeout=60, max_rows=50000)
+JOURNEY_UNION = register("journey_union", timeout=60, max_rows=50000)
+
+# Dashboard
+
+# One scan of customer_calls produces the open count and both trend series;
+# open calls older than the 30-day window are included so open_calls stays exact.
+# :hourly_start and :window_start come from trend_window_starts, as in the aggregator
+DASHBOARD_SUMMARY = register(
+    "dashboard_summary",
+    """
+        SELECT
+            DATE(call_timestamp) as date,
+            HOUR(call_timestamp) as hour,
+            SUM(CASE WHEN resolution_status = 'open' THEN 1 ELSE 0 END) as open_calls,
+            SUM(CASE WHEN call_timestamp >= :hourly_start THEN 1 ELSE 0 END) as recent_calls,
+            SUM(CASE WHEN call_timestamp >= :window_start THEN 1 ELSE 0 END) as window_calls
+        FROM customer_calls
+        WHERE call_timestamp >= :window_start
+           OR resolution_status = 'open'
+        GROUP BY DATE(call_timestamp), HOUR(call_timestamp)
+        """,
+    timeout=120,
+    cache_ttl=30,
+    max_rows=1000000,
+)
+
+# Open calls only, when the trends come from the incremental aggregator
+DASHBOARD_STATS = register(
+    "dashboard_stats",
+    """
+        SELECT COUNT(*) as open_calls
+        FROM customer_calls
+        WHERE resolution_status = 'open'
+        """,
+    timeout=60,
+    cache_ttl=30,
+    max_rows=1,
+)
+
+# Customers by status for the dashboard counters
+CUSTOMER_STATUS_COUNTS = register(
+    "customer_status_counts",
+    """
+        SELECT
+            status,
+            COUNT(*) as count
+        FROM customers
+        GROUP BY status
+        """,
+    timeout=60,
+    max_rows=100,
+)
+
+# Hourly call counts from :since onwards, for the incremental trend aggregator
+CALL_BUCKETS = register(
+    "call_buckets",
+    """
+        SELECT
+            DATE_TRUNC('HOUR', call_timestamp) as bucket,
+            COUNT(*) as call_count,
+            MAX(call_timestamp) as max_timestamp
+        FROM customer_calls
+        WHERE call_timestamp >= :since
+        GROUP BY DATE_TRUNC('HOUR', call_timestamp)
+        """,
+    timeout=120,
+    max_rows=1000,
+)
+
+# Built by trend_rollups.rollup_query (rollup table and bucket unit)
+CALL_TRENDS = register("call_trends", timeout=30, max_rows=100000)
+
+# Technicians
+
+# Active visits; {filters} is empty or further "AND ..." predicates on v
+TECHNICIAN_VISITS_TEMPLATE = """
+        SELECT
+            v.visit_id,
+            v.customer_id,
+            c.name as customer_name,
+            c.address,
+            v.technician_id,
+            v.technician_name,
+            v.visit_date,
+            v.visit_status,
+            v.visit_purpose,
+            v.latitude,
+            v.longitude,
+            v.estimated_duration
+        FROM technician_visits v
+        JOIN customers c ON v.customer_id = c.customer_id
+        WHERE v.visit_status IN ('planned', 'underway'){filters}
+        ORDER BY v.visit_date
+        """
+
+TECHNICIAN_VISITS = register(
+    "technician_visits",
+    TECHNICIAN_VISITS_TEMPLATE.format(filters=""),
+    timeout=60,
+    max_rows=50000,
+)
+
+# Built by DatabricksService._technician_visits_query (bounding box, time window, technicians)
+TECHNICIAN_VISITS_FILTERED = register("technician_visits_filtered", timeout=60, max_rows=50000)
+
+# Active visits aggregated per map cell of :cell_degrees (used when the visit index is off)
+TECHNICIAN_VISIT_CLUSTERS = register(
+    "technician_visit_clusters",
+    """
+        SELECT
+            FLOOR(v.latitude / :cell_degrees) as cell_lat,
+            FLOOR(v.longitude / :cell_degrees) as cell_lon,
+            COUNT(*) as visit_count,
+            AVG(v.latitude) as latitude,
+            AVG(v.longitude) as longitude,
+            SUM(CASE WHEN v.visit_status = 'planned' THEN 1 ELSE 0 END) as planned,
+            SUM(CASE WHEN v.visit_status = 'underway' THEN 1 ELSE 0 END) as underway,
+            MIN(v.latitude) as min_lat,
+            MIN(v.longitude) as min_lon,
+            MAX(v.latitude) as max_lat,
+            MAX(v.longitude) as max_lon
+        FROM technician_visits v
+        WHERE v.visit_status IN ('planned', 'underway')
+          AND v.latitude IS NOT NULL
+          AND v.longitude IS NOT NULL
+        GROUP BY FLOOR(v.latitude / :cell_degrees), FLOOR(v.longitude / :cell_degrees)
+        """,
+    timeout=60,
+    cache_ttl=30,
+    max_rows=50000,
+)
@@ -0,0 +1,92 @@
+import logging
+import os
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBackend:
+    """Opens the DB-API connections DatabricksService runs its named queries on.
+
+    Connections are pooled per ``pool_key``. Their cursors must support
+    ``execute(sql, parameters=...)`` with ``:name`` markers, ``description``,
+    ``fetchall``/``fetchmany`` and ``cancel``, and can be used as context managers;
+    ``fetchall_arrow``/``fetchmany_arrow`` are used when present.
+    """
+
+    name = "base"
+
+    def pool_key(self, user_token: Optional[str]) -> Optional[str]:
+        """Key the caller's connections are pooled under, or None if it cannot query"""
+        return user_token
+
+    def connect(self, key: str) -> Any:
+        """Open a new connection for ``key`` (returns None on failure)"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class DatabricksBackend(QueryBackend):
+    """Databricks SQL warehouse, queried with each user's forwarded access token"""
+
+    name = "databricks"
+
+    def __init__(
+        self,
+        server_hostname: Optional[str],
+        http_path: Optional[str],
+        catalog: Optional[str] = None,
+        schema: Optional[str] = None,
+    ):
+        self.server_hostname = server_hostname
+        self.http_path = http_path
+        self.catalog = catalog
+        self.schema = schema
+
+    @classmethod
+    def from_env(cls, server_hostname: Optional[str]) -> "DatabricksBackend":
+        return cls(
+            server_hostname,
+            os.getenv("DATABRICKS_HTTP_PATH"),
+            os.getenv("DATABRICKS_CATALOG"),
+            os.getenv("DATABRICKS_SCHEMA"),
+        )
+
+    def pool_key(self, user_token: Optional[str]) -> Optional[str]:
+        # Connections are per-user due to user tokens
+        if not user_token or not self.server_hostname or not self.http_path:
+            return None
+        return user_token
+
+    def connect(self, user_token: str) -> Any:
+        """Initialize Databricks SQL connection (synchronous, run in thread pool)"""
+        try:
+            from databricks import sql
+
+            # Create connection with userToken from x-forwarded-access-token header
+            connection_params = {
+                "server_hostname": self.server_hostname,
+                "http_path": self.http_path,
+                "access_token": user_token,  # Token from x-forwarded-access-token header
+            }
+            # Add catalog and schema if provided
+            if self.catalog:
+                connection_params["catalog"] = self.catalog
+            if self.schema:
+                connection_params["schema"] = self.schema
+
+            return sql.connect(**connection_params)
+        except Exception as e:
+            logger.exception(
+                "Failed to initialize Databricks connection: %s", e,
+                extra={
+                    "server_hostname": self.server_hostname,
+                    "http_path": self.http_path,
+                    "has_token": bool(user_token),
+                    "catalog": self.catalog,
+                    "schema": self.schema,
+                },
+            )
+            return None
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "fresh_until", "stale_until", "refreshing")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+class ResultCache:
+    """In-process async result cache with TTLs, stale-while-revalidate and LRU eviction.
+
+    A value is served as-is for ``ttl`` seconds. For a further ``stale_ttl`` seconds it
+    is still served immediately, but the first such read schedules a background reload.
+    After that the entry is expired and the next read waits for the loader.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "evictions": 0,
+        }
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0,
+    ) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` when it is missing or expired"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self._stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    task = asyncio.ensure_future(self._refresh(key, entry, loader, ttl, stale_ttl))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                return entry.value
+
+        self._stats["misses"] += 1
+        value = await loader()
+        self._store(key, value, ttl, stale_ttl)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current entry count"""
+        return {**self._stats, "entries": len(self._entries)}
+
+    async def _refresh(self, key: Hashable, entry: _CacheEntry, loader, ttl: float, stale_ttl: float) -> None:
+        try:
+            value = await loader()
+        except Exception as e:
+            # Keep serving the stale value until it expires
+            self._stats["refresh_errors"] += 1
+            entry.refreshing = False
+            logger.error("Background cache refresh failed for %s: %s", key, e)
+            return
+        self._stats["refreshes"] += 1
+        self._store(key, value, ttl, stale_ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: float, stale_ttl: float) -> None:
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
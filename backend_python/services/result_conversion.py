@@ -0,0 +1,86 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow ships with databricks-sql-connector
+    pa = None
+    pc = None
+
+ARROW_AVAILABLE = pa is not None
+
+# Columns always returned as floats (the map needs numbers, not Decimals), by both paths
+FLOAT_COLUMNS = ("latitude", "longitude")
+
+
+def convert_rows(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Convert fetched row tuples to dicts, cell by cell"""
+    results = []
+    for row in rows:
+        row_dict = {}
+        for i, col in enumerate(columns):
+            value = row[i]
+            # Convert datetime objects to ISO format strings
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif col in FLOAT_COLUMNS and isinstance(value, (int, float, Decimal)):
+                value = float(value)
+            row_dict[col] = value
+        results.append(row_dict)
+    return results
+
+
+def convert_arrow_table(table) -> List[Dict[str, Any]]:
+    """Convert an Arrow table to dicts, converting types one column at a time.
+
+    Serializes the same as convert_rows: timestamps of any unit become ISO 8601
+    strings matching datetime.isoformat() (nanoseconds are truncated to
+    microseconds), dates become YYYY-MM-DD strings and coordinate columns become
+    floats.
+    """
+    names = table.column_names
+    columns = [_column_values(_convert_arrow_column(name, column)) for name, column in zip(names, table.columns)]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _convert_arrow_column(name: str, column):
+    column_type = column.type
+    if pa.types.is_timestamp(column_type):
+        return _timestamps_to_iso(column)
+    if pa.types.is_date(column_type):
+        return column.cast(pa.string())
+    if name in FLOAT_COLUMNS and (pa.types.is_integer(column_type) or pa.types.is_decimal(column_type)):
+        return column.cast(pa.float64())
+    return column
+
+
+def _column_values(column) -> list:
+    """Materialize a column as Python values"""
+    column_type = column.type
+    # NumPy's tolist() is much faster than to_pylist(), but only lossless without nulls
+    # (nullable ints would become NaN floats) and for plain numeric/string types
+    if column.null_count == 0 and (
+        pa.types.is_integer(column_type)
+        or pa.types.is_floating(column_type)
+        or pa.types.is_boolean(column_type)
+        or pa.types.is_string(column_type)
+    ):
+        return column.to_numpy(zero_copy_only=False).tolist()
+    return column.to_pylist()
+
+
+def _timestamps_to_iso(column):
+    """Format a timestamp column like datetime.isoformat(), without per-value Python calls"""
+    if column.type.unit != "us":
+        # Python datetimes hold microseconds: widen s/ms fractions and truncate ns ones the same way
+        column = column.cast(pa.timestamp("us", tz=column.type.tz), safe=False)
+    # Arrow's cast gives "YYYY-MM-DD HH:MM:SS.ffffff[Z|+HHMM]"; isoformat() uses a "T",
+    # writes offsets as +HH:MM and omits the fraction when it is zero
+    text = column.cast(pa.string())
+    text = pc.replace_substring(text, pattern=" ", replacement="T", max_replacements=1)
+    if column.type.tz is not None:
+        text = pc.replace_substring(text, pattern="Z", replacement="+00:00")
+        text = pc.replace_substring_regex(text, pattern=r"([+-]\d{2})(\d{2})$", replacement=r"\1:\2")
+    return pc.replace_substring_regex(text, pattern=r"\.000000((?:[+-]\d{2}:\d{2})?)$", replacement=r"\1")
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same task instead of starting their own. Each waiter is
+    shielded, so a cancelled request does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark a failure as retrieved: every caller that awaited it got it re-raised, and
+            # with none left (all cancelled) asyncio would log "exception was never retrieved"
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return call counters, including how many calls were coalesced"""
+        return {**self._stats, "in_flight": len(self._in_flight)}
@@ -0,0 +1,344 @@
+"""Seeded synthetic data for the journey schema, at any scale.
+
+Generates every table of sql/schemas.sql (customers, their calls, installations,
+technician visits, website visits, digital interactions, summaries and next best
+actions) with realistic skew: journey sizes follow a Pareto distribution, so a few
+customers have very large journeys, events cluster towards the present and customers
+concentrate in a few cities. Rows are produced one customer at a time and written in
+batches, so millions of events never sit in memory at once. Run from backend_python:
+
+    python -m services.synthetic_data --customers 10000 --events 1000000 --format sqlite --output journey.db
+    python -m services.synthetic_data --customers 10000 --events 1000000 --format parquet --output data/
+
+SQLite output can be served directly with QUERY_BACKEND=embedded EMBEDDED_DB_PATH=journey.db.
+CSV and Parquet output (one file per table) is for bulk loading, e.g. with COPY INTO.
+"""
+import argparse
+import csv
+import logging
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .embedded_backend import SQL_DIR, EmbeddedBackend, translate_sql
+from .result_conversion import ARROW_AVAILABLE
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+Rows = List[tuple]
+
+# Share of events per journey source
+EVENT_MIX = {
+    "customer_calls": 0.30,
+    "website_visits": 0.30,
+    "digital_interactions": 0.25,
+    "technician_visits": 0.10,
+    "installations": 0.05,
+}
+
+# (city, latitude, longitude, weight)
+CITIES = [
+    ("New York", 40.7128, -74.0060, 30),
+    ("Los Angeles", 34.0522, -118.2437, 20),
+    ("Chicago", 41.8781, -87.6298, 12),
+    ("Houston", 29.7604, -95.3698, 10),
+    ("Phoenix", 33.4484, -112.0740, 7),
+    ("Philadelphia", 39.9526, -75.1652, 6),
+    ("San Antonio", 29.4241, -98.4936, 4),
+    ("San Diego", 32.7157, -117.1611, 4),
+    ("Dallas", 32.7767, -96.7970, 4),
+    ("Seattle", 47.6062, -122.3321, 3),
+]
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emily", "David", "Maria", "James", "Linda", "Ahmed", "Yuki", "Noa", "Carlos"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Davis", "Wilson", "Garcia", "Cohen", "Tanaka", "Levi", "Martinez", "Khan"]
+CATEGORIES = ["refrigerator", "washing machine", "oven", "dishwasher", "dryer", "air conditioner"]
+PRODUCTS = {
+    "refrigerator": "Smart Refrigerator",
+    "washing machine": "Front Load Washer",
+    "oven": "Gas Range",
+    "dishwasher": "Quiet Dishwasher",
+    "dryer": "Heat Pump Dryer",
+    "air conditioner": "Split Air Conditioner",
+}
+TECHNICIANS = [(f"TECH{i:03d}", f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i * 7) % len(LAST_NAMES)]}") for i in range(1, 61)]
+ISSUES = ["not cooling", "leaking", "making noise", "not heating properly", "won't start", "error code on display"]
+PAGES = ["/products", "/support/troubleshooting", "/support/contact", "/support/repairs", "/offers", "/account"]
+CHANNELS = ["WhatsApp", "Email", "Facebook"]
+
+
+def table_columns(schema_file: Path = SQL_DIR / "schemas.sql") -> Dict[str, List[Tuple[str, str]]]:
+    """(column, type) pairs per table, in declaration order, from the CREATE TABLE statements"""
+    tables = {}
+    for name, body in re.findall(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\) USING DELTA;", schema_file.read_text(), re.DOTALL):
+        columns = []
+        for line in body.splitlines():
+            parts = line.split("--")[0].strip().rstrip(",").split()
+            if len(parts) >= 2 and parts[0].upper() not in ("FOREIGN", "PRIMARY"):
+                columns.append((parts[0], parts[1].upper()))
+        tables[name] = columns
+    return tables
+
+
+class SyntheticDataGenerator:
+    """Rows for every journey table, reproducible for a given seed and ``now``.
+
+    ``events`` is the approximate total across the five journey sources; customer
+    journey sizes are drawn from a Pareto distribution with shape ``skew`` (smaller is
+    more skewed) and events fall in the last ``days`` days, denser towards ``now``.
+    """
+
+    def __init__(
+        self,
+        customers: int = 1000,
+        events: int = 50000,
+        seed: int = 42,
+        skew: float = 1.2,
+        days: int = 365,
+        now: Optional[datetime] = None,
+    ):
+        self.customers = customers
+        self.events = events
+        self.seed = seed
+        self.skew = skew
+        self.days = days
+        self.now = (now or datetime.utcnow()).replace(microsecond=0)
+
+    def _journey_sizes(self, rng: random.Random) -> List[int]:
+        weights = [rng.paretovariate(self.skew) for _ in range(self.customers)]
+        scale = self.events / sum(weights)
+        return [max(1, round(w * scale)) for w in weights]
+
+    def _past(self, rng: random.Random) -> datetime:
+        # Squaring a uniform draw puts most events in the recent past
+        return self.now - timedelta(seconds=int(self.days * 86400 * rng.random() ** 2))
+
+    def generate(self, batch_size: int = 10000) -> Iterator[Tuple[str, Rows]]:
+        """Yield (table, rows) batches; a table's batches come in id order"""
+        rng = random.Random(self.seed)
+        sizes = self._journey_sizes(rng)
+        sources = list(EVENT_MIX)
+        source_weights = list(EVENT_MIX.values())
+        city_weights = [city[3] for city in CITIES]
+        buffers: Dict[str, Rows] = {}
+        counters: Dict[str, int] = {}
+
+        def add(table: str, row: tuple):
+            rows = buffers.setdefault(table, [])
+            rows.append(row)
+            if len(rows) >= batch_size:
+                buffers[table] = []
+                return table, rows
+            return None
+
+        def next_id(table: str, prefix: str) -> str:
+            counters[table] = counters.get(table, 0) + 1
+            return f"{prefix}{counters[table]:09d}"
+
+        for n, size in enumerate(sizes, start=1):
+            customer_id = f"CUST{n:07d}"
+            city, lat, lon, _ = rng.choices(CITIES, city_weights)[0]
+            home = (lat + rng.gauss(0, 0.08), lon + rng.gauss(0, 0.08))
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            category = rng.choice(CATEGORIES)
+            status = rng.choices(("low", "normal", "urgent"), (50, 35, 15))[0]
+            created = self._past(rng)
+            flushed = [add("customers", (
+                customer_id, f"{first} {last}", f"{first.lower()}.{last.lower()}{n}@example.com",
+                f"+1{rng.randrange(10**9, 10**10)}", f"{rng.randint(1, 9999)} Main St", city,
+                status, category, created, self.now,
+            ))]
+
+            counts = dict.fromkeys(sources, 0)
+            for source in rng.choices(sources, source_weights, k=size):
+                counts[source] += 1
+            for _ in range(counts["customer_calls"]):
+                ts = self._past(rng)
+                recent = self.now - ts < timedelta(days=7)
+                flushed.append(add("customer_calls", (
+                    next_id("customer_calls", "CALL"), customer_id, ts, rng.randint(60, 1800),
+                    f"{category.capitalize()} {rng.choice(ISSUES)}", rng.choices(("inbound", "outbound"), (4, 1))[0],
+                    rng.choices(("open", "resolved", "escalated"), (5, 3, 1) if recent else (1, 30, 2))[0],
+                )))
+            for _ in range(counts["installations"]):
+                ts = self._past(rng)
+                technician_id, _ = rng.choice(TECHNICIANS)
+                flushed.append(add("installations", (
+                    next_id("installations", "INST"), customer_id, ts, f"PROD{CATEGORIES.index(category) + 1:03d}",
+                    PRODUCTS[category], technician_id, "completed", "Installation completed",
+                )))
+            for _ in range(counts["technician_visits"]):
+                # Most visits are history; some are underway now or planned for the coming week
+                kind = rng.choices(("completed", "underway", "planned"), (85, 3, 12))[0]
+                if kind == "completed":
+                    ts = self._past(rng)
+                elif kind == "underway":
+                    ts = self.now - timedelta(minutes=rng.randint(0, 120))
+                else:
+                    ts = self.now + timedelta(minutes=rng.randint(30, 7 * 24 * 60))
+                technician_id, technician_name = rng.choice(TECHNICIANS)
+                duration = rng.choice((30, 45, 60, 90, 120))
+                flushed.append(add("technician_visits", (
+                    next_id("technician_visits", "VISIT"), customer_id, technician_id, technician_name, ts, kind,
+                    rng.choice(("repair", "maintenance", "installation", "inspection")),
+                    round(home[0] + rng.gauss(0, 0.002), 6), round(home[1] + rng.gauss(0, 0.002), 6), duration,
+                    duration + rng.randint(-15, 30) if kind == "completed" else None, None,
+                )))
+            for _ in range(counts["website_visits"]):
+                flushed.append(add("website_visits", (
+                    next_id("website_visits", "WEB"), customer_id, self._past(rng), rng.choice(PAGES),
+                    rng.randint(10, 600), rng.choice(("desktop", "mobile", "tablet")),
+                    rng.choice(("google.com", "internal", "facebook.com", "email")),
+                )))
+            for _ in range(counts["digital_interactions"]):
+                kind = rng.choice(("message", "complaint", "inquiry", "review"))
+                flushed.append(add("digital_interactions", (
+                    next_id("digital_interactions", "DIG"), customer_id, self._past(rng), rng.choice(CHANNELS),
+                    f"{kind.capitalize()} about my {category}", kind,
+                    "negative" if kind == "complaint" else rng.choice(("positive", "neutral")), kind != "review",
+                )))
+
+            if rng.random() < 0.8:
+                flushed.append(add("customer_summaries", (
+                    customer_id,
+                    f"{status.capitalize()} priority {category} customer in {city} with {size} recorded interactions.",
+                    self.now, "synthetic-v1",
+                )))
+            for _ in range(rng.choices((0, 1, 2, 3), (40, 35, 15, 10))[0]):
+                flushed.append(add("next_best_actions", (
+                    next_id("next_best_actions", "ACTION"), customer_id,
+                    rng.choice(("call", "visit", "follow_up", "offer")), f"Follow up on {category} service",
+                    rng.choice(("low", "medium", "high")), self.now + timedelta(days=rng.randint(0, 14)),
+                    rng.choices(("pending", "in_progress", "completed"), (6, 2, 2))[0], self.now,
+                )))
+
+            for batch in flushed:
+                if batch is not None:
+                    yield batch
+        for table, rows in buffers.items():
+            if rows:
+                yield table, rows
+
+
+class SQLiteWriter:
+    """Replace the journey tables of an embedded database file and rebuild the rollups"""
+
+    def __init__(self, path: str):
+        self._backend = EmbeddedBackend(path, schema_files=[SQL_DIR / "schemas.sql"])
+        self._connection = self._backend.open_sqlite()
+        self._columns = table_columns()
+        self._connection.execute("BEGIN")
+        for table in self._columns:
+            self._connection.execute(f"DELETE FROM {table}")
+
+    def write(self, table: str, rows: Rows) -> None:
+        placeholders = ", ".join("?" * len(self._columns[table]))
+        self._connection.executemany(
+            f"INSERT INTO {table} VALUES ({placeholders})",
+            [tuple(v.isoformat() if isinstance(v, datetime) else v for v in row) for row in rows],
+        )
+
+    def close(self) -> None:
+        self._connection.execute("COMMIT")
+        self._connection.executescript(translate_sql((SQL_DIR / "rollups.sql").read_text()))
+        self._connection.close()
+        self._backend.close()
+
+
+class CSVWriter:
+    """One <table>.csv per table, with a header row"""
+
+    def __init__(self, directory: str):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._columns = table_columns()
+        self._files: Dict[str, Any] = {}
+
+    def write(self, table: str, rows: Rows) -> None:
+        if table not in self._files:
+            f = open(self._directory / f"{table}.csv", "w", newline="")
+            self._files[table] = (f, csv.writer(f))
+            self._files[table][1].writerow([name for name, _ in self._columns[table]])
+        self._files[table][1].writerows(rows)
+
+    def close(self) -> None:
+        for f, _ in self._files.values():
+            f.close()
+
+
+class ParquetWriter:
+    """One <table>.parquet per table, typed from the schema DDL"""
+
+    ARROW_TYPES = {
+        "STRING": "string", "TIMESTAMP": "timestamp[us]", "INT": "int32", "BIGINT": "int64",
+        "DOUBLE": "float64", "BOOLEAN": "bool",
+    }
+
+    def __init__(self, directory: str):
+        if not ARROW_AVAILABLE:
+            raise RuntimeError("Parquet output needs pyarrow")
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._schemas = {
+            table: pa.schema([(name, pa.type_for_alias(self.ARROW_TYPES[sql_type])) for name, sql_type in columns])
+            for table, columns in table_columns().items()
+        }
+        self._writers: Dict[str, Any] = {}
+
+    def write(self, table: str, rows: Rows) -> None:
+        schema = self._schemas[table]
+        if table not in self._writers:
+            self._writers[table] = pq.ParquetWriter(self._directory / f"{table}.parquet", schema)
+        columns = [[row[i] for row in rows] for i in range(len(schema))]
+        self._writers[table].write_table(pa.table(columns, schema=schema))
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+
+WRITERS = {"sqlite": SQLiteWriter, "csv": CSVWriter, "parquet": ParquetWriter}
+
+
+def write(generator: SyntheticDataGenerator, output_format: str, output: str, batch_size: int = 10000) -> Dict[str, int]:
+    """Generate into ``output`` and return the row count per table"""
+    writer = WRITERS[output_format](output)
+    counts: Dict[str, int] = {}
+    try:
+        for table, rows in generator.generate(batch_size):
+            writer.write(table, rows)
+            counts[table] = counts.get(table, 0) + len(rows)
+    finally:
+        writer.close()
+    return counts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=50000, help="Approximate journey events across all sources")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.2, help="Pareto shape of journey sizes (smaller = more skewed)")
+    parser.add_argument("--days", type=int, default=365, help="History covered by the events")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="sqlite")
+    parser.add_argument("--output", required=True, help="SQLite file, or directory for csv/parquet")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(args.customers, args.events, args.seed, args.skew, args.days)
+    started = time.perf_counter()
+    counts = write(generator, args.format, args.output, args.batch_size)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"{table:<24}{count:>12}")
+    print(f"Wrote {sum(counts.values())} rows to {args.output} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
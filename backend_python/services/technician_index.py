@@ -0,0 +1,126 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .trend_aggregator import to_utc_datetime
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy is optional; nearest() falls back to a vectorized scan
+    cKDTree = None
+
+logger = logging.getLogger(__name__)
+
+KDTREE_AVAILABLE = cKDTree is not None
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km between arrays (or scalars) of points given in degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere; their straight-line distance orders like the great-circle one"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def _float_column(visits: Sequence[Dict[str, Any]], name: str, missing: float) -> np.ndarray:
+    return np.array([missing if v.get(name) is None else float(v[name]) for v in visits], dtype=float)
+
+
+class TechnicianIndex:
+    """Technician positions and workloads computed column-wise from the active visits.
+
+    A technician is placed at their underway visit, or else their earliest planned visit
+    with coordinates. Workload is the visit count, the sum of ``estimated_duration``
+    and the haversine distance travelled between consecutive visits in ``visit_date``
+    order. Built once per load of the active visits; nearest-technician lookups use a
+    KD-tree over the positions when scipy is installed, else a vectorized distance scan.
+    """
+
+    def __init__(self, visits: Sequence[Dict[str, Any]]):
+        visits = [v for v in visits if v.get("technician_id")]
+        ids = np.array([v["technician_id"] for v in visits], dtype=object)
+        self.technician_ids, codes = np.unique(ids, return_inverse=True)
+        count = len(self.technician_ids)
+        self._positions = {technician_id: i for i, technician_id in enumerate(self.technician_ids)}
+        lat = _float_column(visits, "latitude", np.nan)
+        lon = _float_column(visits, "longitude", np.nan)
+        times = np.array(
+            [to_utc_datetime(v["visit_date"]) if v.get("visit_date") else None for v in visits],
+            dtype="datetime64[us]",
+        )
+        located = ~np.isnan(lat) & ~np.isnan(lon)
+        underway = np.array([v.get("visit_status") == "underway" for v in visits], dtype=bool)
+
+        self.visit_counts = np.bincount(codes, minlength=count)
+        self.planned_minutes = np.bincount(codes, weights=_float_column(visits, "estimated_duration", 0.0), minlength=count)
+
+        # Travel between consecutive located visits of the same technician
+        route = np.flatnonzero(located)
+        route = route[np.lexsort((times[route], codes[route]))]
+        legs = haversine_km(lat[route[:-1]], lon[route[:-1]], lat[route[1:]], lon[route[1:]])
+        same = codes[route[:-1]] == codes[route[1:]]
+        self.travel_km = np.bincount(codes[route[1:]][same], weights=legs[same], minlength=count)
+
+        # Position: first of each technician's visits ordered by (located, underway, visit_date)
+        order = np.lexsort((times, ~underway, ~located, codes))
+        first = order[np.unique(codes[order], return_index=True)[1]]
+        self.names = [visits[i].get("technician_name") for i in first]
+        self._position_visits = [visits[i] for i in first]
+        self._located = np.flatnonzero(located[first])
+        self._lat = lat[first][self._located]
+        self._lon = lon[first][self._located]
+        self._tree = cKDTree(_unit_vectors(self._lat, self._lon)) if KDTREE_AVAILABLE and len(self._located) else None
+
+    @property
+    def size(self) -> int:
+        return len(self.technician_ids)
+
+    def _technician(self, i: int) -> Dict[str, Any]:
+        visit = self._position_visits[i]
+        return {
+            "technician_id": self.technician_ids[i],
+            "technician_name": self.names[i],
+            "visit_count": int(self.visit_counts[i]),
+            "planned_minutes": float(self.planned_minutes[i]),
+            "travel_km": round(float(self.travel_km[i]), 3),
+            "latitude": visit.get("latitude"),
+            "longitude": visit.get("longitude"),
+            "location_visit_id": visit.get("visit_id"),
+            "location_status": visit.get("visit_status"),
+        }
+
+    def workloads(self, technician_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Workload of every technician with an active visit (or of ``technician_ids``), by id"""
+        if technician_ids is None:
+            positions = range(self.size)
+        else:
+            positions = sorted({self._positions[t] for t in technician_ids if t in self._positions})
+        return [self._technician(i) for i in positions]
+
+    def nearest(self, lat: float, lon: float, k: int = 5) -> List[Dict[str, Any]]:
+        """The ``k`` technicians positioned closest to (lat, lon), nearest first, with distance_km"""
+        k = min(k, len(self._located))
+        if k <= 0:
+            return []
+        if self._tree is not None:
+            _, found = self._tree.query(_unit_vectors(np.array([lat]), np.array([lon]))[0], k=k)
+            found = np.atleast_1d(found)
+            distances = haversine_km(lat, lon, self._lat[found], self._lon[found])
+        else:
+            all_distances = haversine_km(lat, lon, self._lat, self._lon)
+            found = np.argpartition(all_distances, k - 1)[:k] if k < len(all_distances) else np.arange(k)
+            found = found[np.argsort(all_distances[found], kind="stable")]
+            distances = all_distances[found]
+        return [
+            {**self._technician(int(self._located[i])), "distance_km": round(float(d), 3)}
+            for i, d in zip(found, distances)
+        ]
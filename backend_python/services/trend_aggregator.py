@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Loads (bucket, call_count, max_timestamp) rows for calls at or after the given time
+BucketLoader = Callable[[datetime], Awaitable[List[Dict[str, Any]]]]
+
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def trend_window_starts(now: datetime, window: timedelta) -> Tuple[datetime, datetime]:
+    """Start of the hourly series (the last 24 whole hours, current hour included) and of the
+    daily series (``window`` before ``now``, rounded down to the hour).
+
+    Shared by the aggregator and the DASHBOARD_SUMMARY scan so both count the same calls.
+    """
+    return _hour_floor(now) - timedelta(hours=23), _hour_floor(now - window)
+
+
+def to_utc_datetime(value: Any) -> datetime:
+    """Parse a converted timestamp (ISO string or datetime) as a naive UTC datetime"""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class CallTrendAggregator:
+    """Rolling hourly call counts for the dashboard trends, kept in memory.
+
+    Counts are held per hour bucket for the last ``window_days`` days. Each refresh
+    only asks for calls from the hour containing ``watermark - lag`` onwards (the
+    watermark is the newest call_timestamp seen so far) and overwrites those
+    buckets, so late-arriving rows within ``lag`` are still counted and the cost of
+    a refresh scales with the number of new calls. Hourly and daily trends are
+    derived from the buckets on every read.
+
+    Reads are served from memory; once the data is older than ``refresh_interval``
+    the next read schedules a background refresh. Only the first read waits.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, lag: float = 300.0, window_days: int = 30):
+        self.refresh_interval = refresh_interval
+        self.lag = timedelta(seconds=lag)
+        self.window = timedelta(days=window_days)
+        self.watermark: Optional[datetime] = None
+        self._buckets: Dict[datetime, int] = {}
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._stats = {
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "rows_loaded": 0,
+        }
+
+    async def get_trends(self, load: BucketLoader) -> Dict[str, List[Dict[str, Any]]]:
+        """Return ``hourly_trends`` and ``daily_trends``, loading or refreshing the buckets as needed"""
+        if not self._loaded:
+            await self.refresh(load)
+        elif time.monotonic() - self._refreshed_at >= self.refresh_interval and not self._refresh_tasks:
+            task = asyncio.ensure_future(self._background_refresh(load))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return self.trends()
+
+    async def refresh(self, load: BucketLoader) -> None:
+        """Load calls past the watermark and slide the window forward"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._loaded and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                # Another caller refreshed while we were waiting for the lock
+                return
+            now = self._now()
+            _, window_start = trend_window_starts(now, self.window)
+            if self.watermark is None:
+                since = window_start
+            else:
+                since = max(_hour_floor(self.watermark - self.lag), window_start)
+
+            rows = await load(since)
+
+            # A bucket's count only grows, so buckets missing from the result keep their value
+            for row in rows:
+                self._buckets[to_utc_datetime(row["bucket"])] = row["call_count"]
+                newest = to_utc_datetime(row["max_timestamp"])
+                if self.watermark is None or newest > self.watermark:
+                    self.watermark = newest
+            for bucket in [b for b in self._buckets if b < window_start]:
+                del self._buckets[bucket]
+
+            self._stats["refreshes"] += 1
+            self._stats["rows_loaded"] += len(rows)
+            self._loaded = True
+            self._refreshed_at = time.monotonic()
+
+    def trends(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Build the last-24-hours and last-30-days series from the in-memory buckets"""
+        hourly_start, window_start = trend_window_starts(self._now(), self.window)
+        hour_counts = {hour: 0 for hour in range(24)}
+        for offset in range(24):
+            bucket = hourly_start + timedelta(hours=offset)
+            hour_counts[bucket.hour] += self._buckets.get(bucket, 0)
+
+        day_counts: Dict[str, int] = {}
+        for bucket, count in self._buckets.items():
+            if bucket >= window_start and count:
+                day = bucket.date().isoformat()
+                day_counts[day] = day_counts.get(day, 0) + count
+
+        return {
+            "hourly_trends": [
+                {"hour": hour, "call_count": hour_counts[hour]}
+                for hour in range(24)
+            ],
+            "daily_trends": [
+                {"date": day, "call_count": day_counts[day]}
+                for day in sorted(day_counts)
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return refresh counters, the bucket count and the current watermark"""
+        return {
+            **self._stats,
+            "buckets": len(self._buckets),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    async def _background_refresh(self, load: BucketLoader) -> None:
+        try:
+            await self.refresh(load)
+        except Exception as e:
+            # Keep serving the current buckets; the next read past the interval retries
+            self._stats["refresh_errors"] += 1
+            self._refreshed_at = time.monotonic()
+            logger.error("Background trend refresh failed: %s", e)
+
+    @staticmethod
+    def _now() -> datetime:
+        # Warehouse timestamps are compared in UTC (the SQL warehouse default session time zone)
+        return datetime.now(timezone.utc).replace(tzinfo=None)
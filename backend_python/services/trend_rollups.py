@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+GRANULARITY_STEPS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# Default range ending at the current bucket when the request gives no "from"
+DEFAULT_SPANS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(hours=24),
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=52),
+}
+
+# Rollup tables from sql/rollups.sql, finest first
+TREND_ROLLUPS = [
+    {"granularity": "minute", "table": "call_rollup_minute", "retention": timedelta(days=14)},
+    {"granularity": "hour", "table": "call_rollup_hour", "retention": None},
+    {"granularity": "day", "table": "call_rollup_day", "retention": None},
+    {"granularity": "week", "table": "call_rollup_week", "retention": None},
+]
+
+
+def bucket_floor(value: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing ``value`` (weeks start on Monday, like DATE_TRUNC('WEEK'))"""
+    if granularity == "minute":
+        return value.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def resolve_trend_range(
+    granularity: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    now: datetime,
+    max_points: int,
+) -> Tuple[datetime, datetime]:
+    """Validate a trend request and fill in the default range. Raises ValueError for bad input."""
+    if granularity not in GRANULARITY_STEPS:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITY_STEPS)}")
+    step = GRANULARITY_STEPS[granularity]
+    # Rollups are minute-resolution at best, so the range is too
+    end = bucket_floor(end, "minute") if end else bucket_floor(now, granularity) + step
+    start = bucket_floor(start, "minute") if start else end - DEFAULT_SPANS[granularity]
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    points = (end - bucket_floor(start, granularity)) / step
+    if points > max_points:
+        raise ValueError(f"Range covers {int(points)} {granularity} buckets, more than the limit of {max_points}")
+    return start, end
+
+
+def select_rollup(granularity: str, start: datetime, end: datetime, now: datetime) -> Dict[str, Any]:
+    """Pick the coarsest rollup that answers ``granularity`` buckets exactly over [start, end).
+
+    A rollup qualifies if its buckets are no coarser than the requested granularity and
+    both ends of the range fall on its bucket boundaries. Raises ValueError when only the
+    minute rollup fits but the range reaches past its retention.
+    """
+    finest_allowed = list(GRANULARITY_STEPS).index(granularity)
+    for rollup in reversed(TREND_ROLLUPS[:finest_allowed + 1]):
+        rollup_granularity = rollup["granularity"]
+        if bucket_floor(start, rollup_granularity) == start and bucket_floor(end, rollup_granularity) == end:
+            break
+    retention = rollup["retention"]
+    if retention is not None and start < bucket_floor(now - retention, "day"):
+        if granularity == rollup["granularity"]:
+            raise ValueError(f"{granularity} granularity is only available for the last {retention.days} days")
+        raise ValueError(f"Ranges older than {retention.days} days must start and end on whole hours")
+    return rollup
+
+
+def rollup_query(rollup: Dict[str, Any], granularity: str) -> str:
+    """SQL summing ``rollup`` buckets into ``granularity`` buckets between :start and :end"""
+    unit = granularity.upper()
+    return f"""
+        SELECT
+            DATE_TRUNC('{unit}', bucket_start) as bucket,
+            SUM(call_count) as call_count
+        FROM {rollup["table"]}
+        WHERE bucket_start >= :start AND bucket_start < :end
+        GROUP BY DATE_TRUNC('{unit}', bucket_start)
+        """
+
+
+def fill_trend_buckets(
+    granularity: str, start: datetime, end: datetime, counts: Dict[datetime, int]
+) -> List[Dict[str, Any]]:
+    """Every bucket in [start, end) in order, with 0 for buckets that have no calls"""
+    step = GRANULARITY_STEPS[granularity]
+    bucket = bucket_floor(start, granularity)
+    buckets = []
+    while bucket < end:
+        buckets.append({"bucket": bucket.isoformat(), "call_count": counts.get(bucket, 0)})
+        bucket += step
+    return buckets
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .technician_index import TechnicianIndex
+from .trend_aggregator import to_utc_datetime
+
+logger = logging.getLogger(__name__)
+
+# Loads every active (planned/underway) visit, as returned by get_technician_visits
+VisitLoader = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+# (min_lat, min_lon, max_lat, max_lon)
+BoundingBox = Tuple[float, float, float, float]
+Cell = Tuple[int, int]
+
+# Visit statuses shown on the map, counted per cluster
+ACTIVE_STATUSES = ("planned", "underway")
+MAX_ZOOM = 22
+
+
+def validate_bbox(min_lat, min_lon, max_lat, max_lon) -> Optional[BoundingBox]:
+    """The bounding box as a tuple, None if no bound is given; raises ValueError if partial or invalid"""
+    bounds = (min_lat, min_lon, max_lat, max_lon)
+    if all(b is None for b in bounds):
+        return None
+    if any(b is None for b in bounds):
+        raise ValueError("Give all of min_lat, min_lon, max_lat and max_lon, or none")
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("Latitudes must satisfy -90 <= min_lat <= max_lat <= 90")
+    if not (-180 <= min_lon <= max_lon <= 180):
+        raise ValueError("Longitudes must satisfy -180 <= min_lon <= max_lon <= 180")
+    return bounds
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BoundingBox]:
+    """Parse "min_lat,min_lon,max_lat,max_lon" and validate it; raises ValueError if malformed"""
+    if not value:
+        return None
+    parts = value.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lat,min_lon,max_lat,max_lon")
+    try:
+        bounds = [float(part) for part in parts]
+    except ValueError:
+        raise ValueError("bbox must be four numbers: min_lat,min_lon,max_lat,max_lon")
+    return validate_bbox(*bounds)
+
+
+def cluster_cell_degrees(zoom: int, cell_pixels: int = 64) -> float:
+    """Size in degrees of ``cell_pixels`` screen pixels at web map ``zoom`` (256 pixel tiles)"""
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}")
+    return 360.0 / (2 ** zoom) * cell_pixels / 256
+
+
+def cell_of(lat: float, lon: float, cell_degrees: float) -> Cell:
+    return math.floor(lat / cell_degrees), math.floor(lon / cell_degrees)
+
+
+def _overlapping(cells: Dict[Cell, Any], cell_degrees: float, bbox: BoundingBox) -> List[Any]:
+    """Values of the occupied cells overlapping ``bbox``, in no particular order"""
+    (lat0, lon0), (lat1, lon1) = cell_of(bbox[0], bbox[1], cell_degrees), cell_of(bbox[2], bbox[3], cell_degrees)
+    if (lat1 - lat0 + 1) * (lon1 - lon0 + 1) > len(cells):
+        # Box wider than the populated area: scanning the occupied cells is cheaper
+        return [value for (x, y), value in cells.items() if lat0 <= x <= lat1 and lon0 <= y <= lon1]
+    found = (cells.get((x, y)) for x in range(lat0, lat1 + 1) for y in range(lon0, lon1 + 1))
+    return [value for value in found if value is not None]
+
+
+def visit_matches(
+    visit: Dict[str, Any],
+    bbox: Optional[BoundingBox] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    technician_ids: Optional[Set[str]] = None,
+) -> bool:
+    """Whether ``visit`` passes the map filters (times are naive UTC; ``end`` is exclusive)"""
+    if bbox is not None:
+        lat, lon = visit.get("latitude"), visit.get("longitude")
+        if lat is None or lon is None or not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]):
+            return False
+    if technician_ids and visit.get("technician_id") not in technician_ids:
+        return False
+    if start is not None or end is not None:
+        if not visit.get("visit_date"):
+            return False
+        visit_time = to_utc_datetime(visit["visit_date"])
+        if (start is not None and visit_time < start) or (end is not None and visit_time >= end):
+            return False
+    return True
+
+
+class VisitGrid:
+    """Active visits bucketed into ``cell_degrees`` x ``cell_degrees`` lat/lon cells.
+
+    A bounding-box lookup only visits the cells overlapping the box, so a pan over a
+    city touches a handful of cells instead of the whole fleet. Visits keep their
+    load order (visit_date) within the result.
+    """
+
+    def __init__(self, visits: Sequence[Dict[str, Any]], cell_degrees: float = 0.5):
+        self.cell_degrees = cell_degrees
+        self.size = len(visits)
+        self._all = list(visits)
+        # cell -> [(load position, visit)]
+        self._cells: Dict[Cell, List[Tuple[int, Dict[str, Any]]]] = {}
+        for position, visit in enumerate(self._all):
+            if visit.get("latitude") is None or visit.get("longitude") is None:
+                continue
+            cell = cell_of(visit["latitude"], visit["longitude"], cell_degrees)
+            self._cells.setdefault(cell, []).append((position, visit))
+        # (zoom, cell_pixels) -> clusters, built on first use; a refresh replaces the grid and with it this cache
+        self._clusters: Dict[Tuple[int, int], VisitClusters] = {}
+        self._technicians: Optional[TechnicianIndex] = None
+
+    @property
+    def cell_count(self) -> int:
+        return len(self._cells)
+
+    def clusters(self, zoom: int, cell_pixels: int = 64) -> "VisitClusters":
+        """The visits clustered for ``zoom``, computed once per zoom level"""
+        key = (zoom, cell_pixels)
+        if key not in self._clusters:
+            self._clusters[key] = VisitClusters.from_visits(self._all, zoom, cell_pixels)
+        return self._clusters[key]
+
+    def technicians(self) -> TechnicianIndex:
+        """Technician positions and workloads over these visits, built on first use"""
+        if self._technicians is None:
+            self._technicians = TechnicianIndex(self._all)
+        return self._technicians
+
+    def query(
+        self,
+        bbox: Optional[BoundingBox] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        technician_ids: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        if bbox is None:
+            return [v for v in self._all if visit_matches(v, None, start, end, technician_ids)]
+        candidates = []
+        for entries in _overlapping(self._cells, self.cell_degrees, bbox):
+            candidates.extend(entries)
+        candidates.sort(key=lambda entry: entry[0])
+        return [v for _, v in candidates if visit_matches(v, bbox, start, end, technician_ids)]
+
+
+class VisitClusters:
+    """Map clusters for one zoom level: visits aggregated per ``cell_pixels`` screen cell.
+
+    Each cluster has the visit count, centroid, per-status counts and the bounds of its
+    visits, so a viewport returns at most one cluster per screen cell however many
+    visits there are.
+    """
+
+    def __init__(self, zoom: int, cell_pixels: int, clusters: Dict[Cell, Dict[str, Any]]):
+        self.zoom = zoom
+        self.cell_degrees = cluster_cell_degrees(zoom, cell_pixels)
+        self.visit_count = sum(cluster["count"] for cluster in clusters.values())
+        self._clusters = clusters
+
+    @classmethod
+    def from_visits(cls, visits: Sequence[Dict[str, Any]], zoom: int, cell_pixels: int = 64) -> "VisitClusters":
+        cell_degrees = cluster_cell_degrees(zoom, cell_pixels)
+        sums: Dict[Cell, Dict[str, Any]] = {}
+        for visit in visits:
+            lat, lon = visit.get("latitude"), visit.get("longitude")
+            if lat is None or lon is None:
+                continue
+            cell = cell_of(lat, lon, cell_degrees)
+            acc = sums.get(cell)
+            if acc is None:
+                acc = sums[cell] = {
+                    "count": 0, "lat_sum": 0.0, "lon_sum": 0.0,
+                    "statuses": dict.fromkeys(ACTIVE_STATUSES, 0),
+                    "bounds": [lat, lon, lat, lon],
+                }
+            acc["count"] += 1
+            acc["lat_sum"] += lat
+            acc["lon_sum"] += lon
+            status = visit.get("visit_status")
+            acc["statuses"][status] = acc["statuses"].get(status, 0) + 1
+            bounds = acc["bounds"]
+            bounds[0], bounds[1] = min(bounds[0], lat), min(bounds[1], lon)
+            bounds[2], bounds[3] = max(bounds[2], lat), max(bounds[3], lon)
+        clusters = {
+            cell: cls._cluster(zoom, cell, acc["count"], acc["lat_sum"] / acc["count"],
+                               acc["lon_sum"] / acc["count"], acc["statuses"], acc["bounds"])
+            for cell, acc in sums.items()
+        }
+        return cls(zoom, cell_pixels, clusters)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]], zoom: int, cell_pixels: int = 64) -> "VisitClusters":
+        """Clusters from the ``technician_visit_clusters`` query rows (one per cell)"""
+        clusters = {}
+        for row in rows:
+            cell = (int(row["cell_lat"]), int(row["cell_lon"]))
+            clusters[cell] = cls._cluster(
+                zoom, cell, int(row["visit_count"]), float(row["latitude"]), float(row["longitude"]),
+                {status: int(row[status] or 0) for status in ACTIVE_STATUSES},
+                [float(row["min_lat"]), float(row["min_lon"]), float(row["max_lat"]), float(row["max_lon"])],
+            )
+        return cls(zoom, cell_pixels, clusters)
+
+    @staticmethod
+    def _cluster(zoom, cell, count, lat, lon, statuses, bounds) -> Dict[str, Any]:
+        return {
+            "id": f"{zoom}/{cell[0]}/{cell[1]}",
+            "count": count,
+            "latitude": lat,
+            "longitude": lon,
+            "statuses": statuses,
+            "bounds": bounds,
+        }
+
+    @property
+    def size(self) -> int:
+        return len(self._clusters)
+
+    def query(self, bbox: Optional[BoundingBox] = None) -> List[Dict[str, Any]]:
+        """Clusters whose cell overlaps ``bbox`` (all clusters if None), largest first"""
+        if bbox is None:
+            clusters = list(self._clusters.values())
+        else:
+            clusters = _overlapping(self._clusters, self.cell_degrees, bbox)
+        return sorted(clusters, key=lambda cluster: (-cluster["count"], cluster["id"]))
+
+
+class VisitIndex:
+    """In-memory grid of active technician visits for the map, refreshed in the background.
+
+    The first read waits for a full load; afterwards reads are answered from the grid
+    and, once it is older than ``refresh_interval``, a reload is scheduled and swapped
+    in when it completes. The active set (planned and underway visits) is small, so a
+    refresh reloads it whole.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0, cell_degrees: float = 0.5):
+        self.refresh_interval = refresh_interval
+        self.cell_degrees = cell_degrees
+        self._grid: Optional[VisitGrid] = None
+        self._refreshed_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self._stats = {
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "queries": 0,
+        }
+
+    async def get_grid(self, load: VisitLoader) -> VisitGrid:
+        """The current grid, loading it first if needed and scheduling a refresh when stale"""
+        if self._grid is None:
+            await self.refresh(load)
+        elif time.monotonic() - self._refreshed_at >= self.refresh_interval and not self._refresh_tasks:
+            task = asyncio.ensure_future(self._background_refresh(load))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        self._stats["queries"] += 1
+        return self._grid
+
+    async def refresh(self, load: VisitLoader) -> None:
+        """Reload the grid; if ``load`` raises, the current grid is kept and the error propagates"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._grid is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                # Another caller refreshed while we were waiting for the lock
+                return
+            visits = await load()
+            # Building the grid is CPU work proportional to the fleet; swap it in whole
+            self._grid = VisitGrid(visits, self.cell_degrees)
+            self._stats["refreshes"] += 1
+            self._refreshed_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "visits": self._grid.size if self._grid else 0,
+            "cells": self._grid.cell_count if self._grid else 0,
+        }
+
+    async def _background_refresh(self, load: VisitLoader) -> None:
+        try:
+            await self.refresh(load)
+        except Exception as e:
+            # Keep serving the current grid; the next read past the interval retries
+            self._stats["refresh_errors"] += 1
+            self._refreshed_at = time.monotonic()
+            logger.error("Background visit index refresh failed: %s", e)
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services import databricks_service
+from services.databricks_service import DatabricksService
+from services.mock_data_service import MockDataStore
+
+
+def _call(event_id, event_time):
+    return {"event_id": event_id, "event_type": "call", "event_time": event_time}
+
+
+@pytest.fixture
+def mock_service(monkeypatch):
+    monkeypatch.setattr(databricks_service, "USE_MOCK_DATA", True)
+    service = DatabricksService()
+    service._mock_store = MockDataStore(
+        customers=[],
+        journeys={
+            "CUST001": [
+                _call("C1", "2025-03-03T10:05:00"),
+                _call("C2", "2025-03-03T10:55:00"),
+                _call("C3", "2025-03-03T12:00:00+00:00"),
+                {"event_id": "V1", "event_type": "visit", "event_time": "2025-03-03T10:30:00"},
+            ],
+            "CUST002": [_call("C4", "2025-03-03T13:59:59"), _call("C5", "2025-03-02T09:00:00")],
+        },
+        visits=[],
+        next_actions={},
+    )
+    yield service
+    asyncio.run(service.close())
+
+
+def test_mock_trends_count_mock_store_calls(mock_service):
+    trends = asyncio.run(
+        mock_service.get_call_trends("hour", datetime(2025, 3, 3, 10), datetime(2025, 3, 3, 14))
+    )
+    assert trends["source"] == "mock"
+    assert [(b["bucket"], b["call_count"]) for b in trends["buckets"]] == [
+        ("2025-03-03T10:00:00", 2),
+        ("2025-03-03T11:00:00", 0),
+        ("2025-03-03T12:00:00", 1),
+        ("2025-03-03T13:00:00", 1),
+    ]
+
+
+def test_mock_trends_exclude_calls_outside_range(mock_service):
+    trends = asyncio.run(
+        mock_service.get_call_trends("day", datetime(2025, 3, 2), datetime(2025, 3, 4))
+    )
+    assert [b["call_count"] for b in trends["buckets"]] == [1, 4]
+    trends = asyncio.run(
+        mock_service.get_call_trends("hour", datetime(2025, 3, 3, 11), datetime(2025, 3, 3, 12))
+    )
+    assert [b["call_count"] for b in trends["buckets"]] == [0]
@@ -0,0 +1,191 @@
+import types
+
+import pytest
+
+from services import connection_pool
+from services.connection_pool import ConnectionPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise RuntimeError("connection reset")
+        self.connection.executed.append(sql)
+
+    def fetchall(self):
+        return [(1,)]
+
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.open = True
+        self.broken = False
+        self.closed = False
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+        self.open = False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(connection_pool, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+def make_pool(connections, **kwargs):
+    def connect(user_token):
+        conn = FakeConnection(f"{user_token}-{len(connections)}")
+        connections.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs)
+
+
+def test_released_connection_is_reused(clock, connections):
+    pool = make_pool(connections)
+    first = pool.acquire("alice")
+    pool.release("alice", first)
+    assert pool.acquire("alice") is first
+    stats = pool.stats()
+    assert (stats["misses"], stats["hits"], stats["in_use"], stats["idle"]) == (1, 1, 1, 0)
+
+
+def test_users_get_separate_connections(clock, connections):
+    pool = make_pool(connections)
+    alice = pool.acquire("alice")
+    pool.release("alice", alice)
+    assert pool.acquire("bob") is not alice
+    assert pool.stats()["users"] == 2
+
+
+def test_idle_connection_expires(clock, connections):
+    pool = make_pool(connections, idle_timeout=10.0)
+    first = pool.acquire("alice")
+    pool.release("alice", first)
+    clock.now += 11
+    second = pool.acquire("alice")
+    assert second is not first
+    assert first.closed
+    assert pool.stats()["expired"] == 1
+
+
+def test_long_idle_connection_is_health_checked(clock, connections):
+    pool = make_pool(connections, health_check_interval=5.0)
+    first = pool.acquire("alice")
+    pool.release("alice", first)
+    clock.now += 1
+    assert pool.acquire("alice") is first
+    assert first.executed == []
+    pool.release("alice", first)
+    clock.now += 6
+    assert pool.acquire("alice") is first
+    assert first.executed == ["SELECT 1"]
+
+
+def test_failed_health_check_replaces_connection(clock, connections):
+    pool = make_pool(connections, health_check_interval=5.0)
+    first = pool.acquire("alice")
+    pool.release("alice", first)
+    first.broken = True
+    clock.now += 6
+    second = pool.acquire("alice")
+    assert second is not first
+    assert first.closed
+    stats = pool.stats()
+    assert (stats["discarded"], stats["open"]) == (1, 1)
+
+
+def test_closed_connection_is_discarded_on_release(clock, connections):
+    pool = make_pool(connections)
+    first = pool.acquire("alice")
+    first.open = False
+    pool.release("alice", first)
+    assert pool.stats()["idle"] == 0
+    assert pool.acquire("alice") is not first
+
+
+def test_failed_query_discards_connection(clock, connections):
+    pool = make_pool(connections)
+    with pytest.raises(RuntimeError):
+        with pool.connection("alice") as conn:
+            raise RuntimeError("query failed")
+    assert conn.closed
+    assert pool.stats()["open"] == 0
+
+
+def test_exhausted_pool_times_out(clock, connections):
+    pool = make_pool(connections, max_size=1, acquire_timeout=0)
+    pool.acquire("alice")
+    with pytest.raises(TimeoutError):
+        pool.acquire("alice")
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_connect_failure_frees_the_slot(clock):
+    attempts = []
+
+    def connect(user_token):
+        attempts.append(user_token)
+        if len(attempts) == 1:
+            raise RuntimeError("warehouse unavailable")
+        return FakeConnection(user_token)
+
+    pool = ConnectionPool(connect, max_size=1, acquire_timeout=0)
+    assert pool.acquire("alice") is None
+    assert pool.acquire("alice") is not None
+
+
+def test_least_recently_used_idle_pool_is_evicted(clock, connections):
+    pool = make_pool(connections, max_users=2)
+    alice = pool.acquire("alice")
+    pool.release("alice", alice)
+    bob = pool.acquire("bob")
+    pool.release("bob", bob)
+    # Touch alice so bob is the least recently used
+    pool.release("alice", pool.acquire("alice"))
+    pool.acquire("carol")
+    assert bob.closed and not alice.closed
+    assert pool.stats()["evicted_pools"] == 1
+    assert pool.acquire("alice") is alice
+
+
+def test_pool_with_checked_out_connection_is_not_evicted(clock, connections):
+    pool = make_pool(connections, max_users=2)
+    alice = pool.acquire("alice")
+    bob = pool.acquire("bob")
+    pool.release("bob", bob)
+    pool.acquire("carol")
+    assert bob.closed
+    # Alice's pool survived, so her connection goes back to it
+    pool.release("alice", alice)
+    assert not alice.closed
+    assert pool.acquire("alice") is alice
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from services import databricks_service
+from services.databricks_service import JOURNEY_QUERY_MODES, DatabricksService
+from services.embedded_backend import EmbeddedBackend, format_timestamp, translate_sql
+
+
+@pytest.fixture
+def embedded_service(monkeypatch, tmp_path):
+    monkeypatch.setattr(databricks_service, "QUERY_BACKEND", "embedded")
+    monkeypatch.setattr(databricks_service, "USE_MOCK_DATA", False)
+    monkeypatch.setenv("EMBEDDED_DB_PATH", str(tmp_path / "embedded.db"))
+    service = DatabricksService()
+    yield service
+    asyncio.run(service.close())
+
+
+def test_format_timestamp_matches_stored_format():
+    assert format_timestamp(datetime(2025, 1, 2, 3, 4, 5)) == "2025-01-02T03:04:05.000"
+    assert format_timestamp(datetime(2025, 1, 2, 3, 4, 5, 123456)) == "2025-01-02T03:04:05.123"
+    aware = datetime(2025, 1, 2, 5, 4, 5, tzinfo=timezone.utc).astimezone()
+    assert format_timestamp(aware) == "2025-01-02T05:04:05.000"
+    assert translate_sql("SELECT TIMESTAMP '2025-01-02 03:04:05'") == "SELECT '2025-01-02T03:04:05.000'"
+
+
+def test_bound_timestamp_equals_stored_value(tmp_path):
+    backend = EmbeddedBackend(path=str(tmp_path / "embedded.db"))
+    try:
+        connection = backend.connect(None)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT call_id, call_timestamp FROM customer_calls WHERE call_id = 'CALL003'")
+            _, stored = cursor.fetchall()[0]
+            cursor.execute(
+                "SELECT COUNT(*) FROM customer_calls WHERE call_timestamp = :at",
+                parameters={"at": datetime.fromisoformat(stored)},
+            )
+            assert cursor.fetchall()[0][0] == 1
+        connection.close()
+    finally:
+        backend.close()
+
+
+@pytest.mark.parametrize("mode", JOURNEY_QUERY_MODES)
+def test_journey_pages_to_exhaustion(embedded_service, mode):
+    embedded_service._journey_query_mode = mode
+
+    async def page_all():
+        seen, cursor = [], None
+        for _ in range(50):
+            page = await embedded_service.get_customer_journey_page("CUST001", limit=2, before=cursor)
+            seen.extend(event["event_id"] for event in page["events"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return seen
+        pytest.fail(f"Journey paging did not end: {seen}")
+
+    full = asyncio.run(embedded_service.get_customer_journey_page("CUST001", limit=100))["events"]
+    paged = asyncio.run(page_all())
+    # CUST001 has events sharing a timestamp (WEB001 and CALL003); they must neither repeat nor stall paging
+    assert len(paged) == len(set(paged))
+    assert paged == [event["event_id"] for event in full]
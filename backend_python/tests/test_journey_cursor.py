@@ -0,0 +1,32 @@
+import pytest
+
+from services.databricks_service import decode_journey_cursor, encode_journey_cursor
+
+
+def test_cursor_round_trips_the_sort_key():
+    event = {"event_time": "2025-03-03T10:05:00", "event_type": "call", "event_id": 42}
+    assert decode_journey_cursor(encode_journey_cursor(event)) == ("2025-03-03T10:05:00", "call", "42")
+
+
+def test_cursor_is_url_safe():
+    event = {"event_time": "2025-03-03T10:05:00+00:00", "event_type": "visit", "event_id": "V?/+1"}
+    cursor = encode_journey_cursor(event)
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+    assert decode_journey_cursor(cursor)[2] == "V?/+1"
+
+
+def test_bare_timestamp_is_a_time_bound():
+    assert decode_journey_cursor("2025-03-03T10:05:00") == ("2025-03-03T10:05:00", "", "")
+
+
+def test_cursors_order_like_events():
+    earlier = {"event_time": "2025-03-03T10:05:00", "event_type": "call", "event_id": "C1"}
+    later = {"event_time": "2025-03-03T10:05:00", "event_type": "visit", "event_id": "V1"}
+    assert decode_journey_cursor(encode_journey_cursor(earlier)) < decode_journey_cursor(encode_journey_cursor(later))
+    assert decode_journey_cursor("2025-03-03T10:05:00") < decode_journey_cursor(encode_journey_cursor(earlier))
+
+
+@pytest.mark.parametrize("value", ["", "yesterday", "not-a-cursor!", "WyJ4IiwgImNhbGwiLCAiMSJd"])
+def test_invalid_cursor_raises_value_error(value):
+    with pytest.raises(ValueError):
+        decode_journey_cursor(value)
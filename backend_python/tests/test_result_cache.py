@@ -0,0 +1,144 @@
+import asyncio
+import types
+
+import pytest
+
+from services import result_cache
+from services.result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Loader:
+    """Returns 1, 2, 3... on successive calls, or raises once ``fail`` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("query failed")
+        return self.calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_value_is_served_until_ttl(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        assert await cache.get_or_load("k", load, ttl=10) == 1
+        clock.now += 9
+        assert await cache.get_or_load("k", load, ttl=10) == 1
+        clock.now += 2
+        assert await cache.get_or_load("k", load, ttl=10) == 2
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_stale_value_is_served_while_refreshing(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        await cache.get_or_load("k", load, ttl=10, stale_ttl=20)
+        clock.now += 15
+        # Both stale reads return the old value; only the first schedules a reload
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 1
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 1
+        await _settle()
+        assert load.calls == 2
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 2
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["stale_hits"], stats["refreshes"], stats["hits"]) == (2, 1, 1)
+
+
+def test_expired_value_waits_for_loader(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        await cache.get_or_load("k", load, ttl=10, stale_ttl=20)
+        clock.now += 31
+        return await cache.get_or_load("k", load, ttl=10, stale_ttl=20)
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failed_load_is_not_cached(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        load.fail = True
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("k", load, ttl=10)
+        assert cache.stats()["entries"] == 0
+        load.fail = False
+        return await cache.get_or_load("k", load, ttl=10)
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failed_refresh_keeps_stale_value(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        await cache.get_or_load("k", load, ttl=10, stale_ttl=20)
+        clock.now += 15
+        load.fail = True
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 1
+        await _settle()
+        # The stale value is still served and the next stale read retries the refresh
+        load.fail = False
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 1
+        await _settle()
+        assert await cache.get_or_load("k", load, ttl=10, stale_ttl=20) == 3
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["refresh_errors"], stats["refreshes"]) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    async def scenario():
+        cache, load = ResultCache(max_entries=2), Loader()
+        await cache.get_or_load("a", load, ttl=10)
+        await cache.get_or_load("b", load, ttl=10)
+        await cache.get_or_load("a", load, ttl=10)
+        await cache.get_or_load("c", load, ttl=10)
+        # "b" was evicted, so it loads again; "a" is still cached
+        assert await cache.get_or_load("a", load, ttl=10) == 1
+        assert await cache.get_or_load("b", load, ttl=10) == 4
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["evictions"] == 2
+    assert stats["entries"] == 2
+
+
+def test_invalidate(clock):
+    async def scenario():
+        cache, load = ResultCache(), Loader()
+        await cache.get_or_load("a", load, ttl=10)
+        await cache.get_or_load("b", load, ttl=10)
+        cache.invalidate("a")
+        assert await cache.get_or_load("a", load, ttl=10) == 3
+        cache.invalidate()
+        return cache.stats()["entries"]
+
+    assert asyncio.run(scenario()) == 0
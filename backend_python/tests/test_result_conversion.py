@@ -0,0 +1,46 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from services.result_conversion import convert_arrow_table, convert_rows
+
+pa = pytest.importorskip("pyarrow")
+
+TIMES = [
+    datetime(2025, 1, 1, 0, 0, 0),
+    datetime(2025, 1, 1, 0, 0, 0, 120000),
+    datetime(2025, 3, 4, 10, 0, 0, 5),
+    # A zero fraction elsewhere in the value must survive
+    datetime(2000, 10, 1, 10, 0, 0, 500000),
+]
+
+
+@pytest.mark.parametrize("unit", ["s", "ms", "us", "ns"])
+@pytest.mark.parametrize("tz", [None, "UTC"])
+def test_timestamps_match_isoformat(unit, tz):
+    values = [t.replace(tzinfo=timezone.utc) if tz else t for t in TIMES]
+    table = pa.table({"at": pa.array(values, pa.timestamp("us", tz=tz)).cast(pa.timestamp(unit, tz=tz), safe=False)})
+    expected = [{"at": value.isoformat()} for value in pa.array(table["at"]).cast(pa.timestamp("us", tz=tz)).to_pylist()]
+    assert convert_arrow_table(table) == expected
+
+
+def test_arrow_and_row_paths_emit_the_same_values():
+    table = pa.table({
+        "visit_id": ["V1", "V2"],
+        "visit_date": pa.array(TIMES[:2], pa.timestamp("us")),
+        "day": [date(2025, 1, 1), None],
+        "latitude": pa.array([Decimal("40.712800"), None], pa.decimal128(9, 6)),
+        "longitude": pa.array([-74, 1], pa.int64()),
+        "estimated_duration": [60, None],
+    })
+    arrow_rows = convert_arrow_table(table)
+    rows = convert_rows(
+        table.column_names,
+        [(r["visit_id"], r["visit_date"], r["day"], r["latitude"], r["longitude"], r["estimated_duration"]) for r in table.to_pylist()],
+    )
+    assert arrow_rows[0]["latitude"] == rows[0]["latitude"] == 40.7128
+    assert type(rows[0]["latitude"]) is float and type(rows[0]["longitude"]) is float
+    assert arrow_rows[0]["visit_date"] == rows[0]["visit_date"] == "2025-01-01T00:00:00"
+    assert [r["longitude"] for r in arrow_rows] == [r["longitude"] for r in rows]
+    assert [r["estimated_duration"] for r in arrow_rows] == [r["estimated_duration"] for r in rows]
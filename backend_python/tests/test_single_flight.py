@@ -0,0 +1,90 @@
+import asyncio
+import gc
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert calls == 1
+    assert single_flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_sequential_calls_execute_again():
+    single_flight = SingleFlight()
+
+    async def main():
+        first = await single_flight.do("key", lambda: asyncio.sleep(0, result="a"))
+        second = await single_flight.do("key", lambda: asyncio.sleep(0, result="b"))
+        return first, second
+
+    assert asyncio.run(main()) == ("a", "b")
+
+
+def test_failure_is_raised_to_every_caller():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [RuntimeError] * 3
+    assert single_flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(single_flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(single_flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_unretrieved_failure_is_not_logged(caplog):
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        caller = asyncio.ensure_future(single_flight.do("key", fail))
+        await asyncio.sleep(0)
+        # Nobody is left waiting when the shared call fails
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.05)
+
+    with caplog.at_level("ERROR", logger="asyncio"):
+        asyncio.run(main())
+        gc.collect()
+    assert "never retrieved" not in caplog.text
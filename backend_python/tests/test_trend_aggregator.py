@@ -0,0 +1,138 @@
+import asyncio
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import trend_aggregator
+from services.trend_aggregator import CallTrendAggregator, trend_window_starts
+
+NOW = datetime(2025, 3, 10, 14, 30)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Loader:
+    """Serves queued row batches and records the ``since`` of every load"""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.since = []
+
+    async def __call__(self, since):
+        self.since.append(since)
+        batch = self.batches.pop(0)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+
+def row(bucket, call_count, max_timestamp):
+    return {"bucket": bucket.isoformat(), "call_count": call_count, "max_timestamp": max_timestamp.isoformat()}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(trend_aggregator, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def aggregator(clock):
+    aggregator = CallTrendAggregator(refresh_interval=60, lag=300, window_days=30)
+    aggregator.now = NOW
+    aggregator._now = lambda: aggregator.now
+    return aggregator
+
+
+def test_trend_window_starts():
+    assert trend_window_starts(NOW, timedelta(days=30)) == (
+        datetime(2025, 3, 9, 15),
+        datetime(2025, 2, 8, 14),
+    )
+
+
+def test_first_load_covers_the_window(aggregator):
+    load = Loader([
+        row(datetime(2025, 3, 10, 13), 3, datetime(2025, 3, 10, 13, 50)),
+        row(datetime(2025, 3, 1, 9), 2, datetime(2025, 3, 1, 9, 10)),
+    ])
+    trends = asyncio.run(aggregator.get_trends(load))
+    assert load.since == [datetime(2025, 2, 8, 14)]
+    assert aggregator.watermark == datetime(2025, 3, 10, 13, 50)
+    hourly = {t["hour"]: t["call_count"] for t in trends["hourly_trends"]}
+    assert hourly[13] == 3 and sum(hourly.values()) == 3
+    assert trends["daily_trends"] == [
+        {"date": "2025-03-01", "call_count": 2},
+        {"date": "2025-03-10", "call_count": 3},
+    ]
+
+
+def test_refresh_loads_from_watermark_minus_lag(aggregator, clock):
+    load = Loader(
+        [row(datetime(2025, 3, 10, 13), 3, datetime(2025, 3, 10, 14, 2))],
+        # The 13:00 bucket is outside the reload, so it keeps its count
+        [row(datetime(2025, 3, 10, 14), 5, datetime(2025, 3, 10, 14, 40))],
+    )
+    asyncio.run(aggregator.refresh(load))
+    clock.now += 60
+    aggregator.now = NOW + timedelta(minutes=15)
+    asyncio.run(aggregator.refresh(load))
+    # Watermark 14:02 minus the 5 minute lag falls in the 13:00 hour
+    assert load.since[1] == datetime(2025, 3, 10, 13)
+    assert aggregator.watermark == datetime(2025, 3, 10, 14, 40)
+    assert aggregator.trends()["daily_trends"] == [{"date": "2025-03-10", "call_count": 8}]
+    assert aggregator.stats()["rows_loaded"] == 2
+
+
+def test_refresh_within_interval_is_skipped(aggregator, clock):
+    load = Loader([row(datetime(2025, 3, 10, 13), 3, datetime(2025, 3, 10, 13, 50))])
+    asyncio.run(aggregator.refresh(load))
+    clock.now += 30
+    asyncio.run(aggregator.refresh(load))
+    assert len(load.since) == 1
+
+
+def test_buckets_outside_the_window_are_pruned(aggregator, clock):
+    load = Loader(
+        [
+            row(datetime(2025, 2, 9, 10), 4, datetime(2025, 2, 9, 10, 5)),
+            row(datetime(2025, 3, 10, 13), 3, datetime(2025, 3, 10, 13, 50)),
+        ],
+        [],
+    )
+    asyncio.run(aggregator.refresh(load))
+    clock.now += 60
+    aggregator.now = NOW + timedelta(days=2)
+    asyncio.run(aggregator.refresh(load))
+    assert aggregator.trends()["daily_trends"] == [{"date": "2025-03-10", "call_count": 3}]
+    assert aggregator.stats()["buckets"] == 1
+
+
+def test_failed_background_refresh_keeps_buckets(aggregator, clock):
+    load = Loader(
+        [row(datetime(2025, 3, 10, 13), 3, datetime(2025, 3, 10, 13, 50))],
+        RuntimeError("warehouse unavailable"),
+    )
+
+    async def scenario():
+        await aggregator.get_trends(load)
+        clock.now += 60
+        # Served from memory while the refresh runs (and fails) in the background
+        trends = await aggregator.get_trends(load)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return trends
+
+    trends = asyncio.run(scenario())
+    assert len(load.since) == 2
+    assert trends["daily_trends"] == [{"date": "2025-03-10", "call_count": 3}]
+    assert aggregator.trends()["daily_trends"] == trends["daily_trends"]
+    assert aggregator.stats()["refresh_errors"] == 1
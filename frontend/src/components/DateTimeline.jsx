@@ -2,7 +2,7 @@ import React, { useEffect, useRef } from 'react';
 import { Timeline } from 'vis-timeline/standalone';
 import './DateTimeline.css';
 
-const DateTimeline = ({ events, onEventClick }) => {
+const DateTimeline = ({ events, onEventClick, onReachStart }) => {
   const timelineContainerRef = useRef(null);
   const timelineRef = useRef(null);
 
@@ -133,13 +133,20 @@ const DateTimeline = ({ events, onEventClick }) => {
       }
     });
 
+    // Ask for older events when the user pans or zooms past the oldest loaded one
+    timeline.on('rangechanged', (properties) => {
+      if (properties.byUser && onReachStart && properties.start <= minDate) {
+        onReachStart();
+      }
+    });
+
     // Cleanup
     return () => {
       if (timeline) {
         timeline.destroy();
       }
     };
-  }, [events, onEventClick]);
+  }, [events, onEventClick, onReachStart]);
 
   return (
     <div className="date-timeline-wrapper">
@@ -0,0 +1,48 @@
+import { useEffect, useRef } from 'react';
+
+// Applies a diff event from /api/live/events to the topic's previous value
+export const applyLiveDiff = (value, diff) => {
+  if (diff.changed) {
+    const next = { ...value, ...diff.changed };
+    diff.removed.forEach((key) => delete next[key]);
+    return next;
+  }
+  const { key, added, updated, removed } = diff;
+  const replaced = new Map(updated.map((row) => [row[key], row]));
+  const gone = new Set(removed);
+  return [
+    ...value.filter((row) => !gone.has(row[key])).map((row) => replaced.get(row[key]) || row),
+    ...added,
+  ];
+};
+
+// Subscribes to a live topic. onUpdate receives the topic's current value after every
+// snapshot and diff; with snapshot: false it is called with no value whenever the topic
+// changes, for pages that refetch just the part they show.
+export const useLiveTopic = (topic, onUpdate, { snapshot = true } = {}) => {
+  const callback = useRef(onUpdate);
+  callback.current = onUpdate;
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    let value = null;
+    // EventSource reconnects on its own; the server starts every connection with a snapshot
+    const source = new EventSource(`/api/live/events?topics=${topic}&snapshot=${snapshot}`);
+    source.addEventListener(topic, (message) => {
+      const { type, data } = JSON.parse(message.data);
+      if (!snapshot) {
+        callback.current();
+        return;
+      }
+      if (type === 'snapshot') {
+        value = data;
+      } else if (type === 'diff' && value !== null) {
+        value = applyLiveDiff(value, data);
+      } else {
+        return;
+      }
+      callback.current(value);
+    });
+    return () => source.close();
+  }, [topic, snapshot]);
+};
@@ -8,11 +8,15 @@ import EventCalendar from '../components/EventCalendar';
 import EventDetailModal from '../components/EventDetailModal';
 import './CustomerJourney.css';
 
+const JOURNEY_PAGE_SIZE = 200;
+
 const CustomerJourney = () => {
   const { id } = useParams();
   const navigate = useNavigate();
   const [customer, setCustomer] = useState(null);
   const [journey, setJourney] = useState([]);
+  const [journeyCursor, setJourneyCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [summary, setSummary] = useState(null);
   const [nextAction, setNextAction] = useState(null);
   const [selectedEvent, setSelectedEvent] = useState(null);
@@ -26,17 +30,17 @@ const CustomerJourney = () => {
   const fetchCustomerData = async () => {
     try {
       setLoading(true);
-      const [customerRes, journeyRes, summaryRes, actionRes] = await Promise.all([
-        axios.get(`/api/customers/${id}`),
-        axios.get(`/api/journey/${id}`),
-        axios.get(`/api/customers/${id}/summary`),
-        axios.get(`/api/customers/${id}/next-action`),
-      ]);
-
-      setCustomer(customerRes.data);
-      setJourney(journeyRes.data);
-      setSummary(summaryRes.data);
-      setNextAction(actionRes.data);
+      // One round trip: customer, summary, next best action and the first journey page
+      const response = await axios.get(`/api/customers/${id}/full`, {
+        params: { journey_limit: JOURNEY_PAGE_SIZE },
+      });
+      const { customer: customerData, summary: summaryData, next_action: actionData, journey: journeyData } = response.data;
+
+      setCustomer(customerData);
+      setJourney(journeyData.events);
+      setJourneyCursor(journeyData.next_cursor);
+      setSummary(summaryData);
+      setNextAction(actionData);
     } catch (error) {
       console.error('Error fetching customer data:', error);
     } finally {
@@ -44,6 +48,22 @@ const CustomerJourney = () => {
     }
   };
 
+  const loadOlderEvents = async () => {
+    if (!journeyCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const response = await axios.get(`/api/journey/${id}`, {
+        params: { limit: JOURNEY_PAGE_SIZE, before: journeyCursor },
+      });
+      setJourney((prev) => [...prev, ...response.data.events]);
+      setJourneyCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching older events:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleEventClick = (event) => {
     setSelectedEvent(event);
   };
@@ -119,7 +139,7 @@ const CustomerJourney = () => {
             <>
               <p className="timeline-subtitle">לחץ על כל אירוע לפרטים. ניתן להזיז ולזום באמצעות העכבר.</p>
               {journey.length > 0 ? (
-                <DateTimeline events={journey} onEventClick={handleEventClick} />
+                <DateTimeline events={journey} onEventClick={handleEventClick} onReachStart={loadOlderEvents} />
               ) : (
                 <div className="no-events">לא נמצאו אירועים ללקוח זה.</div>
               )}
@@ -134,6 +154,12 @@ const CustomerJourney = () => {
               )}
             </>
           )}
+
+          {journeyCursor && (
+            <button className="load-more-button" onClick={loadOlderEvents} disabled={loadingMore}>
+              {loadingMore ? 'טוען...' : 'טען אירועים קודמים'}
+            </button>
+          )}
         </div>
       </div>
 
@@ -12,6 +12,7 @@ import {
 } from 'chart.js';
 import { Line, Bar } from 'react-chartjs-2';
 import axios from 'axios';
+import { useLiveTopic } from '../liveUpdates';
 import './Dashboard.css';
 
 ChartJS.register(
@@ -34,44 +35,47 @@ const Dashboard = () => {
     fetchTrends();
   }, []);
 
-  const fetchTrends = async () => {
-    try {
-      const [hourlyRes, dailyRes] = await Promise.all([
-        axios.get('/api/dashboard/trends/hourly'),
-        axios.get('/api/dashboard/trends/daily'),
-      ]);
-
-      // Process hourly data
-      const hourly = hourlyRes.data;
-      const hourlyChartData = {
-        labels: hourly.map((d) => `${d.hour}:00`),
-          datasets: [
-          {
-            label: 'שיחות לשעה',
-            data: hourly.map((d) => d.call_count),
-            borderColor: 'rgb(52, 152, 219)',
-            backgroundColor: 'rgba(52, 152, 219, 0.1)',
-            tension: 0.4,
-          },
-        ],
-      };
-      setHourlyData(hourlyChartData);
+  // Pushed by the server whenever the hourly or daily counts change
+  useLiveTopic('trends', (trends) => applyTrends(trends));
 
-      // Process daily data
-      const daily = dailyRes.data;
-      const dailyChartData = {
-        labels: daily.map((d) => new Date(d.date).toLocaleDateString('he-IL')),
+  const applyTrends = (trends) => {
+    // Process hourly data
+    const hourly = trends.hourly_trends;
+    const hourlyChartData = {
+      labels: hourly.map((d) => `${d.hour}:00`),
         datasets: [
-          {
-            label: 'שיחות ליום',
-            data: daily.map((d) => d.call_count),
-            backgroundColor: 'rgba(231, 76, 60, 0.8)',
-            borderColor: 'rgb(231, 76, 60)',
-            borderWidth: 1,
-          },
-        ],
-      };
-      setDailyData(dailyChartData);
+        {
+          label: 'שיחות לשעה',
+          data: hourly.map((d) => d.call_count),
+          borderColor: 'rgb(52, 152, 219)',
+          backgroundColor: 'rgba(52, 152, 219, 0.1)',
+          tension: 0.4,
+        },
+      ],
+    };
+    setHourlyData(hourlyChartData);
+
+    // Process daily data
+    const daily = trends.daily_trends;
+    const dailyChartData = {
+      labels: daily.map((d) => new Date(d.date).toLocaleDateString('he-IL')),
+      datasets: [
+        {
+          label: 'שיחות ליום',
+          data: daily.map((d) => d.call_count),
+          backgroundColor: 'rgba(231, 76, 60, 0.8)',
+          borderColor: 'rgb(231, 76, 60)',
+          borderWidth: 1,
+        },
+      ],
+    };
+    setDailyData(dailyChartData);
+  };
+
+  const fetchTrends = async () => {
+    try {
+      const summaryRes = await axios.get('/api/dashboard/summary');
+      applyTrends(summaryRes.data);
     } catch (error) {
       console.error('Error fetching trends:', error);
     } finally {
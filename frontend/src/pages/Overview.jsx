@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import {
   useReactTable,
@@ -10,8 +10,13 @@ import {
 import axios from 'axios';
 import StatusIcon from '../components/StatusIcon';
 import InfoCard from '../components/InfoCard';
+import { useLiveTopic } from '../liveUpdates';
 import './Overview.css';
 
+const CUSTOMERS_PAGE_SIZE = 100;
+
+const filterKey = (status, category) => JSON.stringify([status, category]);
+
 const Overview = () => {
   const navigate = useNavigate();
   const [customers, setCustomers] = useState([]);
@@ -19,23 +24,63 @@ const Overview = () => {
   const [loading, setLoading] = useState(true);
   const [sorting, setSorting] = useState([]);
   const [globalFilter, setGlobalFilter] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const [categoryFilter, setCategoryFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Filters of the list being shown; responses to requests sent with other filters are dropped
+  const activeFilters = useRef('');
 
   useEffect(() => {
-    fetchData();
+    fetchStats();
   }, []);
 
-  const fetchData = async () => {
+  // Pushed by the server whenever the counts change
+  useLiveTopic('stats', setStats);
+
+  useEffect(() => {
+    activeFilters.current = filterKey(statusFilter, categoryFilter);
+    // The old list's cursor must not be sent with the new filters
+    setNextCursor(null);
+    fetchCustomers();
+  }, [statusFilter, categoryFilter]);
+
+  const fetchStats = async () => {
     try {
-      const [customersRes, statsRes] = await Promise.all([
-        axios.get('/api/customers'),
-        axios.get('/api/dashboard/stats'),
-      ]);
-      setCustomers(customersRes.data);
+      const statsRes = await axios.get('/api/dashboard/stats');
       setStats(statsRes.data);
     } catch (error) {
-      console.error('Error fetching data:', error);
+      console.error('Error fetching stats:', error);
+    }
+  };
+
+  // Status and category are filtered server-side; the search box filters the loaded rows
+  const fetchCustomers = async (cursor = null) => {
+    const filters = filterKey(statusFilter, categoryFilter);
+    try {
+      if (cursor) {
+        setLoadingMore(true);
+      }
+      const response = await axios.get('/api/customers', {
+        params: {
+          paginate: true,
+          limit: CUSTOMERS_PAGE_SIZE,
+          status: statusFilter || undefined,
+          main_category: categoryFilter || undefined,
+          cursor: cursor || undefined,
+        },
+      });
+      if (filters !== activeFilters.current) {
+        // The filters changed while this page was loading; it belongs to the old list
+        return;
+      }
+      setCustomers((prev) => (cursor ? [...prev, ...response.data.customers] : response.data.customers));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching customers:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -130,6 +175,27 @@ const Overview = () => {
       <div className="table-container">
         <div className="table-header">
           <h2>לקוחות</h2>
+          <select
+            value={statusFilter}
+            onChange={(e) => setStatusFilter(e.target.value)}
+            className="filter-select"
+          >
+            <option value="">כל הסטטוסים</option>
+            <option value="low">נמוכה</option>
+            <option value="normal">רגילה</option>
+            <option value="urgent">דחופה</option>
+          </select>
+          <select
+            value={categoryFilter}
+            onChange={(e) => setCategoryFilter(e.target.value)}
+            className="filter-select"
+          >
+            <option value="">כל הקטגוריות</option>
+            <option value="refrigerator">מקרר</option>
+            <option value="washing machine">מכונת כביסה</option>
+            <option value="oven">תנור</option>
+            <option value="dishwasher">מדיח כלים</option>
+          </select>
           <input
             type="text"
             placeholder="חיפוש לקוחות..."
@@ -170,6 +236,15 @@ const Overview = () => {
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <button
+            className="load-more-button"
+            onClick={() => fetchCustomers(nextCursor)}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'טוען...' : 'טען לקוחות נוספים'}
+          </button>
+        )}
       </div>
     </div>
   );
@@ -1,7 +1,8 @@
-import React, { useEffect, useState } from 'react';
-import { MapContainer, TileLayer, Marker, Popup, CircleMarker } from 'react-leaflet';
+import React, { useEffect, useRef, useState } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, CircleMarker, Tooltip, useMap, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
 import axios from 'axios';
+import { useLiveTopic } from '../liveUpdates';
 import './TechnicianMap.css';
 
 // Fix for default marker icons in React-Leaflet
@@ -12,21 +13,106 @@ L.Icon.Default.mergeOptions({
   shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
 });
 
+const DEFAULT_CENTER = [39.8283, -98.5795]; // Center of USA
+
+// Below this zoom level the server sends clusters instead of individual visits
+const CLUSTER_MAX_ZOOM = 11;
+
+const clamp = (value, min, max) => Math.min(Math.max(value, min), max);
+
+// Bounding box query params for the visible part of the map
+const boundsParams = (map) => {
+  const bounds = map.getBounds();
+  return {
+    min_lat: clamp(bounds.getSouth(), -90, 90),
+    min_lon: clamp(bounds.getWest(), -180, 180),
+    max_lat: clamp(bounds.getNorth(), -90, 90),
+    max_lon: clamp(bounds.getEast(), -180, 180),
+  };
+};
+
+// Loads the visits in view when the map is first shown and after every pan or zoom
+const ViewportWatcher = ({ onViewportChange }) => {
+  const map = useMap();
+
+  useEffect(() => {
+    onViewportChange(boundsParams(map), map.getZoom());
+  }, [map]);
+
+  useMapEvents({
+    moveend: () => onViewportChange(boundsParams(map), map.getZoom()),
+  });
+
+  return null;
+};
+
+// Circle sized by visit count; clicking zooms to the visits it covers
+const ClusterMarker = ({ cluster }) => {
+  const map = useMap();
+  const { bounds, statuses } = cluster;
+  const color = statuses.underway > 0 ? '#e74c3c' : '#3498db';
+
+  const zoomIn = () => {
+    if (bounds[0] === bounds[2] && bounds[1] === bounds[3]) {
+      map.setView([bounds[0], bounds[1]], Math.max(map.getZoom() + 2, CLUSTER_MAX_ZOOM));
+    } else {
+      map.fitBounds([[bounds[0], bounds[1]], [bounds[2], bounds[3]]], { padding: [20, 20] });
+    }
+  };
+
+  return (
+    <CircleMarker
+      center={[cluster.latitude, cluster.longitude]}
+      radius={Math.min(10 + 4 * Math.log2(cluster.count), 40)}
+      pathOptions={{ color, fillColor: color, fillOpacity: 0.6 }}
+      eventHandlers={{ click: zoomIn }}
+    >
+      <Tooltip>
+        {cluster.count} {cluster.count === 1 ? 'ביקור' : 'ביקורים'} · בתהליך: {statuses.underway} · מתוכנן: {statuses.planned}
+      </Tooltip>
+    </CircleMarker>
+  );
+};
+
 const TechnicianMap = () => {
   const [visits, setVisits] = useState([]);
+  const [clusters, setClusters] = useState(null); // set while zoomed out
   const [loading, setLoading] = useState(true);
   const [selectedStatus, setSelectedStatus] = useState('all'); // 'all', 'underway', 'planned'
+  const pendingRequest = useRef(null);
+  const viewport = useRef(null);
 
-  useEffect(() => {
-    fetchVisits();
-  }, []);
+  useEffect(() => () => pendingRequest.current?.abort(), []);
+
+  // Active visits changed somewhere: reload the current viewport (served from the server's visit index)
+  useLiveTopic('visits', () => {
+    if (viewport.current) fetchVisits(...viewport.current);
+  }, { snapshot: false });
 
-  const fetchVisits = async () => {
+  const fetchVisits = async (params, zoom) => {
+    viewport.current = [params, zoom];
+    // Only the latest viewport matters; drop the response for the one we panned away from
+    pendingRequest.current?.abort();
+    const controller = new AbortController();
+    pendingRequest.current = controller;
     try {
-      const response = await axios.get('/api/technicians/visits');
-      setVisits(response.data);
+      if (zoom < CLUSTER_MAX_ZOOM) {
+        const bbox = [params.min_lat, params.min_lon, params.max_lat, params.max_lon].join(',');
+        const response = await axios.get('/api/technicians/visits/clusters', {
+          params: { zoom, bbox },
+          signal: controller.signal,
+        });
+        setClusters(response.data.clusters);
+        setVisits([]);
+      } else {
+        const response = await axios.get('/api/technicians/visits', { params, signal: controller.signal });
+        setClusters(null);
+        setVisits(response.data);
+      }
     } catch (error) {
+      if (axios.isCancel(error)) return;
       console.error('Error fetching visits:', error);
+      setClusters(null);
       // Set default coordinates for demo if API fails
       setVisits([
         {
@@ -109,18 +195,6 @@ const TechnicianMap = () => {
     return acc;
   }, {});
 
-  // Calculate center of map (average of all coordinates)
-  const center = visits.length > 0
-    ? [
-        visits.reduce((sum, v) => sum + (v.latitude || 0), 0) / visits.filter(v => v.latitude).length,
-        visits.reduce((sum, v) => sum + (v.longitude || 0), 0) / visits.filter(v => v.longitude).length,
-      ]
-    : [39.8283, -98.5795]; // Center of USA
-
-  if (loading) {
-    return <div className="loading">טוען ביקורי טכנאים...</div>;
-  }
-
   return (
     <div className="technician-map-page">
       <h1>מפת ביקורי טכנאים</h1>
@@ -163,46 +237,53 @@ const TechnicianMap = () => {
       </div>
 
       <div className="map-container">
-        {visits.length > 0 ? (
-          <MapContainer
-            center={center}
-            zoom={4}
-            style={{ height: '600px', width: '100%' }}
-          >
-            <TileLayer
-              attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
-              url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
-            />
-            {filteredVisits.map((visit) => {
-              if (!visit.latitude || !visit.longitude) return null;
-              return (
-                <Marker
-                  key={visit.visit_id}
-                  position={[visit.latitude, visit.longitude]}
-                  icon={createTechnicianIcon(visit.technician_id, visit.visit_status)}
-                >
-                  <Popup>
-                    <div className="popup-content">
-                      <h3>{visit.customer_name}</h3>
-                      <p><strong>כתובת:</strong> {visit.address}</p>
-                      <p><strong>טכנאי:</strong> {visit.technician_name} ({visit.technician_id})</p>
-                      <p><strong>סטטוס:</strong> {visit.visit_status}</p>
-                      <p><strong>מטרה:</strong> {visit.visit_purpose}</p>
-                      {visit.estimated_duration && (
-                        <p><strong>משך זמן משוער:</strong> {visit.estimated_duration} דקות</p>
-                      )}
-                      {visit.notes && (
-                        <p><strong>הערות:</strong> {visit.notes}</p>
-                      )}
-                    </div>
-                  </Popup>
-                </Marker>
-              );
-            })}
-          </MapContainer>
-        ) : (
+        {/* The map stays mounted so panning can load the visits of the new viewport */}
+        <MapContainer
+          center={DEFAULT_CENTER}
+          zoom={4}
+          style={{ height: '600px', width: '100%' }}
+        >
+          <ViewportWatcher onViewportChange={fetchVisits} />
+          <TileLayer
+            attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+            url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
+          />
+          {clusters && clusters
+            .filter((cluster) => selectedStatus === 'all' || cluster.statuses[selectedStatus] > 0)
+            .map((cluster) => (
+              <ClusterMarker key={cluster.id} cluster={cluster} />
+            ))}
+          {filteredVisits.map((visit) => {
+            if (!visit.latitude || !visit.longitude) return null;
+            return (
+              <Marker
+                key={visit.visit_id}
+                position={[visit.latitude, visit.longitude]}
+                icon={createTechnicianIcon(visit.technician_id, visit.visit_status)}
+              >
+                <Popup>
+                  <div className="popup-content">
+                    <h3>{visit.customer_name}</h3>
+                    <p><strong>כתובת:</strong> {visit.address}</p>
+                    <p><strong>טכנאי:</strong> {visit.technician_name} ({visit.technician_id})</p>
+                    <p><strong>סטטוס:</strong> {visit.visit_status}</p>
+                    <p><strong>מטרה:</strong> {visit.visit_purpose}</p>
+                    {visit.estimated_duration && (
+                      <p><strong>משך זמן משוער:</strong> {visit.estimated_duration} דקות</p>
+                    )}
+                    {visit.notes && (
+                      <p><strong>הערות:</strong> {visit.notes}</p>
+                    )}
+                  </div>
+                </Popup>
+              </Marker>
+            );
+          })}
+        </MapContainer>
+        {loading && <div className="loading">טוען ביקורי טכנאים...</div>}
+        {!loading && visits.length === 0 && !clusters?.length && (
           <div className="no-visits">
-            לא נמצאו ביקורי טכנאים. אנא ודא שקואורדינטות זמינות במסד הנתונים.
+            לא נמצאו ביקורי טכנאים באזור המוצג. הזז את המפה או ודא שקואורדינטות זמינות במסד הנתונים.
           </div>
         )}
       </div>
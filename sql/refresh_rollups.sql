@@ -0,0 +1,53 @@
+-- Customer Journey Visualization App - Incremental Rollup Refresh
+-- Schedule as a Databricks SQL job (e.g. every minute). Each level re-aggregates only the
+-- buckets that can still change: raw calls from the last 2 hours feed the minute and hour
+-- rollups, which in turn feed the current days and weeks. Calls arriving later than that
+-- are picked up by re-running the backfill in rollups.sql.
+
+MERGE INTO call_rollup_minute t
+USING (
+    SELECT DATE_TRUNC('MINUTE', call_timestamp) as bucket_start, COUNT(*) as call_count
+    FROM customer_calls
+    WHERE call_timestamp >= DATE_TRUNC('HOUR', CURRENT_TIMESTAMP() - INTERVAL 2 HOUR)
+    GROUP BY DATE_TRUNC('MINUTE', call_timestamp)
+) s
+ON t.bucket_start = s.bucket_start
+WHEN MATCHED THEN UPDATE SET t.call_count = s.call_count, t.updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (bucket_start, call_count, updated_at) VALUES (s.bucket_start, s.call_count, CURRENT_TIMESTAMP());
+
+MERGE INTO call_rollup_hour t
+USING (
+    SELECT DATE_TRUNC('HOUR', bucket_start) as bucket_start, SUM(call_count) as call_count
+    FROM call_rollup_minute
+    WHERE bucket_start >= DATE_TRUNC('HOUR', CURRENT_TIMESTAMP() - INTERVAL 2 HOUR)
+    GROUP BY DATE_TRUNC('HOUR', bucket_start)
+) s
+ON t.bucket_start = s.bucket_start
+WHEN MATCHED THEN UPDATE SET t.call_count = s.call_count, t.updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (bucket_start, call_count, updated_at) VALUES (s.bucket_start, s.call_count, CURRENT_TIMESTAMP());
+
+MERGE INTO call_rollup_day t
+USING (
+    SELECT DATE_TRUNC('DAY', bucket_start) as bucket_start, SUM(call_count) as call_count
+    FROM call_rollup_hour
+    WHERE bucket_start >= DATE_TRUNC('DAY', CURRENT_TIMESTAMP() - INTERVAL 2 HOUR)
+    GROUP BY DATE_TRUNC('DAY', bucket_start)
+) s
+ON t.bucket_start = s.bucket_start
+WHEN MATCHED THEN UPDATE SET t.call_count = s.call_count, t.updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (bucket_start, call_count, updated_at) VALUES (s.bucket_start, s.call_count, CURRENT_TIMESTAMP());
+
+MERGE INTO call_rollup_week t
+USING (
+    SELECT DATE_TRUNC('WEEK', bucket_start) as bucket_start, SUM(call_count) as call_count
+    FROM call_rollup_day
+    WHERE bucket_start >= DATE_TRUNC('WEEK', CURRENT_TIMESTAMP() - INTERVAL 2 HOUR)
+    GROUP BY DATE_TRUNC('WEEK', bucket_start)
+) s
+ON t.bucket_start = s.bucket_start
+WHEN MATCHED THEN UPDATE SET t.call_count = s.call_count, t.updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED THEN INSERT (bucket_start, call_count, updated_at) VALUES (s.bucket_start, s.call_count, CURRENT_TIMESTAMP());
+
+-- Minute buckets are only kept for the last 14 days
+DELETE FROM call_rollup_minute
+WHERE bucket_start < DATE_TRUNC('DAY', CURRENT_TIMESTAMP() - INTERVAL 14 DAY);
@@ -0,0 +1,55 @@
+-- Customer Journey Visualization App - Call Trend Rollups
+-- Pre-aggregated call counts served by /api/dashboard/trends.
+-- Run once after schemas.sql, then schedule refresh_rollups.sql (e.g. every minute).
+
+-- One row per bucket; bucket_start is the start of the minute/hour/day/week (weeks start on Monday)
+CREATE TABLE IF NOT EXISTS call_rollup_minute (
+    bucket_start TIMESTAMP NOT NULL,
+    call_count BIGINT NOT NULL,
+    updated_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (bucket_start);
+
+CREATE TABLE IF NOT EXISTS call_rollup_hour (
+    bucket_start TIMESTAMP NOT NULL,
+    call_count BIGINT NOT NULL,
+    updated_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (bucket_start);
+
+CREATE TABLE IF NOT EXISTS call_rollup_day (
+    bucket_start TIMESTAMP NOT NULL,
+    call_count BIGINT NOT NULL,
+    updated_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (bucket_start);
+
+CREATE TABLE IF NOT EXISTS call_rollup_week (
+    bucket_start TIMESTAMP NOT NULL,
+    call_count BIGINT NOT NULL,
+    updated_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (bucket_start);
+
+-- Backfill from the full call history (re-run to rebuild after bulk loads or corrections)
+-- Minute buckets are only kept for the last 14 days
+INSERT OVERWRITE call_rollup_minute
+SELECT DATE_TRUNC('MINUTE', call_timestamp), COUNT(*), CURRENT_TIMESTAMP()
+FROM customer_calls
+WHERE call_timestamp >= DATE_TRUNC('DAY', CURRENT_TIMESTAMP() - INTERVAL 14 DAY)
+GROUP BY DATE_TRUNC('MINUTE', call_timestamp);
+
+INSERT OVERWRITE call_rollup_hour
+SELECT DATE_TRUNC('HOUR', call_timestamp), COUNT(*), CURRENT_TIMESTAMP()
+FROM customer_calls
+GROUP BY DATE_TRUNC('HOUR', call_timestamp);
+
+INSERT OVERWRITE call_rollup_day
+SELECT DATE_TRUNC('DAY', bucket_start), SUM(call_count), CURRENT_TIMESTAMP()
+FROM call_rollup_hour
+GROUP BY DATE_TRUNC('DAY', bucket_start);
+
+INSERT OVERWRITE call_rollup_week
+SELECT DATE_TRUNC('WEEK', bucket_start), SUM(call_count), CURRENT_TIMESTAMP()
+FROM call_rollup_day
+GROUP BY DATE_TRUNC('WEEK', bucket_start);
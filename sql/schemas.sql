@@ -105,6 +105,8 @@ CREATE TABLE IF NOT EXISTS next_best_actions (
 ) USING DELTA;
 
 -- Create indexes for performance
+CREATE INDEX IF NOT EXISTS idx_customers_status ON customers(status, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_category ON customers(main_category, customer_id);
 CREATE INDEX IF NOT EXISTS idx_calls_customer ON customer_calls(customer_id);
 CREATE INDEX IF NOT EXISTS idx_calls_timestamp ON customer_calls(call_timestamp);
 CREATE INDEX IF NOT EXISTS idx_visits_customer ON technician_visits(customer_id);